@@ -9,28 +9,36 @@ import logging
 import os
 import time
 import random
-from typing import List, Dict, Tuple, Optional, Any, Callable
+from typing import AsyncIterator, List, Dict, Tuple, Optional, Any, Callable
 from datetime import datetime
 import re
 import traceback
 import gc
 import requests # Added for Wayback Machine API calls
+from urllib.parse import urlparse
 
 from controllers.scraper_controller_base import ScraperControllerBase
 from utils.sqlite_handler import SQLiteHandler
+from utils.course_catalog import CourseCatalog, get_course_catalog
 from utils.scraper.browser_manager import BrowserManager
 from utils.scraper.search_engine import SearchEngine
 from utils.scraper.content_extractor import ContentExtractor
+from utils.scraper.http_session_pool import HttpSessionPool
+from utils.document_parser_pool import DocumentParserPool
 from utils.scraper.text_processor import TextProcessor
 from utils.scraper.result_manager import ResultManager
+from utils.scraper.parquet_result_store import HAS_PYARROW, ParquetResultStore
+from utils.results_index import DEFAULT_RESULTS_INDEX_PATH, ResultsIndex
 from utils.scraper.progress_reporter import ProgressReporter
 from utils.scraper.url_utils import URLUtils
 from utils.scraper.search_engine import ManualCaptchaPendingError
 from utils.scraper.cordis_api_client import CordisApiClient
+from utils.scraper.cordis_page_cache import CordisPageCache
 
 logger = logging.getLogger(__name__)
 
 from utils.config import Config
+from utils.adaptive_delay import AdaptiveDelay
 
 class ScraperController(ScraperControllerBase):
   """
@@ -49,12 +57,63 @@ class ScraperController(ScraperControllerBase):
       # Use the provided browser_manager instance
       self.browser_manager = browser_manager
       self.text_processor = TextProcessor()
-      self.search_engine = SearchEngine(self.browser_manager, self.text_processor, self.config)
-      self.content_extractor = ContentExtractor(self.browser_manager)
-      self.result_manager = ResultManager()
+      # Sesión HTTP con pool de conexiones propia de este worker, compartida por búsqueda y extracción
+      self.http_pool = HttpSessionPool(
+          limit=int(self.config.get('http_pool_limit', 100)),
+          limit_per_host=int(self.config.get('http_pool_limit_per_host', 8)),
+          dns_cache_ttl=int(self.config.get('http_dns_cache_ttl', 300)),
+          keepalive_timeout=float(self.config.get('http_keepalive_timeout', 30)),
+      )
+      self.search_engine = SearchEngine(self.browser_manager, self.text_processor, self.config, http_pool=self.http_pool)
+      # Parseo de PDF/DOCX/XLSX/PPTX en procesos acotados para no bloquear el loop del worker
+      self.parser_pool = DocumentParserPool(
+          max_workers=int(self.config.get('document_parser_workers', 2)),
+          timeout=float(self.config.get('document_parser_timeout', 120)),
+          memory_limit_mb=int(self.config.get('document_parser_memory_mb', 1024)),
+      )
+      self.content_extractor = ContentExtractor(self.browser_manager, http_pool=self.http_pool, parser_pool=self.parser_pool)
+      # Copia columnar opcional de los resultados (Parquet por idioma y prefijo SIC)
+      columnar_store = None
+      if self.config.get('parquet_results_enabled', False):
+          if HAS_PYARROW:
+              columnar_store = ParquetResultStore(
+                  self.config.get('parquet_results_dir', os.path.join('results', 'parquet')),
+                  flush_rows=int(self.config.get('parquet_flush_rows', 5000)),
+                  compact_min_files=int(self.config.get('parquet_compact_min_files', 8)),
+                  compact_interval=float(self.config.get('parquet_compact_interval', 300)),
+              )
+          else:
+              logger.warning("parquet_results_enabled está activo pero pyarrow no está instalado; se omite el almacén Parquet")
+      # Índice SQLite/FTS5 de los resultados que consulta /api/query
+      results_index = None
+      if self.config.get('results_index_enabled', True):
+          try:
+              results_index = ResultsIndex(self.config.get('results_index_path', DEFAULT_RESULTS_INDEX_PATH))
+          except Exception as e:
+              logger.warning(f"No se pudo abrir el índice de resultados; se omite: {e}")
+      self.result_manager = ResultManager(
+          flush_rows=int(self.config.get('results_flush_rows', 500)),
+          flush_interval=float(self.config.get('results_flush_interval', 5)),
+          columnar_store=columnar_store,
+          results_index=results_index,
+      )
       self.progress_reporter = ProgressReporter()
       self.url_utils = URLUtils()
-      self.cordis_api_client = CordisApiClient()
+      # Caché persistente de páginas Cordis compartida por todos los workers (fichero SQLite)
+      cordis_page_cache = None
+      if self.config.get('cordis_cache_enabled', True):
+          cache_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'cordis_pages.sqlite')
+          cordis_page_cache = CordisPageCache(
+              cache_path,
+              ttl=int(self.config.get('cordis_cache_ttl', 7 * 86400)),
+              max_size=int(self.config.get('cordis_cache_max_mb', 512)) * 1024 * 1024,
+              busy_timeout=float(self.config.get('cordis_cache_busy_timeout', 2)),
+          )
+      # Ventana de páginas Cordis en vuelo por curso (1 = recorrido secuencial)
+      self.cordis_api_client = CordisApiClient(
+          page_concurrency=int(self.config.get('cordis_page_concurrency', 4)),
+          page_cache=cordis_page_cache,
+      )
       # Usar la base de datos SQLite en lugar del CSV
       from utils.sqlite_handler import SQLiteHandler
       db_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'courses.db')
@@ -76,11 +135,13 @@ class ScraperController(ScraperControllerBase):
           'files_not_saved': 0,
           'total_errors': 0,
           'captchas_detected': 0,
-          'captchas_solved': 0
+          'captchas_solved': 0,
+          'cordis_cache_hits': 0,
+          'cordis_cache_misses': 0,
+          'cordis_pages_missed': 0
       }
       
-      # Variables para resultados omitidos
-      self.omitted_results = []
+      # Fichero de resultados omitidos (registro CSV que escribe el ResultManager)
       self.omitted_file = ""
       
       # Variables para el progreso basado en resultados
@@ -100,138 +161,153 @@ class ScraperController(ScraperControllerBase):
 
       # Caché para resultados procesados
       self._processed_results_cache = {}
-      self._batch_size = 1  # Further reduced for better stealth - process 1 at a time
-
-      # Semaphore to limit concurrent processing - reduced for better stealth
-      self._processing_semaphore = asyncio.Semaphore(2)  # Limit to 2 concurrent processes
+      # Procesadores de resultados en paralelo durante la tabulación
+      self._tabulation_concurrency = max(1, int(self.config.get('tabulation_concurrency', 8)))
+      # Resultados de búsqueda en espera de tabulación (cota de memoria del flujo búsqueda -> tabulación)
+      self._pipeline_queue_size = max(1, int(self.config.get('pipeline_queue_size', 500)))
+      self._search_active = False
+      # Pausa de cortesía por host, solo para los resultados que descargan contenido
+      self._host_delay = AdaptiveDelay(
+          initial_delay=float(self.config.get('tabulation_host_delay', 0.5)),
+          max_delay=float(self.config.get('tabulation_host_max_delay', 30)),
+      )
 
   async def _process_single_result(self, result: Dict[str, Any], min_words: int, search_engine: str, require_keywords: bool = False) -> Optional[Dict[str, Any]]:
-      """Procesa un único resultado de búsqueda (API-only)."""
-      try:
-          async with self._processing_semaphore:
-              if self.stop_requested:
-                  return None
+      """
+      Procesa un único resultado de búsqueda (API-only).
 
-              sic_code = result.get('sic_code', '')
-              course_name = result.get('course_name', '')
-              search_term = result.get('search_term', '')
-              title = result.get('title', 'Sin Título')
-              url = result.get('url', '')
-              description = result.get('description', 'Sin Descripción')
+      La concurrencia la fija el número de procesadores de la tabulación (tabulation_concurrency);
+      la pausa por host solo retiene al procesador que va a descargar de ese host.
+      """
+      try:
+          if self.stop_requested:
+              return None
 
-              record_identifier = (sic_code, course_name, url)
-              if record_identifier in self.processed_records:
-                  self.stats['skipped_duplicates'] += 1
+          sic_code = result.get('sic_code', '')
+          course_name = result.get('course_name', '')
+          search_term = result.get('search_term', '')
+          title = result.get('title', 'Sin Título')
+          url = result.get('url', '')
+          description = result.get('description', 'Sin Descripción')
+
+          record_identifier = (sic_code, course_name, url)
+          if record_identifier in self.processed_records:
+              self.stats['skipped_duplicates'] += 1
+              self.stats['files_not_saved'] += 1
+              self.result_manager.add_omitted_result({
+                  'sic_code': sic_code,
+                  'course_name': course_name,
+                  'title': title,
+                  'url': url,
+                  'description': description,
+                  'omission_reason': "Registro duplicado (mismo código, curso y URL)"
+              })
+              return None
+
+          self.processed_records.add(record_identifier)
+
+          if not url:
+              return None
+
+          content_extraction_url = result.get('wayback_url', url) if search_engine == 'Wayback Machine' else url
+          
+          # SOLUCIÓN CRÍTICA PARA CORDIS:
+          # Los resultados de Cordis SPARQL ya incluyen título + descripción detallada
+          # Las URLs son páginas de resumen con poco texto extraíble
+          # Usar el contenido de la API directamente evita 1,700+ omisiones
+          source = result.get('source', '')
+          is_cordis = 'cordis' in source.lower() or 'sparql' in source.lower()
+          
+          if is_cordis and description and len(description) > 50:
+              # Usar contenido del API directamente para Cordis
+              logger.info(f"Using Cordis API metadata for {title[:50]}... (skipping URL extraction)")
+              full_content = f"{title}\n\n{description}"
+          else:
+              # Para otras fuentes, extraer contenido de la URL normalmente
+              host = urlparse(content_extraction_url).netloc
+              await self._host_delay.wait(host)
+              try:
+                  full_content = await asyncio.wait_for(self.content_extractor.extract_full_content(content_extraction_url), timeout=60.0)
+              except asyncio.TimeoutError:
+                  self._host_delay.increase_delay(host)
+                  self.stats['failed_content_extraction'] += 1
                   self.stats['files_not_saved'] += 1
-                  self.omitted_results.append({
-                      'sic_code': sic_code,
-                      'course_name': course_name,
-                      'title': title,
-                      'url': url,
-                      'description': description,
-                      'omission_reason': "Registro duplicado (mismo código, curso y URL)"
-                  })
-                  return None
-
-              self.processed_records.add(record_identifier)
-
-              if not url:
+                  self.result_manager.add_omitted_result({'sic_code': sic_code, 'course_name': course_name, 'title': title, 'url': url, 'description': description, 'omission_reason': 'Timeout en extracción de contenido'})
                   return None
 
-              content_extraction_url = result.get('wayback_url', url) if search_engine == 'Wayback Machine' else url
+          if not full_content:
+              logger.warning(f"Content extraction failed for {content_extraction_url}. See content_extractor.log for details.")
+              self.stats['failed_content_extraction'] += 1
+              self.stats['files_not_saved'] += 1
+              self.result_manager.add_omitted_result({'sic_code': sic_code, 'course_name': course_name, 'title': title, 'url': url, 'description': description, 'omission_reason': 'Error en extracción de contenido'})
+              return None
+
+          total_words = self.text_processor.count_all_words(full_content)
+          word_counts = self.text_processor.estimate_keyword_occurrences(full_content, search_term)
+          should_exclude, exclude_reason = self.text_processor.should_exclude_result(total_words, word_counts, min_words)
+
+          if should_exclude:
+              # Log total keywords found for debugging
+              total_keywords = sum(word_counts.values()) if word_counts else 0
+              logger.info(f"   Result EXCLUDED: {exclude_reason} (Keywords sum: {total_keywords})")
               
-              # SOLUCIÓN CRÍTICA PARA CORDIS:
-              # Los resultados de Cordis SPARQL ya incluyen título + descripción detallada
-              # Las URLs son páginas de resumen con poco texto extraíble
-              # Usar el contenido de la API directamente evita 1,700+ omisiones
-              source = result.get('source', '')
-              is_cordis = 'cordis' in source.lower() or 'sparql' in source.lower()
-              
-              if is_cordis and description and len(description) > 50:
-                  # Usar contenido del API directamente para Cordis
-                  logger.info(f"Using Cordis API metadata for {title[:50]}... (skipping URL extraction)")
-                  full_content = f"{title}\n\n{description}"
-              else:
-                  # Para otras fuentes, extraer contenido de la URL normalmente
-                  try:
-                      full_content = await asyncio.wait_for(self.content_extractor.extract_full_content(content_extraction_url), timeout=60.0)
-                  except asyncio.TimeoutError:
-                      self.stats['failed_content_extraction'] += 1
-                      self.stats['files_not_saved'] += 1
-                      self.omitted_results.append({'sic_code': sic_code, 'course_name': course_name, 'title': title, 'url': url, 'description': description, 'omission_reason': 'Timeout en extracción de contenido'})
-                      return None
-
-              if not full_content:
-                  logger.warning(f"Content extraction failed for {content_extraction_url}. See content_extractor.log for details.")
-                  self.stats['failed_content_extraction'] += 1
+              if 'total keywords' in exclude_reason.lower():
+                  self.stats['skipped_low_words'] += 1
                   self.stats['files_not_saved'] += 1
-                  self.omitted_results.append({'sic_code': sic_code, 'course_name': course_name, 'title': title, 'url': url, 'description': description, 'omission_reason': 'Error en extracción de contenido'})
-                  return None
-
-              total_words = self.text_processor.count_all_words(full_content)
-              word_counts = self.text_processor.estimate_keyword_occurrences(full_content, search_term)
-              should_exclude, exclude_reason = self.text_processor.should_exclude_result(total_words, word_counts, min_words)
-
-              if should_exclude:
-                  # Log total keywords found for debugging
-                  total_keywords = sum(word_counts.values()) if word_counts else 0
-                  logger.info(f"   Result EXCLUDED: {exclude_reason} (Keywords sum: {total_keywords})")
-                  
-                  if 'total keywords' in exclude_reason.lower():
-                      self.stats['skipped_low_words'] += 1
-                      self.stats['files_not_saved'] += 1
-                      self.omitted_results.append({
-                          'sic_code': sic_code, 
-                          'course_name': course_name, 
-                          'title': title, 
-                          'url': url, 
-                          'description': description, 
-                          'omission_reason': f'Bajo conteo de palabras clave: {total_keywords} (Mínimo: {min_words})'
-                      })
-                  else:
-                      self.stats['skipped_zero_keywords'] += 1
-                      self.stats['files_not_saved'] += 1
-                      self.omitted_results.append({
-                          'sic_code': sic_code, 
-                          'course_name': course_name, 
-                          'title': title, 
-                          'url': url, 
-                          'description': description, 
-                          'omission_reason': 'Sin coincidencias de palabras clave'
-                      })
-                  return None
-
-              formatted_word_counts = self.text_processor.format_word_counts(total_words, word_counts)
-              if formatted_word_counts.startswith('Total words:') and len(formatted_word_counts.split('|')) == 1:
+                  self.result_manager.add_omitted_result({
+                      'sic_code': sic_code, 
+                      'course_name': course_name, 
+                      'title': title, 
+                      'url': url, 
+                      'description': description, 
+                      'omission_reason': f'Bajo conteo de palabras clave: {total_keywords} (Mínimo: {min_words})'
+                  })
+              else:
                   self.stats['skipped_zero_keywords'] += 1
                   self.stats['files_not_saved'] += 1
-                  self.omitted_results.append({'sic_code': sic_code, 'course_name': course_name, 'title': title, 'url': url, 'description': description, 'omission_reason': 'Sin coincidencias de palabras clave'})
-                  return None
-
-              description = self.text_processor.clean_description(description)
-              if len(description) < 100 and full_content:
-                  content_preview = full_content[:1000]
-                  content_preview = self.text_processor.clean_description(content_preview)
-                  if len(content_preview) > len(description) * 2:
-                      description = content_preview
-
-              result_data = {
-                  'sic_code': sic_code, 
-                  'course_name': course_name, 
-                  'title': title, 
-                  'description': description, 
-                  'url': url, 
-                  'total_words': formatted_word_counts,
-                  'lang': result.get('lang', 'en')
-              }
-              return result_data
+                  self.result_manager.add_omitted_result({
+                      'sic_code': sic_code, 
+                      'course_name': course_name, 
+                      'title': title, 
+                      'url': url, 
+                      'description': description, 
+                      'omission_reason': 'Sin coincidencias de palabras clave'
+                  })
+              return None
+
+          formatted_word_counts = self.text_processor.format_word_counts(total_words, word_counts)
+          if formatted_word_counts.startswith('Total words:') and len(formatted_word_counts.split('|')) == 1:
+              self.stats['skipped_zero_keywords'] += 1
+              self.stats['files_not_saved'] += 1
+              self.result_manager.add_omitted_result({'sic_code': sic_code, 'course_name': course_name, 'title': title, 'url': url, 'description': description, 'omission_reason': 'Sin coincidencias de palabras clave'})
+              return None
+
+          description = self.text_processor.clean_description(description)
+          if len(description) < 100 and full_content:
+              content_preview = full_content[:1000]
+              content_preview = self.text_processor.clean_description(content_preview)
+              if len(content_preview) > len(description) * 2:
+                  description = content_preview
+
+          result_data = {
+              'sic_code': sic_code, 
+              'course_name': course_name, 
+              'title': title, 
+              'description': description, 
+              'url': url, 
+              'total_words': formatted_word_counts,
+              'lang': result.get('lang', 'en'),
+              # Idiomas del documento: se puntúa una vez y se escribe en el CSV de cada idioma
+              'langs': result.get('langs') or [result.get('lang', 'en')]
+          }
+          return result_data
       except Exception as e:
           logger.error(f"Error procesando URL {result.get('url','')}: {e}")
           logger.error(traceback.format_exc())
           self.stats['failed_content_extraction'] += 1
           self.stats['total_errors'] += 1
           self.stats['files_not_saved'] += 1
-          self.omitted_results.append({'sic_code': result.get('sic_code',''), 'course_name': result.get('course_name',''), 'title': result.get('title','Sin Título'), 'url': result.get('url',''), 'description': result.get('description','Sin Descripción'), 'omission_reason': f'Error en extracción de contenido: {e}'})
+          self.result_manager.add_omitted_result({'sic_code': result.get('sic_code',''), 'course_name': result.get('course_name',''), 'title': result.get('title','Sin Título'), 'url': result.get('url',''), 'description': result.get('description','Sin Descripción'), 'omission_reason': f'Error en extracción de contenido: {e}'})
           return None
 
   
@@ -244,13 +320,13 @@ class ScraperController(ScraperControllerBase):
       """
       return await self.browser_manager.check_playwright_browser()
   
-  def _get_courses_in_range_by_position(self, all_courses: List[Tuple[str, str, str, str]], from_sic: str, to_sic: str) -> List[Tuple[str, str, str, str]]:
+  def _get_courses_in_range_by_position(self, catalog: CourseCatalog, from_sic: str, to_sic: str) -> List[Tuple[str, str, str, str]]:
       """
-      Obtiene los cursos en el rango especificado usando POSICIÓN EN LA LISTA.
-      ESTO ES LO QUE ESTABA MAL - ahora usa posición, no comparación alfabética.
+      Obtiene los cursos en el rango especificado según el ORDEN NATURAL de los códigos SIC
+      ("01.0" < "0119.0" < "011903.0" < "500.0"), no la comparación alfabética del texto.
       
       Args:
-          all_courses: Lista completa de tuplas (sic_code, course_name, status, server)
+          catalog: Catálogo de cursos (tuplas (sic_code, course_name, status, server) en orden natural)
           from_sic: Código SIC inicial del rango
           to_sic: Código SIC final del rango
           
@@ -258,36 +334,21 @@ class ScraperController(ScraperControllerBase):
           Lista de cursos en el rango especificado
       """
       try:
-          # Encontrar las posiciones de los códigos en la lista
-          from_index = None
-          to_index = None
-          
-          for i, (sic_code, course_name, status, server) in enumerate(all_courses):
-              if sic_code == from_sic:
-                  from_index = i
-                  logger.info(f"Código 'desde' encontrado en posición {i}: {sic_code} - {course_name}")
-              if sic_code == to_sic:
-                  to_index = i
-                  logger.info(f"Código 'hasta' encontrado en posición {i}: {sic_code} - {course_name}")
-          
-          # Verificar que se encontraron ambos códigos
-          if from_index is None:
+          # Verificar que existen ambos códigos (búsqueda O(1) por SIC)
+          if from_sic not in catalog:
               logger.error(f"Código 'desde' no encontrado: {from_sic}")
               return []
+          logger.info(f"Código 'desde' encontrado: {from_sic} - {catalog.get(from_sic)[1]}")
           
-          if to_index is None:
+          if to_sic not in catalog:
               logger.error(f"Código 'hasta' no encontrado: {to_sic}")
               return []
+          logger.info(f"Código 'hasta' encontrado: {to_sic} - {catalog.get(to_sic)[1]}")
           
-          # Asegurar que from_index <= to_index (intercambiar si es necesario)
-          if from_index > to_index:
-              logger.info(f"Intercambiando índices: from_index={from_index}, to_index={to_index}")
-              from_index, to_index = to_index, from_index
-          
-          # Extraer el rango (inclusive)
-          courses_in_range = all_courses[from_index:to_index + 1]
+          # Extraer el rango (inclusive) por búsqueda binaria; los extremos se intercambian si llegan al revés
+          courses_in_range = catalog.range(from_sic, to_sic)
           
-          logger.info(f"RANGO CALCULADO: desde posición {from_index} hasta {to_index} (inclusive)")
+          logger.info(f"RANGO CALCULADO: desde {from_sic} hasta {to_sic} (inclusive)")
           logger.info(f"TOTAL DE CURSOS EN RANGO: {len(courses_in_range)}")
           
           # Log detallado de todos los cursos en el rango
@@ -304,6 +365,22 @@ class ScraperController(ScraperControllerBase):
           logger.error(f"Error calculando rango por posición: {str(e)}")
           return []
   
+  async def close(self):
+      """
+      Libera los recursos compartidos del controlador (sesiones HTTP y procesos de parseo).
+      Debe llamarse desde el loop del worker antes de que el proceso termine.
+      """
+      self.parser_pool.shutdown()
+      self.result_manager.close()
+      try:
+          await self.cordis_api_client.close()
+      except Exception as e:
+          logger.warning(f"Error cerrando el cliente de Cordis: {e}")
+      try:
+          await self.http_pool.close()
+      except Exception as e:
+          logger.warning(f"Error cerrando el pool HTTP: {e}")
+
   def _clean_memory(self):
       """
       Fuerza la recolección de basura para liberar memoria.
@@ -318,6 +395,8 @@ class ScraperController(ScraperControllerBase):
       """
       logger.info("Detención solicitada por el usuario")
       self.stop_requested = True
+      # Cancelar los parseos de documentos en curso en lugar de esperar a que terminen
+      self.parser_pool.shutdown()
 
   def pause_scraping(self):
       """
@@ -342,11 +421,11 @@ class ScraperController(ScraperControllerBase):
       """
       return self.stop_requested
   
-  async def _process_search_phase(self, courses_in_range: List[Tuple[str, str, str, str]], progress_callback: Optional[Callable] = None, search_engine: str = 'DuckDuckGo', site_domain: Optional[str] = None) -> List[Dict[str, Any]]:
+  async def _process_search_phase(self, courses_in_range: List[Tuple[str, str, str, str]], progress_callback: Optional[Callable] = None, search_engine: str = 'DuckDuckGo', site_domain: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
       """
       Ejecuta la fase de búsqueda del scraping.
+      Genera los resultados curso a curso para que la tabulación los procese mientras se sigue buscando.
       """
-      all_search_results = []
       total_courses = len(courses_in_range)
       current_course = 0
       
@@ -407,7 +486,7 @@ class ScraperController(ScraperControllerBase):
                   result['sic_code'] = sic_code
                   result['course_name'] = course_name
                   result['search_term'] = search_term
-                  all_search_results.append(result)
+                  yield result
               
               self.stats['total_urls_found'] += len(search_results)
               logger.info(f"Encontrados {len(search_results)} resultados para '{search_term}'")
@@ -430,14 +509,12 @@ class ScraperController(ScraperControllerBase):
               logger.error(traceback.format_exc())
               self.stats['total_errors'] += 1
               continue
-      
-      return all_search_results
 
-  async def _process_common_crawl_search_phase(self, courses_in_range: List[Tuple[str, str, str, str]], site_domain: str, progress_callback: Optional[Callable] = None) -> List[Dict[str, Any]]:
+  async def _process_common_crawl_search_phase(self, courses_in_range: List[Tuple[str, str, str, str]], site_domain: str, progress_callback: Optional[Callable] = None) -> AsyncIterator[Dict[str, Any]]:
       """
       Ejecuta la fase de búsqueda del scraping usando Common Crawl.
+      Genera los resultados curso a curso.
       """
-      all_search_results = []
       total_courses = len(courses_in_range)
       current_course = 0
 
@@ -445,7 +522,7 @@ class ScraperController(ScraperControllerBase):
           logger.error("Error Crítico: La búsqueda en Common Crawl se inició sin un dominio especificado.")
           if progress_callback:
               progress_callback(100, "Error: Dominio no especificado para Common Crawl.")
-          return []
+          return
 
       logger.info(f"=== FASE 1: BÚSQUEDA DE RESULTADOS con Common Crawl ====")
       logger.info(f"Total de cursos a procesar en búsqueda: {total_courses}")
@@ -505,7 +582,7 @@ class ScraperController(ScraperControllerBase):
                   result['sic_code'] = sic_code
                   result['course_name'] = course_name
                   result['search_term'] = search_term
-                  all_search_results.append(result)
+                  yield result
               
               self.stats['total_urls_found'] += len(search_results)
               logger.info(f"Encontrados {len(search_results)} resultados para '{search_term}'")
@@ -524,15 +601,13 @@ class ScraperController(ScraperControllerBase):
               logger.error(traceback.format_exc())
               self.stats['total_errors'] += 1
               continue
-      
-      return all_search_results
 
-  async def _process_wayback_machine_search_phase(self, courses_in_range: List[Tuple[str, str, str, str]], site_domain: str, progress_callback: Optional[Callable] = None, gov_only: bool = False) -> List[Dict[str, Any]]:
+  async def _process_wayback_machine_search_phase(self, courses_in_range: List[Tuple[str, str, str, str]], site_domain: str, progress_callback: Optional[Callable] = None, gov_only: bool = False) -> AsyncIterator[Dict[str, Any]]:
       """
       Ejecuta la fase de búsqueda del scraping usando la API de Scraping de Internet Archive.
       Ahora soporta la opción gov_only para retornar solo snapshots cuyo host termina en .gov.
+      Genera los resultados curso a curso.
       """
-      all_search_results = []
       total_courses = len(courses_in_range)
       current_course = 0
 
@@ -540,14 +615,14 @@ class ScraperController(ScraperControllerBase):
           logger.error("Error Crítico: La búsqueda en Wayback Machine se inició sin un dominio especificado.")
           if progress_callback:
               progress_callback(100, "Error: Dominio no especificado para Wayback Machine.")
-          return []
+          return
 
       logger.info(f"=== FASE 1: BÚSQUEDA DE RESULTADOS con Internet Archive Scraping API (gov_only={gov_only}) ====")
       logger.info(f"Total de cursos a procesar en búsqueda: {total_courses}")
 
       # Reuse SearchEngine.search_wayback logic if present
       from utils.scraper.search_engine import SearchEngine
-      search_engine = SearchEngine(self.browser_manager, self.text_processor, self.config)
+      search_engine = SearchEngine(self.browser_manager, self.text_processor, self.config, http_pool=self.http_pool)
 
       for course_item in courses_in_range:
           sic_code = course_item[0]
@@ -586,12 +661,12 @@ class ScraperController(ScraperControllerBase):
                           continue
                   results = filtered
 
-              # Attach SIC/course metadata and append
+              # Attach SIC/course metadata and hand over to tabulation
               for r in results:
                   r['sic_code'] = sic_code
                   r['course_name'] = course_name
                   r['search_term'] = search_term
-                  all_search_results.append(r)
+                  yield r
 
               self.stats['total_urls_found'] += len(results)
               logger.info(f"Encontrados {len(results)} resultados verificados para '{search_term}'")
@@ -608,14 +683,12 @@ class ScraperController(ScraperControllerBase):
               self.stats['total_errors'] += 1
               continue
 
-      return all_search_results
-
 
-  async def _process_cordis_api_phase(self, courses_in_range: List[Tuple[str, str, str, str]], search_mode: str = 'broad', progress_callback: Optional[Callable] = None) -> List[Dict[str, Any]]:
+  async def _process_cordis_api_phase(self, courses_in_range: List[Tuple[str, str, str, str]], search_mode: str = 'broad', progress_callback: Optional[Callable] = None) -> AsyncIterator[Dict[str, Any]]:
       """
       Ejecuta la fase de búsqueda usando la API de Cordis Europa.
+      Genera los resultados página a página, así la tabulación empieza con la primera página del curso.
       """
-      all_search_results = []
       total_courses = len(courses_in_range)
       current_course = 0
       
@@ -647,45 +720,77 @@ class ScraperController(ScraperControllerBase):
           
           logger.info(f"Buscando en Cordis API: '{search_term}' (Original: '{course_name if course_name else sic_code}')")
           
+          found = 0
+          pages = self.cordis_api_client.iter_projects_and_publications(search_term, search_mode=search_mode, progress_callback=progress_callback)
           try:
-              results = await self.cordis_api_client.search_projects_and_publications(search_term, search_mode=search_mode, progress_callback=progress_callback)
-              
-              for r in results:
-                  r['sic_code'] = sic_code
-                  r['course_name'] = course_name
-                  r['search_term'] = search_term
-                  all_search_results.append(r)
+              try:
+                  async for page_results in pages:
+                      if self.stop_requested:
+                          break
+                      for r in page_results:
+                          r['sic_code'] = sic_code
+                          r['course_name'] = course_name
+                          r['search_term'] = search_term
+                          yield r
+                      found += len(page_results)
+                      self.stats['total_urls_found'] += len(page_results)
+              finally:
+                  await pages.aclose()
                   
-              self.stats['total_urls_found'] += len(results)
-              logger.info(f"Encontrados {len(results)} resultados en Cordis API para '{search_term}'")
+              self.stats.update(self.cordis_api_client.get_cache_stats())
+              self.stats.update(self.cordis_api_client.get_page_stats())
+              logger.info(f"Encontrados {found} resultados en Cordis API para '{search_term}'")
               
               if progress_callback:
-                  progress_callback(0, f"Buscando curso {current_course} de {total_courses} - {current_course_info} | Encontrados: {len(results)} resultados", self.stats)
+                  progress_callback(0, f"Buscando curso {current_course} de {total_courses} - {current_course_info} | Encontrados: {found} resultados", self.stats)
                   
           except Exception as e:
               logger.error(f"Error en búsqueda Cordis API para '{search_term}': {e}")
               self.stats['total_errors'] += 1
               continue
-              
-      return all_search_results
 
-  async def _process_tabulation_phase(self, all_search_results: List[Dict[str, Any]], total_courses: int, min_words: int, search_engine: str, progress_callback: Optional[Callable] = None, require_keywords: bool = False) -> List[Dict[str, Any]]:
+  def _pipeline_percentage(self) -> float:
+      """Porcentaje de resultados tabulados; no llega a 100 mientras la búsqueda pueda añadir más."""
+      if not self.total_results_to_process:
+          return 0
+      percentage = (self.processed_results_count / self.total_results_to_process) * 100
+      return min(percentage, 99.0) if self._search_active else percentage
+
+  def _pipeline_progress(self, progress_callback: Optional[Callable]) -> Optional[Callable]:
+      """
+      Envuelve el callback para los mensajes de búsqueda: se intercalan con la tabulación,
+      así que conservan el porcentaje ya alcanzado en vez de volver a 0.
+      """
+      if not progress_callback:
+          return None
+
+      def report(percentage, message, stats=None):
+          progress_callback(max(percentage, self._pipeline_percentage()), message, stats)
+      return report
+
+  async def _process_tabulation_phase(self, search_results: AsyncIterator[Dict[str, Any]], total_courses: int, min_words: int, search_engine: str, progress_callback: Optional[Callable] = None, require_keywords: bool = False) -> int:
       """
-      Ejecuta la fase de tabulación del scraping.
+      Ejecuta la fase de tabulación del scraping a medida que la búsqueda genera resultados.
+      
+      La búsqueda llena una cola acotada (`pipeline_queue_size`) y un pool de procesadores la vacía,
+      así que la tabulación avanza durante las esperas de red de la búsqueda y en memoria solo hay,
+      como mucho, los resultados de la cola. Cada resultado se guarda en cuanto termina; las pausas
+      de cortesía solo afectan a los que descargan contenido (por host, dentro de _process_single_result).
+      Un curso se completa cuando su búsqueda ha terminado y se han procesado todos sus resultados.
+      Las filas guardadas no se retienen: solo se cuentan.
+
+      Returns:
+          Número de resultados guardados
       """
-      processed_results = []
-      self.total_results_to_process = len(all_search_results)
+      saved_count = 0
+      self.total_results_to_process = 0
       self.processed_results_count = 0
-      self.progress_reporter.set_result_counts(0, self.total_results_to_process)
+      self.progress_reporter.set_result_counts(0, 0)
       self.current_phase = 2
       self.current_tabulation_course = 0
       self.progress_reporter.set_phase(2)
 
-      logger.info(f"=== FASE 2: TABULACIÓN DE RESULTADOS ====")
-      logger.info(f"Se encontraron {self.total_results_to_process} resultados totales para procesar")
-
-      if progress_callback:
-          progress_callback(0, f"Iniciando tabulación de {self.total_results_to_process} resultados encontrados")
+      logger.info(f"=== FASE 2: TABULACIÓN DE RESULTADOS (en paralelo con la búsqueda) ====")
 
       if self.stop_requested:
           logger.info("Scraping detenido por el usuario antes de iniciar la fase de tabulación")
@@ -695,77 +800,125 @@ class ScraperController(ScraperControllerBase):
           except Exception as e:
               logger.warning(f"Error en cleanup_if_empty: {e}")
 
-          return processed_results
+          return saved_count
+
+      queue: asyncio.Queue = asyncio.Queue(maxsize=self._pipeline_queue_size)
+      # (sic_code, course_name) -> resultados pendientes, encontrados y guardados del curso
+      courses: Dict[Tuple[str, str], Dict[str, Any]] = {}
+      server_id = self.config.get('server_id', 'UNKNOWN_SERVER')
+      last_report = 0.0
+      self._search_active = True
+
+      def report_progress(sic_code: str, course_name: str, force: bool = False):
+          nonlocal last_report
+          if not progress_callback or self.total_results_to_process == 0:
+              return
+          # A velocidad de CPU no se informa de cada resultado, como mucho dos veces por segundo
+          now = time.monotonic()
+          if not force and now - last_report < 0.5:
+              return
+          last_report = now
+          tabulation_message = self.progress_reporter.report_tabulation_progress(
+              self.processed_results_count, 
+              self.total_results_to_process,
+              sic_code,
+              course_name,
+              total_results=self.total_results_to_process
+          )
+          progress_callback(self._pipeline_percentage(), tabulation_message, self.stats)
+
+      def settle_course(key: Tuple[str, str]):
+          state = courses.get(key)
+          if state is None or not state['search_done'] or state['pending'] or self.stop_requested:
+              return
+          del courses[key]
+          sic_code, course_name = key
 
-      results_by_course = {}
-      for result in all_search_results:
-          sic_code = result.get('sic_code', '')
-          course_name = result.get('course_name', '')
-          key = (sic_code, course_name)
-          if key not in results_by_course:
-              results_by_course[key] = []
-          results_by_course[key].append(result)
-      
-      for i, ((sic_code, course_name), course_results) in enumerate(results_by_course.items()):
-          if self.stop_requested:
-              logger.info("Scraping detenido por el usuario durante la fase de tabulación")
-              break
-          
-          self.current_tabulation_course = i + 1
-          self.progress_reporter.set_tabulation_course(self.current_tabulation_course)
-          
-          logger.info(f"Tabulando curso {self.current_tabulation_course} de {total_courses}: {sic_code} - {course_name}")
-          
-          if progress_callback:
-              progress_percentage = (self.processed_results_count / self.total_results_to_process) * 100
-              tabulation_message = self.progress_reporter.report_tabulation_progress(
-                  self.processed_results_count, 
-                  self.total_results_to_process,
-                  sic_code,
-                  course_name,
-                  total_results=self.total_results_to_process
-              )
-              progress_callback(progress_percentage, tabulation_message, self.stats)
-          
-          for j in range(0, len(course_results), self._batch_size):
-              if self.stop_requested:
-                  logger.info("Scraping detenido por el usuario durante el procesamiento de lotes")
-                  break
-              
-              batch = course_results[j:j+self._batch_size]
-              
-              tasks = [asyncio.create_task(self._process_single_result(result, min_words, search_engine, require_keywords=require_keywords)) for result in batch]
+          # Frontera de curso: los resultados quedan en disco antes de marcarlo como completado
+          self.result_manager.flush(fsync=True)
+          self._clean_memory()
 
-              try:
-                  done, pending = await asyncio.wait(tasks, timeout=180.0, return_when=asyncio.ALL_COMPLETED)
-                  
-                  if pending:
-                      logger.warning(f"{len(pending)} tasks timed out in batch processing")
-                      for task in pending:
-                          task.cancel()
-                      
-                  batch_results = []
-                  for task in done:
-                      try:
-                          if not task.exception():
-                              result = task.result()
-                              if result:
-                                  batch_results.append(result)
-                      except Exception as e:
-                          logger.error(f"Error getting task result: {str(e)}")
-                  
-              except Exception as e:
-                  logger.error(f"Error processing batch: {str(e)}")
-                  batch_results = []
-              
-              for result_data in batch_results:
-                  processed_results.append(result_data)
+          self.csv_handler.update_course_status(sic_code, course_name, "COMPLETADO", server_id)
+          self._report_course_status(sic_code, "Completado", 100)
+
+          # Debug summary for this course
+          logger.info(f"📊 DEBUG SUMMARY for course '{course_name}':")
+          logger.info(f"   - Search results found: {state['found']}")
+          logger.info(f"   - Saved: {state['saved']}")
+          logger.info(f"   - Stats: {self.stats}")
+
+      def end_course_search(key: Tuple[str, str]):
+          if key in courses:
+              courses[key]['search_done'] = True
+              settle_course(key)
+
+      async def produce():
+          current_key = None
+          try:
+              async for result in search_results:
+                  if self.stop_requested:
+                      logger.info("Scraping detenido por el usuario durante el procesamiento de resultados")
+                      break
+                  key = (result.get('sic_code', ''), result.get('course_name', ''))
+                  if key != current_key:
+                      # Los cursos llegan en orden: el primer resultado de uno cierra la búsqueda del anterior
+                      if current_key is not None:
+                          end_course_search(current_key)
+                      current_key = key
+                      if key not in courses:
+                          courses[key] = {'pending': 0, 'found': 0, 'saved': 0, 'search_done': False}
+                          self.current_tabulation_course += 1
+                          self.progress_reporter.set_tabulation_course(self.current_tabulation_course)
+                          logger.info(f"Tabulando curso {self.current_tabulation_course} de {total_courses}: {key[0]} - {key[1]}")
+                          self._report_course_status(key[0], "Procesando", 0)
+                  courses[key]['pending'] += 1
+                  courses[key]['found'] += 1
+                  self.total_results_to_process += 1
+                  self.progress_reporter.set_result_counts(self.processed_results_count, self.total_results_to_process)
+                  await queue.put((key, result))
+          finally:
+              aclose = getattr(search_results, 'aclose', None)
+              if aclose:
+                  await aclose()
+              self._search_active = False
+              if current_key is not None:
+                  end_course_search(current_key)
+              for _ in range(self._tabulation_concurrency):
+                  await queue.put(None)
+
+      async def process():
+          nonlocal saved_count
+          while True:
+              item = await queue.get()
+              if item is None:
+                  return
+              key, result = item
+              sic_code, course_name = key
+              state = courses[key]
+
+              # Tras una parada se vacía la cola sin procesar lo que queda
+              result_data = None
+              if not self.stop_requested:
+                  try:
+                      result_data = await asyncio.wait_for(
+                          self._process_single_result(result, min_words, search_engine, require_keywords=require_keywords),
+                          timeout=180.0
+                      )
+                  except asyncio.TimeoutError:
+                      logger.warning(f"Timeout procesando resultado: {result.get('url', '')}")
+                  except Exception as e:
+                      logger.error(f"Error processing result: {str(e)}")
 
+              if result_data:
                   # Add the result with error handling
                   try:
-                      success = self.result_manager.add_result(result_data)
-                      if success:
-                          self.stats['saved_records'] += 1
+                      # Una fila por idioma del documento: las estadísticas cuentan filas, como los CSV
+                      saved_rows = self.result_manager.add_result(result_data)
+                      if saved_rows:
+                          saved_count += saved_rows
+                          state['saved'] += saved_rows
+                          self.stats['saved_records'] += saved_rows
+                          self._course_result_counts[key] = self._course_result_counts.get(key, 0) + saved_rows
                           logger.info(f"✅ Resultado guardado: {result_data['title']} - {result_data['url']}")
                       else:
                           logger.error(f"❌ FALLO al guardar resultado: {result_data['title']}")
@@ -773,71 +926,44 @@ class ScraperController(ScraperControllerBase):
                   except Exception as e:
                       logger.error(f"❌ ERROR guardando resultado: {e}")
                       self.stats['files_not_saved'] += 1
-              
-              self.processed_results_count += len(batch)
+
+              state['pending'] -= 1
+              self.processed_results_count += 1
               self.progress_reporter.set_result_counts(self.processed_results_count, self.total_results_to_process)
-              
-              if progress_callback:
-                  progress_percentage = (self.processed_results_count / self.total_results_to_process) * 100
-                  tabulation_message = self.progress_reporter.report_tabulation_progress(
-                      self.processed_results_count, 
-                      self.total_results_to_process,
-                      sic_code,
-                      course_name,
-                      total_results=self.total_results_to_process
-                  )
-                  progress_callback(progress_percentage, tabulation_message, self.stats)
-              
-              if j % (self._batch_size * 5) == 0:
-                  self._clean_memory()
-              
-              await asyncio.sleep(0.5)
-      
-          server_id = self.config.get('server_id', 'UNKNOWN_SERVER')
-          self.csv_handler.update_course_status(sic_code, course_name, "COMPLETADO", server_id)
+              report_progress(sic_code, course_name)
+              settle_course(key)
 
-          # Debug summary for this course
-          logger.info(f"📊 DEBUG SUMMARY for course '{course_name}':")
-          logger.info(f"   - Search results found: {len(course_results)}")
-          logger.info(f"   - Processed: {len(batch_results)}")
-          logger.info(f"   - Stats: {self.stats}")
+      try:
+          await asyncio.gather(produce(), *(process() for _ in range(self._tabulation_concurrency)))
+      finally:
+          self._search_active = False
+
+      logger.info(f"Se procesaron {self.processed_results_count} de {self.total_results_to_process} resultados encontrados")
+      if self.processed_results_count:
+          report_progress('', '', force=True)
 
-      return processed_results
+      return saved_count
   
-  def _save_omitted_to_excel(self, custom_path=None) -> str:
+  def _close_omitted_log(self) -> str:
       """
-      Guarda los resultados omitidos en un archivo Excel.
+      Cierra el registro de resultados omitidos de la ejecución.
+      El registro es un CSV que se escribe durante la ejecución; la exportación a Excel
+      se hace bajo demanda (/api/export_omitidos_excel).
+      
+      Returns:
+          Ruta del registro, o "" si no se omitió ningún resultado
       """
       try:
-          if not self.omitted_results and custom_path is None:
-              if not self.omitted_file:
-                  logger.warning("No hay resultados omitidos para guardar y no se especificó ruta")
-                  return ""
-              custom_path = self.omitted_file
-      
-          file_path = custom_path if custom_path else self.omitted_file
+          self.result_manager.omitted_writer.close()
+          omitted_file = self.result_manager.get_omitted_file()
+          if not self.result_manager.omitted_count or not omitted_file or not os.path.exists(omitted_file):
+              return ""
       
-          if not file_path:
-              timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-              # Save in results/omitidos so it gets zipped by download_results
-              project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-              omitted_dir = os.path.join(project_root, 'results', 'omitidos')
-              os.makedirs(omitted_dir, exist_ok=True)
-              file_path = os.path.join(omitted_dir, f"omitidos_{timestamp}.xlsx")
-              logger.info(f"No se especificó archivo para omitidos, usando: {file_path}")
-      
-          os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
-      
-          self.result_manager.omitted_results = self.omitted_results
-          self.result_manager.omitted_file = file_path
-          saved_path = self.result_manager.save_omitted_to_excel()
-      
-          logger.info(f"Se guardaron {len(self.omitted_results)} resultados omitidos en: {saved_path}")
-      
-          return saved_path
+          logger.info(f"Se registraron {self.result_manager.omitted_count} resultados omitidos en: {omitted_file}")
+          return omitted_file
       
       except Exception as e:
-          logger.error(f"Error guardando resultados omitidos: {str(e)}")
+          logger.error(f"Error cerrando el registro de resultados omitidos: {str(e)}")
           return ""
   
   def set_proxy_manager(self, proxy_manager):
@@ -868,7 +994,7 @@ class ScraperController(ScraperControllerBase):
               self.browser_manager.set_proxy_manager(None)
               logger.info("Proxies DESHABILITADOS explícitamente")
   
-  async def run_scraping(self, params: Dict[str, Any], progress_callback: Optional[Callable] = None, worker_id: Optional[int] = None) -> List[Dict[str, Any]]:
+  async def run_scraping(self, params: Dict[str, Any], progress_callback: Optional[Callable] = None, worker_id: Optional[int] = None) -> Dict[str, Any]:
       """
       Ejecuta el proceso de scraping.
       
@@ -876,6 +1002,10 @@ class ScraperController(ScraperControllerBase):
           params: Diccionario de parámetros para la tarea.
           progress_callback: Callback para reportar el progreso.
           worker_id: ID opcional para el trabajador en modo paralelo.
+
+      Returns:
+          Contadores de la ejecución (self.stats); las filas se escriben en disco a medida
+          que se procesan y no se acumulan en memoria. Vacío si no se llegó a procesar nada.
       """
       try:
           self.stop_requested = False
@@ -893,7 +1023,7 @@ class ScraperController(ScraperControllerBase):
                   logger.error("Navegador no disponible, no se puede realizar el scraping para el motor solicitado")
                   if progress_callback:
                       progress_callback(100, "Error: Navegador no disponible para el motor solicitado")
-                  return []
+                  return {}
           else:
               logger.info(f"Modo API-only seleccionado para {search_engine}; omitiendo verificación de navegador.")
               # CRITICAL: Disable browser in ContentExtractor to prevent accidental launches/hangs
@@ -915,11 +1045,15 @@ class ScraperController(ScraperControllerBase):
               'captchas_detected': 0,
               'captchas_solved': 0
           }
+          # Los contadores de la caché y de páginas perdidas de Cordis son acumulados por worker
+          self.stats.update(self.cordis_api_client.get_cache_stats())
+          self.stats.update(self.cordis_api_client.get_page_stats())
           
           self.total_results_to_process = 0
           self.processed_results_count = 0
-          self.omitted_results = []
           self.omitted_file = ""
+          # Resultados guardados por (sic, curso) en esta ejecución (histórico para el planificador)
+          self._course_result_counts = {}
 
           from_sic = params.get('from_sic')
           to_sic = params.get('to_sic')
@@ -935,16 +1069,10 @@ class ScraperController(ScraperControllerBase):
           
           if not from_sic or not to_sic:
               logger.error("Faltan parámetros requeridos")
-              return []
+              return {}
           
           logger.info(f"Creando tarea de fondo para scraping: {{'de_sic': '{from_sic}', 'a_sic': '{to_sic}', 'de_curso': '{from_course}', 'a_curso': '{to_course}', 'min_palabras': {min_words}, 'motor': '{search_engine}', 'dominio': '{site_domain}'}}")
           
-          # UPDATE SEMAPHORE WITH USER CONFIG (Fix for concurrency issue)
-          num_workers = params.get('num_workers', 4)
-          if num_workers > 0:
-              logger.info(f"🚀 Estableciendo concurrencia a {num_workers} workers (Solicitado por usuario)")
-              self._processing_semaphore = asyncio.Semaphore(num_workers)
-          
           output_file, omitted_file = self.result_manager.initialize_output_files(
               from_sic, to_sic, from_course, to_course, search_engine, worker_id=worker_id
           )
@@ -973,19 +1101,21 @@ class ScraperController(ScraperControllerBase):
           if progress_callback:
               progress_callback(0, f"Archivo CSV creado: {output_file}")
       
-          all_sic_codes_with_courses = self.csv_handler.get_detailed_sic_codes_with_courses()
-      
-          if not all_sic_codes_with_courses:
-              logger.warning("No se encontraron códigos SIC detallados con cursos en los datos CSV")
-              return []
-      
           # Use provided batch if available, otherwise calculate range
+          # (la lectura completa de la tabla de cursos solo hace falta para calcular el rango)
           course_batch = params.get('course_batch')
           if course_batch:
               courses_in_range = course_batch
               logger.info(f"Usando lote de cursos provisto por el servidor (tamaño: {len(course_batch)})")
           else:
-              courses_in_range = self._get_courses_in_range_by_position(all_sic_codes_with_courses, from_sic, to_sic)
+              # Instantánea del catálogo cacheada por proceso (se recarga solo si cambia la versión de la BD)
+              catalog = get_course_catalog(self.csv_handler)
+          
+              if not catalog:
+                  logger.warning("No se encontraron códigos SIC detallados con cursos en los datos CSV")
+                  return {}
+          
+              courses_in_range = self._get_courses_in_range_by_position(catalog, from_sic, to_sic)
       
           logger.info(f"CURSOS EN RANGO CALCULADOS: {len(courses_in_range)} códigos SIC desde '{from_sic}' hasta '{to_sic}'")
 
@@ -999,7 +1129,7 @@ class ScraperController(ScraperControllerBase):
                   self.result_manager.cleanup_if_empty()
               except Exception as e:
                   logger.warning(f"Error en cleanup_if_empty: {e}")
-              return []
+              return {}
 
           server_id = self.config.get('server_id', 'UNKNOWN_SERVER')
           logger.info(f"Marcando {len(courses_in_range)} cursos como 'PROCESANDO' en el servidor {server_id}...")
@@ -1007,18 +1137,25 @@ class ScraperController(ScraperControllerBase):
           courses_to_update = [(c[0], c[1]) for c in courses_in_range]
           self.csv_handler.update_range_status(courses_to_update, "PROCESANDO", server_id)
       
+          # La búsqueda alimenta la tabulación en flujo: los resultados se procesan mientras se sigue buscando
+          search_progress = self._pipeline_progress(progress_callback)
           if search_engine == 'Common Crawl':
-              all_search_results = await self._process_common_crawl_search_phase(courses_in_range, site_domain, progress_callback)
+              search_results = self._process_common_crawl_search_phase(courses_in_range, site_domain, search_progress)
           elif search_engine == 'Wayback Machine':
               # Pass gov_only flag to the wayback phase
-              all_search_results = await self._process_wayback_machine_search_phase(courses_in_range, site_domain, progress_callback, gov_only=gov_only)
+              search_results = self._process_wayback_machine_search_phase(courses_in_range, site_domain, search_progress, gov_only=gov_only)
           elif search_engine == 'Cordis Europa API':
-               all_search_results = await self._process_cordis_api_phase(courses_in_range, progress_callback=progress_callback)
+               search_results = self._process_cordis_api_phase(courses_in_range, progress_callback=search_progress)
           else:
-              all_search_results = await self._process_search_phase(courses_in_range, progress_callback, search_engine, site_domain)
+              search_results = self._process_search_phase(courses_in_range, search_progress, search_engine, site_domain)
+
+          require_keywords = params.get('require_keywords', False)
+          saved_count = await self._process_tabulation_phase(search_results, total_courses, min_words, search_engine, progress_callback, require_keywords=require_keywords)
       
-          if not all_search_results:
+          if self.total_results_to_process == 0:
               logger.warning("No se encontraron resultados para procesar")
+              if not self.stop_requested:
+                  self.csv_handler.record_course_result_counts([(c[0], c[1], 0) for c in courses_in_range])
               # Cleanup empty file if exists (Auto-fix)
               try:
                   self.result_manager.cleanup_if_empty()
@@ -1026,39 +1163,24 @@ class ScraperController(ScraperControllerBase):
                   logger.warning(f"Error en cleanup_if_empty: {e}")
               if progress_callback:
                   progress_callback(100, "No se encontraron resultados para procesar")
-              return []
-          
-          if self.stop_requested:
-              logger.info("Scraping detenido por el usuario después de la fase de búsqueda")
-              
-              if self.omitted_results:
-                  self._save_omitted_to_excel()
-                  logger.info(f"Resultados omitidos guardados en: {os.path.abspath(self.omitted_file)}")
-              
-              if progress_callback:
-                  progress_callback(100, f"Proceso detenido por el usuario. Se encontraron {len(all_search_results)} resultados pero no se procesaron.")
-              
-              return []
-      
-          self._clean_memory()
+              return {}
 
-          require_keywords = params.get('require_keywords', False)
-          processed_results = await self._process_tabulation_phase(all_search_results, total_courses, min_words, search_engine, progress_callback, require_keywords=require_keywords)
+          # Histórico de resultados por curso para dimensionar los lotes de futuros trabajos
+          if not self.stop_requested:
+              self.csv_handler.record_course_result_counts([
+                  (c[0], c[1], self._course_result_counts.get((c[0], c[1]), 0)) for c in courses_in_range
+              ])
 
           # After tabulation, ensure all results are flushed to disk
-          logger.info(f"✅ Processo terminado. Resultados procesados: {len(processed_results)}")
+          logger.info(f"✅ Processo terminado. Resultados guardados: {saved_count}")
           logger.info(f"📊 Actualizando estadísticas finales...")
-
-          # Force save any remaining results
-          if len(self.result_manager.results) > len(processed_results):
-              logger.warning(f"⚠️  Encontrados {len(self.result_manager.results) - len(processed_results)} resultados pendientes en el cache")
       
-          omitted_file_path = self._save_omitted_to_excel()
+          omitted_file_path = self._close_omitted_log()
           if omitted_file_path:
               logger.info(f"Resultados omitidos guardados en: {os.path.abspath(omitted_file_path)}")
               self.omitted_file = omitted_file_path
           else:
-              logger.warning("No se pudieron guardar los resultados omitidos o no hay resultados omitidos")
+              logger.info("No hay resultados omitidos en esta ejecución")
           
           try:
               if hasattr(self.browser_manager, 'captcha_solver'):
@@ -1069,6 +1191,9 @@ class ScraperController(ScraperControllerBase):
           except Exception as e:
               logger.error(f"Error actualizando estadísticas de CAPTCHAs: {str(e)}")
           
+          # Volcar y cerrar los CSV antes de verificar su contenido en disco
+          self.result_manager.close()
+
           # Verify final file status
           if os.path.exists(output_file):
               final_file_size = os.path.getsize(output_file)
@@ -1100,16 +1225,18 @@ class ScraperController(ScraperControllerBase):
 
           if progress_callback:
               captcha_info = f" | CAPTCHAs: {self.stats['captchas_detected']} detectados, {self.stats['captchas_solved']} resueltos" if self.stats['captchas_detected'] > 0 else ""
-              progress_callback(100, f"Proceso completado. Se encontraron {len(processed_results)} resultados.{captcha_info}")
+              progress_callback(100, f"Proceso completado. Se encontraron {saved_count} resultados.{captcha_info}")
 
-          return processed_results
+          return dict(self.stats)
       
       except Exception as e:
           logger.error(f"Error durante el scraping: {str(e)}")
           logger.error(traceback.format_exc())
           self.stats['total_errors'] += 1
+          # No perder los resultados que siguen en el búfer de escritura
+          self.result_manager.close()
       
           if progress_callback:
               progress_callback(100, f"Error: {str(e)}")
       
-          return []
+          return {}
@@ -6,7 +6,7 @@ Clase base para el controlador de scraping.
 
 import logging
 import asyncio
-from typing import Dict, Any, Callable, List, Optional
+from typing import Dict, Any, Callable, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +16,29 @@ class ScraperControllerBase:
     def __init__(self):
         """Inicializa el controlador base."""
         self.stop_requested = False
+        self.event_callback: Optional[Callable] = None
+        self.course_status_callback: Optional[Callable] = None
+
+    def set_event_callback(self, callback: Optional[Callable]):
+        """Establece el callback (tipo, mensaje, detalles) para eventos del controlador."""
+        self.event_callback = callback
+
+    def set_course_status_callback(self, callback: Optional[Callable]):
+        """
+        Establece el callback (sic_code, estado, progreso) para informar del estado de cada
+        curso cuando un lote contiene varios cursos.
+        """
+        self.course_status_callback = callback
+
+    def _report_course_status(self, sic_code: str, status: str, progress: float):
+        """Informa del estado de un curso si hay callback registrado (sin propagar errores)."""
+        if self.course_status_callback:
+            try:
+                self.course_status_callback(sic_code, status, progress)
+            except Exception as e:
+                logger.debug(f"Error en course_status_callback para {sic_code}: {e}")
     
-    async def run_scraping(self, params: Dict[str, Any], progress_callback: Optional[Callable] = None) -> List[Dict[str, Any]]:
+    async def run_scraping(self, params: Dict[str, Any], progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
         """
         Ejecuta el proceso de scraping.
         
@@ -26,7 +47,7 @@ class ScraperControllerBase:
             progress_callback: Callback para actualizaciones de progreso
             
         Returns:
-            Lista de diccionarios de resultados
+            Contadores de la ejecución (los resultados se escriben en disco, no se devuelven)
         """
         # Este método debe ser implementado por las clases derivadas
         raise NotImplementedError("Este método debe ser implementado por las clases derivadas")
@@ -130,6 +130,8 @@ class ScraperGUI(ttk.Frame):
         # INICIAR POLLING INCONDICIONALMENTE después de 4 segundos
         # No depende de que la conexión inicial tenga éxito
         self.master.after(4000, self._ensure_polling_running)
+        # Eventos de auditoría por push (SSE); el polling de /api/events queda como respaldo
+        self.master.after(4000, self._start_event_stream)
 
         global_log_handler = get_global_log_handler()
         global_log_handler.set_callback(self._log_callback)
@@ -2398,9 +2400,18 @@ class ScraperGUI(ttk.Frame):
         path = filedialog.asksaveasfilename(defaultextension=".zip")
         if not path:
             return
-        r = _get_scraper().get(f"{self.server_url.get()}/api/download_results")
-        with open(path, "wb") as f:
-            f.write(r.content)
+        # El servidor genera el ZIP en streaming: se escribe a disco por trozos, sin cargarlo en memoria
+        with requests.get(
+            f"{self.server_url.get()}/api/download_results",
+            headers=_BYPASS_HEADERS,
+            stream=True,
+            timeout=(10, 300),
+            verify=False,
+        ) as r:
+            r.raise_for_status()
+            with open(path, "wb") as f:
+                for chunk in r.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
 
     def _on_open_results_folder(self):
         os.startfile("results") if os.name == "nt" else subprocess.run(
@@ -2673,16 +2684,24 @@ class ScraperGUI(ttk.Frame):
                 self._poll_thread_running = False
                 return
 
+        # Copia local del estado: el servidor solo envía lo que cambió desde status_version
+        if getattr(self, '_status_url', None) != url:
+            self._status_url = url
+            self._status_version = 0
+            self._status_workers = {}
+            self._status_courses = {}
+        status_url = f"{url}/api/detailed_status?since={self._status_version}"
+
         try:
             # Intentar con curl_cffi primero, fallback a requests estándar
             try:
                 scraper = _get_scraper()
-                r = scraper.get(f"{url}/api/detailed_status", timeout=10)
+                r = scraper.get(status_url, timeout=10)
             except Exception as scraper_err:
                 logger.warning(f"curl_cffi falló en polling ({scraper_err}), usando requests estándar")
                 import requests as _std_req
                 r = _std_req.get(
-                    f"{url}/api/detailed_status",
+                    status_url,
                     headers=_BYPASS_HEADERS,
                     timeout=10,
                     verify=False,
@@ -2700,13 +2719,16 @@ class ScraperGUI(ttk.Frame):
 
             if r.status_code == 200:
                 data = r.json()
-                workers = data.get("workers", {})
+                # Aplicar el delta (o reemplazar todo si el servidor envió el estado completo)
+                if not data.get("delta", False):
+                    self._status_workers = {}
+                    self._status_courses = {}
+                self._status_workers.update(data.get("workers", {}) or {})
+                self._status_courses.update(data.get("courses", {}) or {})
+                self._status_version = data.get("version", 0)
+                workers = self._status_workers
                 # El servidor devuelve courses como dict {sic: {...}}, convertir a lista
-                courses_raw = data.get("courses", {})
-                if isinstance(courses_raw, dict):
-                    courses = list(courses_raw.values())
-                else:
-                    courses = courses_raw if courses_raw else []
+                courses = list(self._status_courses.values())
 
                 # === TIMER SINCRONIZADO CON EL SERVIDOR ===
                 start_time_iso = data.get("start_time")
@@ -2726,10 +2748,17 @@ class ScraperGUI(ttk.Frame):
                 # === HEARTBEAT: Métricas en tiempo real ===
                 n_workers = n_w
                 n_courses = n_c
-                n_completed = sum(1 for c in (courses or []) if c.get("status") == "Completado") if courses else 0
-                n_processing = sum(1 for c in (courses or []) if c.get("status") == "Procesando") if courses else 0
-                n_pending = sum(1 for c in (courses or []) if c.get("status") == "Pendiente") if courses else 0
-                n_failed = sum(1 for c in (courses or []) if c.get("status") in ["Error", "Fallido"]) if courses else 0
+                counters = data.get("counters")
+                if counters:
+                    n_completed = counters.get("done", 0)
+                    n_processing = counters.get("processing", 0)
+                    n_pending = counters.get("pending", 0)
+                    n_failed = counters.get("error", 0)
+                else:
+                    n_completed = sum(1 for c in (courses or []) if c.get("status") == "Completado") if courses else 0
+                    n_processing = sum(1 for c in (courses or []) if c.get("status") == "Procesando") if courses else 0
+                    n_pending = sum(1 for c in (courses or []) if c.get("status") == "Pendiente") if courses else 0
+                    n_failed = sum(1 for c in (courses or []) if c.get("status") in ["Error", "Fallido"]) if courses else 0
                 csv_total = data.get("csv_total", 0)
 
                 # Progreso promedio
@@ -2988,7 +3017,9 @@ class ScraperGUI(ttk.Frame):
                         0, lambda w=workers, c=courses: self._render_status(w, c)
                     )
 
-            # Events polling (auditoría) con fallback
+            # Events polling (auditoría) con fallback, solo si el stream SSE no está conectado
+            if getattr(self, '_event_stream_connected', False):
+                return
             try:
                 r_logs = _get_scraper().get(
                     f"{url}/api/events?min_id={getattr(self, 'last_event_id', 0)}",
@@ -3030,6 +3061,64 @@ class ScraperGUI(ttk.Frame):
         """Compatibilidad: redirige al nuevo sistema de polling en hilo de fondo."""
         self._schedule_status_poll()
 
+    def _start_event_stream(self):
+        """Abre el canal /api/stream (SSE) en un hilo de fondo para recibir los eventos sin polling."""
+        if self.is_closing:
+            return
+        thread = getattr(self, '_event_stream_thread', None)
+        if thread and thread.is_alive():
+            return
+        self._event_stream_thread = threading.Thread(
+            target=self._event_stream_loop, daemon=True, name="EventStream"
+        )
+        self._event_stream_thread.start()
+
+    def _event_stream_loop(self):
+        """Lee el stream de eventos y reconecta (reanudando desde last_event_id) si se corta."""
+        while not self.is_closing:
+            url = self.server_url.get()
+            if not url:
+                time.sleep(3)
+                continue
+            try:
+                headers = dict(_BYPASS_HEADERS)
+                headers["Accept"] = "text/event-stream"
+                headers["Last-Event-ID"] = str(getattr(self, 'last_event_id', 0))
+                # Timeout de lectura mayor que el keep-alive del servidor (15s)
+                with requests.get(
+                    f"{url}/api/stream?channels=log",
+                    headers=headers,
+                    stream=True,
+                    timeout=(10, 60),
+                    verify=False,
+                ) as r:
+                    if r.status_code != 200:
+                        raise RuntimeError(f"HTTP {r.status_code}")
+                    self._event_stream_connected = True
+                    event_name, data_lines = None, []
+                    for line in r.iter_lines(decode_unicode=True):
+                        if self.is_closing or self.server_url.get() != url:
+                            break
+                        if line is None:
+                            continue
+                        if line == "":
+                            # Fin de mensaje
+                            if event_name == "log" and data_lines:
+                                ev = json.loads("\n".join(data_lines))
+                                self.last_event_id = ev["id"]
+                                self.master.after(0, lambda e=[ev]: self.update_audit_log(e))
+                            event_name, data_lines = None, []
+                        elif line.startswith("event:"):
+                            event_name = line[6:].strip()
+                        elif line.startswith("data:"):
+                            data_lines.append(line[5:].lstrip())
+            except Exception as e:
+                logger.debug(f"[STREAM] Stream de eventos interrumpido: {e}")
+            finally:
+                self._event_stream_connected = False
+            if not self.is_closing:
+                time.sleep(3)
+
 
 class ServerFilesWindow(tk.Toplevel):
     def __init__(self, parent, url):
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Mide la latencia de /api/ping (p50/p95/p99) mientras el servidor atiende trabajo pesado:
+subidas de cursos grandes y previews de CSV en paralelo.
+
+Si el trabajo bloqueante se ejecuta en el loop de FastAPI, el p99 del ping crece hasta la
+duración de la subida más lenta; con el trabajo fuera del loop debe quedarse en milisegundos.
+
+Con --max-p99-ms el script sale con código 1 si el p99 supera el umbral (o si no hubo pings),
+para usarlo como prueba de regresión.
+
+Uso:
+    python scripts/bench_ping_latency.py --url http://localhost:8001 --rows 200000 --seconds 20
+    python scripts/bench_ping_latency.py --preview EN/results_01.0_to_09.0_.csv --max-p99-ms 50
+
+Ojo: --rows sustituye la tabla de cursos del servidor por cursos sintéticos.
+"""
+
+import argparse
+import io
+import statistics
+import sys
+import threading
+import time
+
+import requests
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def synthetic_courses_csv(rows: int) -> bytes:
+    buffer = io.StringIO()
+    buffer.write("id,sic_code,course_name\n")
+    for i in range(rows):
+        buffer.write(f"{i},{i // 100:02d}.{i % 100},Synthetic course {i} for latency benchmark\n")
+    return buffer.getvalue().encode("utf-8")
+
+
+def ping_loop(url, stop, latencies, errors):
+    session = requests.Session()
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            session.get(f"{url}/api/ping", timeout=30).raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+        except requests.RequestException:
+            errors.append(1)
+        time.sleep(0.01)
+
+
+def upload_loop(url, stop, payload, counter):
+    while not stop.is_set():
+        try:
+            requests.post(
+                f"{url}/api/upload_courses",
+                files={"file": ("bench_courses.csv", payload, "text/csv")},
+                timeout=300,
+            )
+            counter.append(1)
+        except requests.RequestException:
+            pass
+
+
+def preview_loop(url, stop, filename, counter):
+    while not stop.is_set():
+        try:
+            requests.get(f"{url}/api/preview_csv", params={"filename": filename, "rows": 5000}, timeout=120)
+            counter.append(1)
+        except requests.RequestException:
+            pass
+
+
+def run(url, seconds, rows, preview, load_threads, max_p99_ms=None):
+    """Lanza la carga y los pings; retorna el código de salida (1 si el p99 supera max_p99_ms)."""
+    stop = threading.Event()
+    latencies, errors, uploads, previews = [], [], [], []
+    threads = [threading.Thread(target=ping_loop, args=(url, stop, latencies, errors), daemon=True)]
+    if rows:
+        payload = synthetic_courses_csv(rows)
+        print(f"CSV sintético: {rows} cursos ({len(payload) / 1024 / 1024:.1f} MB)")
+        threads.append(threading.Thread(target=upload_loop, args=(url, stop, payload, uploads), daemon=True))
+    if preview:
+        for _ in range(load_threads):
+            threads.append(threading.Thread(target=preview_loop, args=(url, stop, preview, previews), daemon=True))
+
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    print(f"Pings: {len(latencies)} (errores: {len(errors)}), subidas: {len(uploads)}, previews: {len(previews)}")
+    if latencies:
+        print(
+            f"Latencia /api/ping  p50={percentile(latencies, 50):.1f} ms  "
+            f"p95={percentile(latencies, 95):.1f} ms  p99={percentile(latencies, 99):.1f} ms  "
+            f"max={max(latencies):.1f} ms  media={statistics.mean(latencies):.1f} ms"
+        )
+    if max_p99_ms is None:
+        return 0
+    if not latencies:
+        print("FALLO: ningún ping respondió")
+        return 1
+    p99 = percentile(latencies, 99)
+    if p99 > max_p99_ms:
+        print(f"FALLO: p99 {p99:.1f} ms supera el máximo de {max_p99_ms:.1f} ms")
+        return 1
+    print(f"OK: p99 {p99:.1f} ms <= {max_p99_ms:.1f} ms")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--rows", type=int, default=0, help="Cursos del CSV sintético a subir en bucle (0 = sin subidas)")
+    parser.add_argument("--preview", default=None, help="Fichero de results/ para pedir previews en bucle")
+    parser.add_argument("--load-threads", type=int, default=4, help="Hilos pidiendo previews")
+    parser.add_argument("--max-p99-ms", type=float, default=None, help="p99 máximo de /api/ping; si se supera, código de salida 1")
+    args = parser.parse_args()
+    sys.exit(run(args.url.rstrip("/"), args.seconds, args.rows, args.preview, args.load_threads, args.max_p99_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Utilidades del almacén Parquet de resultados (results/parquet, ver ParquetResultStore).
+
+- import: copia al almacén los CSV existentes de results/<IDIOMA>/ (resultados anteriores a
+  activar parquet_results_enabled). Importar dos veces el mismo CSV duplica sus filas.
+- query: consulta con poda por idioma/prefijo SIC y solo las columnas pedidas; escribe CSV.
+- compact: fusiona los ficheros pequeños de todas las particiones.
+
+Uso:
+    python scripts/parquet_results.py import --results results
+    python scripts/parquet_results.py query --lang es --sic 50 --columns sic_code,title,url,keyword_count
+    python scripts/parquet_results.py compact --min-files 2
+
+Requiere pyarrow.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.scraper.parquet_result_store import (  # noqa: E402
+    HAS_PYARROW,
+    ParquetResultStore,
+    compact_partition,
+    iter_result_batches,
+)
+
+csv.field_size_limit(sys.maxsize)
+
+
+def import_csvs(results_dir, root):
+    store = ParquetResultStore(root, flush_rows=50000, writer_id=f"import-{int(time.time())}")
+    files = rows = 0
+    for lang_dir in sorted(os.listdir(results_dir)):
+        path = os.path.join(results_dir, lang_dir)
+        if not os.path.isdir(path) or lang_dir.lower() in ("omitidos", "parquet"):
+            continue
+        for name in sorted(os.listdir(path)):
+            if not name.endswith(".csv"):
+                continue
+            with open(os.path.join(path, name), "r", encoding="utf-8", errors="replace", newline="") as f:
+                for row in csv.DictReader(f):
+                    # Sin columna lang (CSV antiguos) manda la carpeta
+                    row["lang"] = row.get("lang") or lang_dir.lower()
+                    store.write(row)
+                    rows += 1
+            files += 1
+    store.close()
+    print(f"Importados {rows} resultados de {files} ficheros CSV en {root}")
+
+
+def query(root, lang, sic, columns):
+    writer = None
+    rows = 0
+    for batch in iter_result_batches(root, columns=columns, lang=lang, sic_prefix=sic):
+        if writer is None:
+            writer = csv.writer(sys.stdout)
+            writer.writerow(batch.schema.names)
+        for record in batch.to_pylist():
+            writer.writerow(record.values())
+        rows += batch.num_rows
+    print(f"{rows} filas", file=sys.stderr)
+
+
+def compact(root, min_files):
+    merged = 0
+    for dirpath, dirnames, _ in os.walk(root):
+        if os.path.basename(dirpath).startswith("sic_prefix="):
+            merged += compact_partition(dirpath, min_files=min_files)
+    print(f"Ficheros fusionados: {merged}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["import", "query", "compact"])
+    parser.add_argument("--root", default=os.path.join("results", "parquet"), help="Directorio del almacén Parquet")
+    parser.add_argument("--results", default="results", help="Carpeta results/ con los CSV (import)")
+    parser.add_argument("--lang", default=None, help="Idiomas separados por comas (query)")
+    parser.add_argument("--sic", default=None, help="Prefijo SIC, p. ej. 50 o 501 (query)")
+    parser.add_argument("--columns", default=None, help="Columnas separadas por comas (query)")
+    parser.add_argument("--min-files", type=int, default=2, help="Ficheros pequeños mínimos por partición (compact)")
+    args = parser.parse_args()
+
+    if not HAS_PYARROW:
+        parser.error("pyarrow no está instalado")
+
+    if args.command == "import":
+        import_csvs(args.results, args.root)
+    elif args.command == "query":
+        langs = args.lang.split(",") if args.lang else None
+        columns = args.columns.split(",") if args.columns else None
+        query(args.root, langs, args.sic, columns)
+    else:
+        compact(args.root, args.min_files)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,14 +17,14 @@ import time
 import multiprocessing
 import threading
 import shutil
+import tempfile
 from multiprocessing.managers import SyncManager
 from queue import Empty
 from typing import Dict, Any, Optional, List, Tuple
-from fastapi import FastAPI, HTTPException, UploadFile, File, Query, BackgroundTasks
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, BackgroundTasks, Request
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
 from pydantic import BaseModel
 from datetime import datetime
-from collections import deque
 import enum
 import queue
 import platform
@@ -32,6 +32,7 @@ import traceback
 import random
 import json
 import hashlib
+import html
 import re
 
 
@@ -48,31 +49,70 @@ class EventType(str, enum.Enum):
 # --- EVENT LOG SYSTEM ---
 class EventLog:
     def __init__(self, max_size=5000):
-        self._log = deque(maxlen=max_size)
-        self._lock = asyncio.Lock()
-        self._counter = 0
+        self.max_size = max_size
+        # Índices por id, tipo, origen y SIC; en memoria hasta que se abre el almacén en disco
+        self._store = EventStore(max_events=max_size)
+        # Oyentes del canal /api/stream: (loop, asyncio.Event) que se activan con cada evento
+        self._listeners = set()
+
+    def subscribe(self):
+        """Registra un oyente en el loop actual; el asyncio.Event se activa con cada evento nuevo."""
+        listener = (asyncio.get_running_loop(), asyncio.Event())
+        self._listeners.add(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        self._listeners.discard(listener)
+
+    def _notify(self):
+        # add() puede ejecutarse en otro hilo/loop (consumidor de eventos de los workers)
+        for listener in list(self._listeners):
+            loop, wake = listener
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                self._listeners.discard(listener)
+
+    def open_storage(self, directory: str):
+        """
+        Persiste los eventos en segmentos en `directory` y recupera la historia anterior.
+        Solo lo llama el proceso del servidor (los workers importan este módulo sin abrirlo).
+        """
+        store = EventStore(max_events=self.max_size, directory=directory)
+        # Los eventos registrados antes de abrir el almacén continúan tras la historia recuperada
+        for event in self._store.since(0):
+            event = dict(event)
+            event.pop("id", None)
+            store.append(event)
+        self._store = store
+
+    def close(self):
+        self._store.close()
 
     async def add(
         self, event_type: str, source: str, message: str, details: Dict = None
     ):
-        async with self._lock:
-            self._counter += 1
-            event = {
-                "id": self._counter,
-                "timestamp": datetime.now().strftime("%H:%M:%S"),
-                "type": event_type,
-                "source": source,
-                "message": message,
-                "details": details or {},
-            }
-            self._log.append(event)
-            return event
+        # El almacén usa un lock de hilos: add() se llama desde el loop de FastAPI y desde
+        # el hilo consumidor de eventos de los workers
+        event = self._store.append({
+            "timestamp": datetime.now().strftime("%H:%M:%S"),
+            "type": event_type,
+            "source": source,
+            "message": message,
+            "details": details or {},
+        })
+        self._notify()
+        return event
 
     async def get_events(self, min_id: int = 0):
         """Retorna eventos con ID > min_id"""
         if min_id == 0:
-            return list(self._log)[-50:]
-        return [e for e in self._log if e["id"] > min_id]
+            return self._store.since(0, limit=50)
+        return self._store.since(min_id)
+
+    async def query(self, event_type: str = None, source: str = None, sic: str = None, limit: int = None):
+        """Eventos filtrados por tipo, origen y/o SIC usando los índices (O(coincidencias))."""
+        return self._store.query(event_type=event_type, source=source, sic=sic, limit=limit)
 
 
 # --- Constantes ---
@@ -81,15 +121,11 @@ BATCH_SIZE = 10
 BROADCAST_PORT = 50001
 BROADCAST_INTERVAL = 5
 
-# GLOBAL EVENT LOG
-global_event_log = EventLog()
-
 import uvicorn
 from contextlib import asynccontextmanager
 import pandas as pd
 import io
 import random
-import zipfile
 
 # --- Añadir raíz del proyecto al path ---
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -103,12 +139,70 @@ from utils.sqlite_handler import SQLiteHandler
 from controllers.scraper_controller import ScraperController
 from utils.scraper.browser_manager import BrowserManager
 from utils.proxy_manager import ProxyManager
+from utils.shared_state_table import SharedStateTable
+from utils.course_scheduler import SchedulerManager
+from utils.event_store import EventStore
+from utils.results_manifest import get_results_manifest
+from utils.zip_stream import stream_zip
+from utils.offload import BlockingOffload
+from utils.course_loader import CourseFileError, load_courses_file
+from utils.scraper.result_manager import RESULT_COLUMNS, export_omitted_to_excel
+from utils.results_index import DEFAULT_RESULTS_INDEX_PATH, MAX_QUERY_LIMIT, ResultsIndex
+from utils.sic_codes import sic_sort_key, sic_upper_bound
+
+# GLOBAL EVENT LOG
+global_event_log = EventLog()
 
 # --- Constantes ---
 NUM_PROCESSES = (
     os.cpu_count() or 4
 )  # Usar todos los núcleos disponibles, o 4 como fallback
 BATCH_SIZE = 10  # Número de cursos a procesar por lote
+MAX_STATE_WORKERS = 128  # Slots de worker en la tabla de estado compartida
+MAX_STATE_COURSES = 32768  # Cursos de la tabla de estado compartida (se amplía por múltiplos para trabajos mayores)
+STREAM_POLL_INTERVAL = 0.5  # Segundos entre comprobaciones de la versión de estado en /api/stream
+STREAM_HEARTBEAT_SECONDS = 15  # Comentario keep-alive para que proxies (Cloudflare) no corten el stream
+STREAM_RETRY_MS = 3000  # Espera de reconexión sugerida a los clientes SSE
+# Llamadas simultáneas por endpoint en los pools de BlockingOffload (el resto usa el límite por defecto)
+OFFLOAD_ENDPOINT_LIMITS = {
+    "upload_courses": 1,
+    "start_scraping": 1,
+    "preview_csv": 4,
+    "results_listing": 2,
+    "detailed_status": 2,
+    "export_omitidos": 1,
+    "results_query": 4,
+}
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Rango SIC codificado en los nombres de los ficheros de resultados (ver ResultManager)
+RESULT_FILE_SIC_RE = re.compile(r"^(?:results|omitidos)_(?P<from_sic>[^_]+)_.*?_to_(?P<to_sic>[^_]+)_")
+
+
+def _sse_message(event: str, data: Any, message_id: Optional[str] = None) -> str:
+    """Serializa un mensaje Server-Sent Events."""
+    lines = []
+    if message_id is not None:
+        lines.append(f"id: {message_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _parse_stream_cursor(cursor: Optional[str], since: int = 0) -> Tuple[int, int]:
+    """
+    Interpreta el cursor de /api/stream ("<id de evento>:<versión de estado>").
+    Retorna (último evento recibido, última versión de estado recibida).
+    """
+    event_id, state_version = 0, since
+    if cursor:
+        parts = cursor.split(":", 1)
+        try:
+            event_id = int(parts[0])
+            if len(parts) > 1:
+                state_version = int(parts[1])
+        except ValueError:
+            pass
+    return event_id, state_version
 
 
 # --- Modelos de Datos (Pydantic) ---
@@ -124,6 +218,46 @@ class ScrapingJob(BaseModel):
     num_workers: Optional[int] = None
 
 
+def _publish_state(state_version, states, key, state: Dict) -> None:
+    """
+    Escribe el estado de un worker/curso con la siguiente versión global.
+
+    El contador es un multiprocessing.Value compartido por el servidor y todos los
+    workers, de modo que las versiones son monótonas entre procesos y
+    /api/detailed_status puede devolver solo lo que cambió desde un cursor dado.
+    La escritura se hace dentro del lock del contador y el contador se publica después:
+    quien lee la versión N ya ve todos los estados con versión <= N.
+    """
+    if state_version is None:
+        states[key] = state
+        return
+    with state_version.get_lock():
+        state["version"] = state_version.value + 1
+        states[key] = state
+        state_version.value = state["version"]
+
+
+def _update_state(state_version, states, key, changes: Dict, only_if_status: Optional[str] = None) -> bool:
+    """
+    Modifica desde el servidor campos del estado de un worker/curso que escribe otro proceso.
+
+    El slot tiene un único escritor (su worker), así que el cambio se publica como una nota
+    (states.annotate) ligada a la versión del slot que se leyó: si el worker vuelve a
+    escribir, su estado prevalece, y un 'Completado' de última hora no se pisa.
+
+    Returns:
+        True si se modificó el estado
+    """
+    if state_version is None:
+        return states.annotate(key, changes, 0, only_if_status)
+    with state_version.get_lock():
+        version = state_version.value + 1
+        if not states.annotate(key, changes, version, only_if_status):
+            return False
+        state_version.value = version
+    return True
+
+
 # ==============================================================================
 # FUNCIÓN DEL TRABAJADOR (WORKER) - Se ejecuta en un proceso separado
 # ==============================================================================
@@ -134,6 +268,8 @@ def worker_process(
     course_states: Dict,
     config_path: str,
     event_queue: multiprocessing.Queue,  # Corregido: era event_log y faltaba tipo
+    state_version=None,  # multiprocessing.Value('q') con la versión global de estados
+    scheduler=None,  # Proxy del CourseScheduler (lotes adaptativos con robo de trabajo)
 ):
     """
     Función principal para cada proceso trabajador del pool.
@@ -159,12 +295,12 @@ def worker_process(
     )
     logger = logging.getLogger(f"worker_{worker_id}")  # Get the logger instance
 
-    status_dict[worker_id] = {
+    _publish_state(state_version, status_dict, worker_id, {
         "id": worker_id,
         "status": "Idle",
         "progress": 0,
         "current_task": "Esperando tarea",
-    }
+    })
 
     logger.info(f"Worker {worker_id} iniciado.")
     log_event_sync(EventType.WORKER, "Worker iniciado.")
@@ -184,22 +320,44 @@ def worker_process(
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
 
+    # Mientras haya un token de trabajo activo, los lotes se piden al planificador
+    scheduler_token = False
+
+    def finish_work_item():
+        """Marca como hecho el item de la cola (los lotes del planificador no son items)."""
+        if not scheduler_token:
+            work_queue.task_done()
+
     while True:
         try:
-            # Obtener un lote de trabajo de la cola
-            logger.info(f"Worker {worker_id}: Esperando por un trabajo en la cola...")
-            log_event_sync(EventType.WORKER, "Esperando tarea.")
+            if scheduler_token:
+                work_item = scheduler.next_chunk(worker_id) if scheduler is not None else None
+                if work_item is None:
+                    # Sin lotes pendientes (ni propios ni robados): el token queda completado
+                    logger.info(f"Worker {worker_id}: Planificador sin cursos pendientes.")
+                    scheduler_token = False
+                    work_queue.task_done()
+                    continue
+            else:
+                # Obtener un lote de trabajo de la cola
+                logger.info(f"Worker {worker_id}: Esperando por un trabajo en la cola...")
+                log_event_sync(EventType.WORKER, "Esperando tarea.")
 
-            work_item = work_queue.get()
-            logger.info(f"Worker {worker_id}: ¡Ha recibido un trabajo de la cola!")
-            log_event_sync(EventType.WORKER, "Tarea recibida de la cola.")
+                work_item = work_queue.get()
+                logger.info(f"Worker {worker_id}: ¡Ha recibido un trabajo de la cola!")
+                log_event_sync(EventType.WORKER, "Tarea recibida de la cola.")
 
-            if work_item is None:  # Señal de finalización
-                logger.info(f"Worker {worker_id} recibió señal de finalización.")
-                log_event_sync(
-                    EventType.WORKER, "Señal de finalización recibida. Apagando."
-                )
-                break
+                if work_item is None:  # Señal de finalización
+                    logger.info(f"Worker {worker_id} recibió señal de finalización.")
+                    log_event_sync(
+                        EventType.WORKER, "Señal de finalización recibida. Apagando."
+                    )
+                    break
+
+                if work_item[0] is None:
+                    # Token de trabajo: pedir lotes al planificador hasta agotarlos
+                    scheduler_token = True
+                    continue
 
             batch, job_params = work_item
             batch_id = f"batch_{int(time.time())}_{worker_id}"
@@ -213,12 +371,12 @@ def worker_process(
             browser_initialized = scraper_controller is not None
 
             if not browser_initialized:
-                status_dict[worker_id] = {
+                _publish_state(state_version, status_dict, worker_id, {
                     "id": worker_id,
                     "status": "Initializing",
                     "progress": 0,
                     "current_task": "Iniciando navegador...",
-                }
+                })
                 logger.info(
                     f"Worker {worker_id}: Inicializando componentes para la primera tarea."
                 )
@@ -286,7 +444,9 @@ def worker_process(
                     log_event_sync(EventType.SYSTEM, "Proxies deshabilitados.")
 
                 browser_manager = BrowserManager(
-                    config_manager=config_manager, server_state=worker_server_state
+                    config_manager=config_manager,
+                    server_state=worker_server_state,
+                    worker_id=worker_id,
                 )
                 browser_manager.set_proxy_manager(proxy_manager)
 
@@ -351,14 +511,14 @@ def worker_process(
                         {"traceback": traceback.format_exc()},
                     )
                     # Enviar el error detallado al status_dict para que el usuario lo vea en la GUI
-                    status_dict[worker_id] = {
+                    _publish_state(state_version, status_dict, worker_id, {
                         "id": worker_id,
                         "status": "Error",
                         "progress": 0,
                         "current_task": f"Error Init: {str(e)[:50]}",
-                    }
+                    })
                     if "work_queue" in locals():
-                        work_queue.task_done()
+                        finish_work_item()
                     continue
 
                 # Inicializar ScraperController
@@ -380,7 +540,7 @@ def worker_process(
                     "Controlador o BrowserManager no inicializados, saltando lote.",
                 )
                 if "work_queue" in locals():
-                    work_queue.task_done()
+                    finish_work_item()
                 continue
 
             # Actualizar estado a Working
@@ -394,16 +554,37 @@ def worker_process(
             log_event_sync(
                 EventType.SCRAPER,
                 f"Recibido lote {batch_id} para {len(batch)} cursos.",
-                {"job_params": job_params},
+                {"job_params": job_params, "sics": [sic for sic, _ in batch]},
             )
 
-            status_dict[worker_id] = {
+            _publish_state(state_version, status_dict, worker_id, {
                 "id": worker_id,
                 "status": "working",
                 "active": True,
                 "progress": 0,
                 "current_task": f"Procesando: {course_name_display}",
-            }
+            })
+
+            # Cursos del lote ya cerrados por el controlador (no se les vuelve a tocar el progreso)
+            finished_courses = set()
+
+            def course_status_callback(course_sic, status, progress):
+                if status in ("Completado", "Error"):
+                    finished_courses.add(course_sic)
+                log_event_sync(
+                    EventType.SCRAPER,
+                    f"Curso {course_sic}: {status}.",
+                    {"sic": course_sic, "progress": progress},
+                )
+                if course_sic in course_states:
+                    try:
+                        c_state = course_states[course_sic]
+                        c_state.update({"status": status, "progress": progress})
+                        _publish_state(state_version, course_states, course_sic, c_state)
+                    except Exception:
+                        pass
+
+            scraper_controller.set_course_status_callback(course_status_callback)
 
             # Definir callback de progreso para este trabajador
             def progress_callback(percentage, message, stats=None):
@@ -414,14 +595,16 @@ def worker_process(
                         {
                             "total_urls_found": stats.get("total_urls_found", 0),
                             "files_saved": stats.get("files_saved", 0),
+                            "cordis_cache_hits": stats.get("cordis_cache_hits", 0),
+                            "cordis_cache_misses": stats.get("cordis_cache_misses", 0),
                         }
                     )
-                status_dict[worker_id] = current_status
+                _publish_state(state_version, status_dict, worker_id, current_status)
 
                 # Actualizar estado del curso
                 if batch:
                     for course_sic, _ in batch:
-                        if course_sic in course_states:
+                        if course_sic in course_states and course_sic not in finished_courses:
                             try:
                                 c_state = course_states[course_sic]
                                 c_state.update(
@@ -432,7 +615,7 @@ def worker_process(
                                         else "Completado",
                                     }
                                 )
-                                course_states[course_sic] = c_state
+                                _publish_state(state_version, course_states, course_sic, c_state)
                             except Exception:
                                 pass
 
@@ -443,7 +626,7 @@ def worker_process(
                         try:
                             c_state = course_states[course_sic]
                             c_state["status"] = "Procesando"
-                            course_states[course_sic] = c_state
+                            _publish_state(state_version, course_states, course_sic, c_state)
                         except Exception:
                             pass
 
@@ -467,20 +650,24 @@ def worker_process(
                             c_state = course_states[course_sic]
                             c_state["status"] = "Completado"
                             c_state["progress"] = 100
-                            course_states[course_sic] = c_state
+                            _publish_state(state_version, course_states, course_sic, c_state)
                         except Exception:
                             pass
 
             logger.info(f"Worker {worker_id} completó el lote {batch_id}.")
-            log_event_sync(EventType.SUCCESS, f"Lote {batch_id} completado.")
-            work_queue.task_done()
+            log_event_sync(
+                EventType.SUCCESS,
+                f"Lote {batch_id} completado.",
+                {"sics": [sic for sic, _ in batch]},
+            )
+            finish_work_item()
 
             # Obtener estadísticas reales del lote actual
             try:
                 cumulative_stats = scraper_controller.stats
                 msg_finished = f"Completado: {course_name_display} | URLs: {cumulative_stats['total_urls_found']} | Guardados: {cumulative_stats['files_saved']} | Omitidos: {cumulative_stats['files_not_saved']} | Errores: {cumulative_stats['total_errors']}"
 
-                status_dict[worker_id] = {
+                _publish_state(state_version, status_dict, worker_id, {
                     "id": worker_id,
                     "status": "finished",
                     "active": False,
@@ -490,7 +677,9 @@ def worker_process(
                     "files_saved": cumulative_stats["files_saved"],
                     "omitted_count": cumulative_stats["files_not_saved"],
                     "error_count": cumulative_stats["total_errors"],
-                }
+                    "cordis_cache_hits": cumulative_stats.get("cordis_cache_hits", 0),
+                    "cordis_cache_misses": cumulative_stats.get("cordis_cache_misses", 0),
+                })
                 log_event_sync(
                     EventType.SUCCESS, "Tarea finalizada.", {"stats": cumulative_stats}
                 )
@@ -507,16 +696,19 @@ def worker_process(
 
             error_msg = f"Error crítico en Worker-{worker_id}: {str(e)}"
             logger.error(f"Worker {worker_id}: {error_msg}", exc_info=True)
+            failed_sics = [sic for sic, _ in batch] if 'batch' in locals() and batch else []
             log_event_sync(
-                EventType.ERROR, error_msg, {"traceback": traceback.format_exc()}
+                EventType.ERROR,
+                error_msg,
+                {"traceback": traceback.format_exc(), "sics": failed_sics},
             )
-            status_dict[worker_id] = {
+            _publish_state(state_version, status_dict, worker_id, {
                 "id": worker_id,
                 "status": "Error",
                 "active": False,
                 "progress": 0,
                 "current_task": f"CRASHED: {str(e)[:40]}...",
-            }
+            })
             if 'batch' in locals() and batch:
                 for course_sic, _ in batch:
                     if course_sic in course_states:
@@ -525,7 +717,7 @@ def worker_process(
                             c_state["status"] = "Error"
                             c_state["error"] = str(e)[:200]
                             c_state["last_error"] = str(e)[:200]
-                            course_states[course_sic] = c_state
+                            _publish_state(state_version, course_states, course_sic, c_state)
                         except Exception:
                             pass
             # Marcar la tarea como hecha para no bloquear la cola si hay un error
@@ -535,6 +727,14 @@ def worker_process(
                 work_queue.task_done()
             time.sleep(5)
 
+    # Liberar recursos compartidos del worker (sesiones HTTP) antes de salir
+    if scraper_controller is not None:
+        try:
+            loop.run_until_complete(scraper_controller.close())
+        except Exception:
+            logger.error("Error cerrando recursos del worker", exc_info=True)
+    loop.close()
+
 
 # --- Clase Principal del Servidor ---
 class ScraperServer:
@@ -543,19 +743,51 @@ class ScraperServer:
         self.port = port
         self.logger = setup_logger(logging.DEBUG, "logs/server.log")
         self.config_path = os.path.join(project_root, "client", "config.json")
+        self.config = Config(self.config_path)
 
         # --- Gestor de Multiprocesamiento ---
-        # Se necesita un SyncManager para compartir objetos (dict, queue) entre procesos.
+        # Se necesita un SyncManager para compartir las colas entre procesos (los estados van en memoria compartida).
         self.manager: Optional[SyncManager] = None
         self.worker_pool: List[multiprocessing.Process] = []
         self.work_queue: Optional[multiprocessing.JoinableQueue] = None
+        # Planificador de cursos compartido (proxy del SchedulerManager)
+        self.scheduler = None
+        # Estados de workers/cursos en memoria compartida (vistas tipo dict sobre la tabla)
+        self.state_table: Optional[SharedStateTable] = None
         self.worker_states: Optional[Dict] = None
         self.course_states: Optional[Dict] = None
+        # Versión global de los estados (cursor para /api/detailed_status?since=)
+        self.state_version = None
+        # Versión a partir de la cual los estados anteriores dejaron de existir (reset)
+        self._state_reset_version = 0
+        # Copia local de los estados y la versión con la que se tomó
+        self._status_snapshot = ({}, {})
+        self._status_snapshot_version = -1
 
         # --- Bandera de Estado Global ---
         self.is_job_running = False
         self.start_time = None
 
+        # Historia de eventos persistente (sobrevive a reinicios del servidor)
+        global_event_log.open_storage(os.path.join(project_root, "logs", "events"))
+
+        # Pools para sacar del loop de FastAPI el trabajo bloqueante (ficheros, pandas, SQLite)
+        self.offload = BlockingOffload(
+            io_workers=int(self.config.get("offload_io_workers", 8)),
+            cpu_workers=int(self.config.get("offload_cpu_workers", 2)),
+            limits=OFFLOAD_ENDPOINT_LIMITS,
+        )
+
+        # Índice SQLite/FTS5 de resultados (lo alimentan los workers; aquí solo se consulta)
+        self.results_index: Optional[ResultsIndex] = None
+        if self.config.get("results_index_enabled", True):
+            try:
+                self.results_index = ResultsIndex(
+                    self.config.get("results_index_path", DEFAULT_RESULTS_INDEX_PATH)
+                )
+            except Exception as e:
+                self.logger.error(f"No se pudo abrir el índice de resultados: {e}")
+
         self.app = FastAPI(
             title="Europa Scraper Server", version="3.0.0", lifespan=self._lifespan
         )
@@ -576,10 +808,16 @@ class ScraperServer:
         )
         # Forzar el método de inicio a 'spawn' para compatibilidad y seguridad
         multiprocessing.set_start_method("spawn", force=True)
-        self.manager = multiprocessing.Manager()
+        self.manager = SchedulerManager()
+        self.manager.start()
         self.work_queue = self.manager.JoinableQueue()
-        self.worker_states = self.manager.dict()
-        self.course_states = self.manager.dict()
+        self.scheduler = self.manager.CourseScheduler()
+        self.state_table = SharedStateTable(
+            max_workers=MAX_STATE_WORKERS, max_courses=MAX_STATE_COURSES
+        )
+        self.worker_states = self.state_table.workers
+        self.course_states = self.state_table.courses
+        self.state_version = multiprocessing.Value("q", 0)
         self.cleanup_stop_event = threading.Event()
 
         # --- NUEVO: COLA DE EVENTOS Y HILO CONSUMIDOR ---
@@ -655,6 +893,13 @@ class ScraperServer:
             )
             self.manager.shutdown()
 
+        if self.state_table is not None:
+            self.state_table.close()
+            self.state_table = None
+
+        self.offload.shutdown()
+        global_event_log.close()
+
     def _start_worker_pool(self, num_workers: int):
         if self.worker_pool:
             self.logger.warning(
@@ -687,6 +932,8 @@ class ScraperServer:
                     self.course_states,
                     self.config_path,
                     self.event_queue,
+                    self.state_version,
+                    self.scheduler,
                 ),  # Pass event_queue
             )
             for i in range(num_workers)
@@ -762,6 +1009,29 @@ class ScraperServer:
                 )
             )
 
+    async def _ensure_state_capacity(self, num_courses: int):
+        """
+        Recrea la tabla de estado con sitio para `num_courses` cursos si no cabe en la actual.
+
+        Los workers se adjuntan a la tabla al arrancar, así que el pool se detiene y el
+        trabajo lo vuelve a iniciar con la tabla nueva.
+        """
+        if self.state_table is None or num_courses <= self.state_table.max_courses:
+            return
+        capacity = -(-num_courses // MAX_STATE_COURSES) * MAX_STATE_COURSES
+        self.logger.info(
+            f"Ampliando la tabla de estado de {self.state_table.max_courses} a {capacity} cursos."
+        )
+        await self._stop_worker_pool()
+        # _stop_worker_pool lo desmarca, pero el trabajo sigue arrancando
+        self.is_job_running = True
+        old_table = self.state_table
+        self.state_table = SharedStateTable(max_workers=MAX_STATE_WORKERS, max_courses=capacity)
+        self.worker_states = self.state_table.workers
+        self.course_states = self.state_table.courses
+        old_table.close()
+        self._reset_states()
+
     def _start_broadcasting(self):
         """Inicia el broadcasting para descubrimiento de clientes."""
         self.broadcast_thread = threading.Thread(
@@ -837,6 +1107,7 @@ class ScraperServer:
 
         # Endpoints de diagnóstico y eventos
         self.app.get("/api/events")(self.get_events_endpoint)
+        self.app.get("/api/stream")(self.stream_endpoint)
         self.app.get("/api/debug_info")(self.debug_info)
         self.app.get("/api/version")(self.version_endpoint)
 
@@ -849,10 +1120,12 @@ class ScraperServer:
         self.app.get("/api/list_omitidos")(self.list_omitidos_files)
         self.app.get("/api/results_line_count")(self.get_results_line_count)
         self.app.get("/api/download_file")(self.download_single_file)
+        self.app.get("/api/export_omitidos_excel")(self.export_omitidos_excel)
         self.app.delete("/api/delete_file")(
             self.delete_single_file
         )  # NUEVO: borrado individual
         self.app.get("/api/preview_csv")(self.preview_csv)
+        self.app.get("/api/query")(self.query_results)
         self.app.get("/viewer")(self.results_viewer_html)
         self.app.get("/api/cloudflare_url")(self.get_cloudflare_url)
 
@@ -938,10 +1211,7 @@ class ScraperServer:
                 "Server",
                 "Limpiando estados previos de los trabajadores.",
             )
-            self.worker_states.clear()
-
-        if self.course_states is not None:
-            self.course_states.clear()
+        self._reset_states()
 
         try:
             # Manejar múltiples formatos de entrada del frontend
@@ -1042,19 +1312,12 @@ class ScraperServer:
                     detail="La base de datos 'courses.db' no existe. Por favor, suba un archivo de cursos primero.",
                 )
             db_handler = SQLiteHandler(db_path)
-            all_courses = (
-                db_handler.get_all_courses()
-            )  # Devuelve lista de tuplas (sic_code, course_name)
 
-            # 2. Filtrar cursos basados en el rango SIC del trabajo
-            start_index = next(
-                (i for i, (sic, _) in enumerate(all_courses) if sic == from_sic), 0
-            )
-            end_index = next(
-                (i for i, (sic, _) in enumerate(all_courses) if sic == to_sic),
-                len(all_courses) - 1,
-            )
-            courses_to_process = all_courses[start_index : end_index + 1]
+            # 2. Cursos del rango SIC del trabajo (orden natural, consulta por índice sin leer todo el catálogo)
+            courses_in_range = await self.offload.run_io(
+                "start_scraping", db_handler.get_courses_in_sic_range, from_sic, to_sic
+            )  # Devuelve lista de tuplas (sic_code, course_name, status, server)
+            courses_to_process = [(sic, name) for sic, name, _, _ in courses_in_range]
 
             if not courses_to_process:
                 self.is_job_running = False
@@ -1093,37 +1356,38 @@ class ScraperServer:
                 "results_output_mode": results_output_mode,
             }
 
-            # 4. Poner cada curso como una tarea individual en la cola
+            # 4. Repartir los cursos en el planificador (lotes adaptativos por histórico de resultados)
             num_courses = len(courses_to_process)
             self.logger.info(
-                f"Encolando {num_courses} cursos como tareas individuales."
+                f"Repartiendo {num_courses} cursos entre {num_workers} trabajadores."
             )
             self.logger.info(f"Parámetros del trabajo: {job_params_dict}")
-            await global_event_log.add(
-                EventType.SYSTEM,
-                "Server",
-                f"Encolando {num_courses} cursos como tareas individuales.",
-                {"job_params": job_params_dict},
-            )
 
+            await self._ensure_state_capacity(num_courses)
             for course_sic, course_name in courses_to_process:
-                # Cada item de trabajo es ahora un solo curso en un lote de tamaño 1
-                single_course_batch = [(course_sic, course_name)]
-                self.work_queue.put((single_course_batch, job_params_dict))
-                self.course_states[course_sic] = {
+                _publish_state(self.state_version, self.course_states, course_sic, {
                     "sic": course_sic,
                     "name": course_name,
                     "status": "Pendiente",
                     "progress": 0,
-                }
+                })
 
-            self.logger.info(
-                f"¡¡¡TAREAS PUESTAS EN LA COLA!!! Tamaño de la cola: {self.work_queue.qsize()}"
+            result_counts = await self.offload.run_io(
+                "start_scraping", db_handler.get_course_result_counts
+            )
+            schedule_summary = self.scheduler.load(
+                courses_to_process,
+                result_counts,
+                num_workers,
+                job_params_dict,
+                target_weight=int(self.config.get("scheduler_target_weight", 200)),
+                max_chunk_size=int(self.config.get("scheduler_max_chunk_size", 50)),
             )
             await global_event_log.add(
                 EventType.SYSTEM,
                 "Server",
-                f"Tareas puestas en la cola. Tamaño de la cola: {self.work_queue.qsize()}",
+                f"Repartidos {num_courses} cursos entre {num_workers} trabajadores.",
+                {"job_params": job_params_dict, "schedule": schedule_summary},
             )
 
             # 5. Iniciar el pool de trabajadores
@@ -1143,6 +1407,20 @@ class ScraperServer:
             if not self.worker_pool:
                 self._start_worker_pool(num_workers)
 
+            # Un token por trabajador: cada uno pide lotes al planificador hasta agotarlos.
+            # Se encolan tras (re)iniciar el pool para que un pool saliente no los consuma.
+            for _ in range(num_workers):
+                self.work_queue.put((None, job_params_dict))
+
+            self.logger.info(
+                f"¡¡¡TAREAS PUESTAS EN LA COLA!!! Tamaño de la cola: {self.work_queue.qsize()}"
+            )
+            await global_event_log.add(
+                EventType.SYSTEM,
+                "Server",
+                f"Tareas puestas en la cola. Tamaño de la cola: {self.work_queue.qsize()}",
+            )
+
             # 5. Iniciar un hilo monitor para saber cuándo ha terminado todo el trabajo
             monitor_thread = threading.Thread(
                 target=self._monitor_job_completion, daemon=True
@@ -1244,6 +1522,21 @@ class ScraperServer:
 
             time.sleep(3600)  # Dormir por una hora para que no consuma recursos.
 
+    def _reset_states(self):
+        """
+        Vacía los estados de workers y cursos y avanza la versión global: los clientes con un
+        cursor anterior (detailed_status?since=, /api/stream) reciben un estado completo en
+        lugar de un delta que conservaría los workers y cursos del trabajo anterior.
+        """
+        if self.worker_states is not None:
+            self.worker_states.clear()
+        if self.course_states is not None:
+            self.course_states.clear()
+        if self.state_version is not None:
+            with self.state_version.get_lock():
+                self.state_version.value += 1
+                self._state_reset_version = self.state_version.value
+
     async def stop_scraping_job(self):
         if not self.is_job_running:
             await global_event_log.add(
@@ -1264,6 +1557,8 @@ class ScraperServer:
             "Server",
             "Solicitud para detener el trabajo de scraping recibida.",
         )
+        # Descartar los cursos pendientes para que ningún worker pida otro lote
+        self.scheduler.clear()
         await self._stop_worker_pool()
         # Limpiar la cola por si acaso
         while not self.work_queue.empty():
@@ -1275,19 +1570,18 @@ class ScraperServer:
         # Forzar estado de workers a inactivo
         if self.worker_states is not None:
             for w_id in self.worker_states.keys():
-                w_state = self.worker_states[w_id]
-                w_state["status"] = "Detenido"
-                w_state["current_task"] = "Trabajo detenido por el usuario."
-                self.worker_states[w_id] = w_state
+                _update_state(self.state_version, self.worker_states, w_id, {
+                    "status": "Detenido",
+                    "current_task": "Trabajo detenido por el usuario.",
+                })
 
-        # Limpiar cursos atascados en 'Procesando'
+        # Limpiar cursos atascados en 'Procesando' (sin pisar un 'Completado' de última hora)
         if self.course_states is not None:
             for course_sic in self.course_states.keys():
-                c_state = self.course_states[course_sic]
-                if c_state["status"] == "Procesando":
-                    c_state["status"] = "Detenido"
-                    c_state["progress"] = 0
-                    self.course_states[course_sic] = c_state
+                _update_state(
+                    self.state_version, self.course_states, course_sic,
+                    {"status": "Detenido", "progress": 0}, only_if_status="Procesando",
+                )
 
         self.is_job_running = False
         self.start_time = None
@@ -1305,7 +1599,8 @@ class ScraperServer:
             EventType.WARNING, "Server", "SOLICITUD DE REINICIO FORZADO RECIBIDA."
         )
 
-        # 1. Detener el pool de trabajadores
+        # 1. Detener el pool de trabajadores (sin lotes pendientes en el planificador)
+        self.scheduler.clear()
         await self._stop_worker_pool()
 
         # 2. Limpiar la cola de trabajo
@@ -1319,28 +1614,24 @@ class ScraperServer:
         # Forzar estado de workers a inactivo
         if self.worker_states is not None:
             for w_id in self.worker_states.keys():
-                w_state = self.worker_states[w_id]
-                w_state["status"] = "Detenido"
-                w_state["current_task"] = "Trabajo detenido por el usuario."
-                self.worker_states[w_id] = w_state
+                _update_state(self.state_version, self.worker_states, w_id, {
+                    "status": "Detenido",
+                    "current_task": "Trabajo detenido por el usuario.",
+                })
 
-        # Limpiar cursos atascados en 'Procesando'
+        # Limpiar cursos atascados en 'Procesando' (sin pisar un 'Completado' de última hora)
         if self.course_states is not None:
             for course_sic in self.course_states.keys():
-                c_state = self.course_states[course_sic]
-                if c_state["status"] == "Procesando":
-                    c_state["status"] = "Detenido"
-                    c_state["progress"] = 0
-                    self.course_states[course_sic] = c_state
+                _update_state(
+                    self.state_version, self.course_states, course_sic,
+                    {"status": "Detenido", "progress": 0}, only_if_status="Procesando",
+                )
 
         self.is_job_running = False
         self.start_time = None
 
         # 4. Limpiar los estados de los workers para la GUI
-        if self.worker_states is not None:
-            self.worker_states.clear()
-        if self.course_states is not None:
-            self.course_states.clear()
+        self._reset_states()
 
         await global_event_log.add(
             EventType.SUCCESS,
@@ -1356,9 +1647,54 @@ class ScraperServer:
         events = await global_event_log.get_events(min_id)
         return {"events": events, "latest_id": events[-1]["id"] if events else min_id}
 
-    async def get_detailed_status(self):
-        workers_dict = dict(self.worker_states) if self.worker_states else {}
-        courses_dict = dict(self.course_states) if self.course_states else {}
+    def _get_status_snapshot(self):
+        """
+        Retorna (workers, courses, counters, version) a partir de una instantánea de la
+        tabla de estado compartida. La instantánea solo se rehace cuando la versión global
+        cambió desde la anterior.
+        """
+        current = self.state_version.value if self.state_version is not None else 0
+        if current != self._status_snapshot_version:
+            workers = self.worker_states.snapshot() if self.worker_states is not None else {}
+            courses = self.course_states.snapshot() if self.course_states is not None else {}
+            counters = {"total": len(courses), "pending": 0, "processing": 0, "done": 0, "error": 0, "stopped": 0}
+            for c_state in courses.values():
+                status = c_state.get("status") if isinstance(c_state, dict) else None
+                if status == "Pendiente":
+                    counters["pending"] += 1
+                elif status == "Procesando":
+                    counters["processing"] += 1
+                elif status == "Completado":
+                    counters["done"] += 1
+                elif status in ("Error", "Fallido"):
+                    counters["error"] += 1
+                elif status == "Detenido":
+                    counters["stopped"] += 1
+            self._status_snapshot = (workers, courses, counters)
+            self._status_snapshot_version = current
+        workers, courses, counters = self._status_snapshot
+        return workers, courses, counters, current
+
+    async def get_detailed_status(self, since: int = 0):
+        """
+        Estado de workers y cursos.
+
+        Con since=<version> (la "version" de la respuesta anterior) solo se devuelven los
+        workers y cursos modificados después de ese cursor ("delta": true). Si since es 0
+        o anterior a un reinicio de los estados (nuevo trabajo, reinicio forzado o de
+        emergencia) se devuelve el estado completo ("delta": false)
+        y el cliente debe reemplazar su copia local; lo mismo si el cursor es posterior a
+        la versión actual.
+        """
+        workers_all, courses_all, counters, version = self._get_status_snapshot()
+        # Un cursor mayor que la versión actual indica que el servidor se reinició
+        is_delta = 0 < since <= version and since >= self._state_reset_version
+        if is_delta:
+            workers_dict = {k: v for k, v in workers_all.items() if v.get("version", 0) > since}
+            courses_dict = {k: v for k, v in courses_all.items() if v.get("version", 0) > since}
+        else:
+            workers_dict = workers_all
+            courses_dict = courses_all
         
         # Calcular tiempo acumulado
         accumulated_time = 0
@@ -1369,7 +1705,23 @@ class ScraperServer:
             except Exception:
                 pass
 
-        # RESTAURACIÓN OPTIMIZADA Y EXACTA: Conteo de líneas real cacheado por mtime
+        csv_total, csv_counts = await self.offload.run_io("detailed_status", self._count_result_rows)
+
+        return {
+            "workers": workers_dict,
+            "courses": courses_dict,
+            "version": version,
+            "delta": is_delta,
+            "counters": counters,
+            "is_running": self.is_job_running,
+            "start_time": getattr(self, "start_time", None),
+            "accumulated_time": accumulated_time,
+            "csv_total": csv_total,
+            "csv_counts": csv_counts
+        }
+
+    def _count_result_rows(self) -> Tuple[int, Dict[str, int]]:
+        """Conteo de filas por CSV desde el manifiesto de resultados (incremental, sin releer ficheros)."""
         csv_total = 0
         csv_counts = {}
         try:
@@ -1378,52 +1730,14 @@ class ScraperServer:
                 os.path.join(project_root, "results"),
                 os.path.join(project_root, "server", "results")
             ]
-            
-            if not hasattr(self, "_file_line_cache"):
-                self._file_line_cache = {} # {filepath: (mtime, line_count)}
-                
             for res_dir in results_dirs:
                 if os.path.isdir(res_dir):
-                    for fname in os.listdir(res_dir):
-                        if fname.lower().endswith(".csv"):
-                            fpath = os.path.join(res_dir, fname)
-                            try:
-                                mtime = os.path.getmtime(fpath)
-                                cached_mtime, cached_count = self._file_line_cache.get(fpath, (0, 0))
-                                
-                                if mtime == cached_mtime:
-                                    csv_total += cached_count
-                                    csv_counts[fname.lower()] = cached_count
-                                else:
-                                    # Archivo modificado o nuevo, contamos líneas reales (super rápido en chunks)
-                                    count = 0
-                                    with open(fpath, "rb") as f:
-                                        buf_size = 1024 * 1024
-                                        buf = f.read(buf_size)
-                                        while buf:
-                                            count += buf.count(b"\n")
-                                            buf = f.read(buf_size)
-                                    if count > 0:
-                                        count -= 1 # Restar cabecera
-                                        
-                                    self._file_line_cache[fpath] = (mtime, count)
-                                    csv_total += count
-                                    csv_counts[fname.lower()] = count
-                            except Exception:
-                                pass
+                    for entry in get_results_manifest(res_dir).files(recursive=False, extensions=(".csv",)):
+                        csv_total += entry["row_count"]
+                        csv_counts[entry["name"].lower()] = entry["row_count"]
         except Exception:
             pass
-
-                
-        return {
-            "workers": workers_dict,
-            "courses": courses_dict,
-            "is_running": self.is_job_running,
-            "start_time": getattr(self, "start_time", None),
-            "accumulated_time": accumulated_time,
-            "csv_total": csv_total,
-            "csv_counts": csv_counts
-        }
+        return csv_total, csv_counts
 
     async def get_all_courses(self):
         try:
@@ -1433,7 +1747,7 @@ class ScraperServer:
                 return []
 
             db_handler = SQLiteHandler(db_path)
-            all_courses = db_handler.get_all_courses()
+            all_courses = await self.offload.run_io("get_all_courses", db_handler.get_all_courses)
             # Convert tuples to dictionaries for GUI compatibility
             return [{"sic_code": c[0], "course_name": c[1]} for c in all_courses]
         except Exception as e:
@@ -1443,6 +1757,12 @@ class ScraperServer:
                 detail=f"Error interno del servidor al obtener cursos: {e}",
             )
 
+    def _spool_upload(self, source, suffix: str) -> str:
+        """Copia el contenido subido a un fichero temporal y retorna su ruta."""
+        with tempfile.NamedTemporaryFile(prefix="courses_upload_", suffix=suffix, delete=False) as tmp:
+            shutil.copyfileobj(source, tmp, length=1024 * 1024)
+            return tmp.name
+
     async def upload_courses(self, file: UploadFile = File(...)):
         self.logger.info(
             f"Recibida solicitud para cargar archivo de cursos: {file.filename}"
@@ -1454,194 +1774,168 @@ class ScraperServer:
                 detail="Formato de archivo no soportado. Por favor, suba un archivo .csv o .xlsx.",
             )
 
+        upload_path = None
         try:
-            contents = await file.read()
-
-            if file.filename.endswith(".csv"):
-                # Detectar automáticamente el separador (coma, punto y coma, o pipe)
-                sample = contents[:2048].decode("utf-8", errors="ignore")
-                first_line = sample.split("\n")[0] if "\n" in sample else sample
-
-                # Contar ocurrencias de posibles separadores en la primera línea
-                separators = {
-                    ",": first_line.count(","),
-                    ";": first_line.count(";"),
-                    "|": first_line.count("|"),
-                }
-                detected_sep = max(separators, key=separators.get)
-                # Fallback a coma si no hay separadores claros
-                if separators[detected_sep] == 0:
-                    detected_sep = ","
-
-                self.logger.info(f"Separador detectado: '{detected_sep}'")
-
-                # LEER TODO COMO STRING PARA NO PERDER CEROS INICIALES ("01.0")
-                # header=None para evitar que la primera fila se pierda si el usuario no pone cabeceras estandar
-                # Pero si tiene cabeceras, la primera fila sera basura. Mas adelante lo limpiamos.
-                # ESTRATEGIA: Leer con cabecera (default) y luego tratar.
-                df = pd.read_csv(io.BytesIO(contents), sep=detected_sep, dtype=str)
-            else:
-                # Excel: Leer todo como texto
-                df = pd.read_excel(io.BytesIO(contents), dtype=str)
+            # Copiar la subida a un fichero temporal (en el pool de E/S) para leerlo en streaming
+            suffix = os.path.splitext(file.filename)[1].lower()
+            upload_path = await self.offload.run_io(
+                "upload_courses", self._spool_upload, file.file, suffix
+            )
 
-            # ESTRATEGIA DE COLUMNAS FLEXIBLE (PeticiÃ³n del usuario: "No importa como se llame")
-            # Simplemente tomamos las dos primeras columnas, sean cuales sean.
-            if len(df.columns) < 2:
-                raise HTTPException(
-                    status_code=400,
-                    detail="El archivo requiere al menos 2 columnas (CÃ³digo y Nombre).",
+            # Parseo y carga en la tabla de staging en el pool de procesos; el progreso llega como eventos
+            db_path = os.path.join(project_root, "courses.db")
+            try:
+                summary = await self.offload.run_cpu(
+                    "upload_courses", load_courses_file, db_path, upload_path, file.filename, self.event_queue
                 )
+            except CourseFileError as e:
+                raise HTTPException(status_code=400, detail=str(e))
 
-            # Renombrar columnas internamente para estandarizar
-            # CSV FORMATO: id, sic_code, course_name (3 columnas) O sic_code, course_name (2 columnas)
-            if len(df.columns) >= 3:
-                # Formato con ID: columnas 1 y 2
-                code_col_orig = df.columns[1]
-                course_col_orig = df.columns[2]
-                col_indices = [1, 2]
-            else:
-                # Formato sin ID: columnas 0 y 1
-                code_col_orig = df.columns[0]
-                course_col_orig = df.columns[1]
-                col_indices = [0, 1]
-
-            # Si la primera fila parece un encabezado repetido o no vÃ¡lido, podrÃ­amos querer saltarla,
-            # pero es difÃ­cil saberlo. Respetamos la data tal cual.
-            # Limpiar espacios
-            df[code_col_orig] = df[code_col_orig].astype(str).str.strip()
-            df[course_col_orig] = df[course_col_orig].astype(str).str.strip()
-
-            # --- SANITIZACIÓN SIC CODE (ANTI-EXCEL) ---
-            # Excel guarda 01.0 como "1.0" en CSV. Recuperamos el cero perdido.
-            def sanitize_sic(code):
-                # Caso: "1.0" -> "01.0"
-                # Si tiene formato D.D (un digito punto algo), agregamos cero.
-                # SIC codes de agricultura son 01-09. Mineria es 10+.
-                import re
-
-                if re.match(r"^\d\.", code):
-                    return "0" + code
-                return code
-
-            df[code_col_orig] = df[code_col_orig].apply(sanitize_sic)
-            # ------------------------------------------
-
+            courses_loaded = summary["loaded"]
             self.logger.info(
-                f"Usando columna 0 ('{code_col_orig}') como CÃ³digo y columna 1 ('{course_col_orig}') como Curso."
+                f"Se cargaron {courses_loaded} cursos del archivo ({summary['skipped']} omitidos)."
             )
 
-            courses_to_load = df.iloc[:, col_indices].values.tolist()
-
-            # Limpieza extra: Eliminar filas vacÃ­as o con 'nan'
-            courses_to_load = [
-                c for c in courses_to_load if c[0] and c[1] and c[0].lower() != "nan"
-            ]
-
+            # VERIFICACIÓN INMEDIATA
+            verify_count = await self.offload.run_io(
+                "upload_courses", lambda: SQLiteHandler(db_path).count_courses()
+            )
             self.logger.info(
-                f"Se encontraron {len(courses_to_load)} cursos en el archivo."
+                f"VERIFICACIÓN: Leídos {verify_count} cursos de la DB inmediatamente después de insertar."
             )
 
-            db_path = os.path.join(project_root, "courses.db")
-            db_handler = SQLiteHandler(db_path)
-
-            self.logger.info("Limpiando la tabla de cursos existente...")
-            db_handler.clear_courses_table()
-
-            self.logger.info("Insertando nuevos cursos en la base de datos...")
-            success = db_handler.insert_courses(courses_to_load)
-
-            if success:
-                # VERIFICACIÓN INMEDIATA
-                verify_courses = db_handler.get_all_courses()
-                verify_count = len(verify_courses)
-                self.logger.info(
-                    f"VERIFICACIÓN: Leídos {verify_count} cursos de la DB inmediatamente después de insertar."
+            if verify_count == 0:
+                self.logger.error(
+                    "ALERTA CRÍTICA: La base de datos está vacía después de una inserción supuestamente exitosa."
                 )
-
-                if verify_count == 0:
-                    self.logger.error(
-                        "ALERTA CRÍTICA: La base de datos está vacía después de una inserción supuestamente exitosa."
-                    )
-                    raise HTTPException(
-                        status_code=500,
-                        detail="Error Crítico: Los cursos se procesaron pero no se guardaron en la base de datos (0 filas encontradas).",
-                    )
-
-                return {
-                    "message": f"Carga exitosa. Se han cargado {len(courses_to_load)} cursos en la base de datos. Verificación: {verify_count} registros."
-                }
-            else:
                 raise HTTPException(
                     status_code=500,
-                    detail="Error interno: No se pudieron guardar los cursos en la base de datos (SQLite error).",
+                    detail="Error Crítico: Los cursos se procesaron pero no se guardaron en la base de datos (0 filas encontradas).",
                 )
 
+            return {
+                "message": f"Carga exitosa. Se han cargado {courses_loaded} cursos en la base de datos. Verificación: {verify_count} registros."
+            }
+        except HTTPException:
+            raise
         except Exception as e:
             self.logger.exception("Error procesando el archivo de cursos cargado.")
             raise HTTPException(
                 status_code=500, detail=f"Error interno del servidor: {str(e)}"
             )
+        finally:
+            if upload_path:
+                try:
+                    os.unlink(upload_path)
+                except OSError:
+                    pass
+
+    def _collect_result_files(
+        self,
+        results_dir: str,
+        sic_from: Optional[str] = None,
+        sic_to: Optional[str] = None,
+        lang: Optional[str] = None,
+        since: Optional[float] = None,
+    ) -> List[Tuple[str, str, int]]:
+        """
+        Lista (ruta, nombre relativo, tamaño) de los ficheros de resultados que cumplen los filtros.
 
-    async def download_results(self, background_tasks: BackgroundTasks):
-        """Descarga todos los archivos de la carpeta results como un ZIP con limpieza automática."""
+        Args:
+            results_dir: Carpeta de resultados
+            sic_from / sic_to: Incluir solo ficheros cuyo rango SIC se solapa con el pedido (orden natural)
+            lang: Carpeta de idioma (EN, ES, ...) u "omitidos"
+            since: Incluir solo ficheros modificados desde este timestamp (epoch)
+        """
+        selected = []
+        lang_dir = lang.strip().strip("/").lower() if lang else None
+        for root, dirs, files in os.walk(results_dir):
+            for file in files:
+                if file.endswith(".zip"):
+                    continue
+                file_path = os.path.join(root, file)
+                arcname = os.path.relpath(file_path, results_dir).replace("\\", "/")
+                if lang_dir and arcname.split("/", 1)[0].lower() != lang_dir:
+                    continue
+                if sic_from or sic_to:
+                    match = RESULT_FILE_SIC_RE.match(file)
+                    if not match:
+                        continue
+                    if sic_to and sic_sort_key(match.group("from_sic")) > sic_upper_bound(sic_to):
+                        continue
+                    if sic_from and sic_upper_bound(match.group("to_sic")) < sic_sort_key(sic_from):
+                        continue
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    continue
+                if since is not None and st.st_mtime < since:
+                    continue
+                selected.append((file_path, arcname, st.st_size))
+        return selected
+
+    async def download_results(
+        self,
+        sic_from: Optional[str] = Query(None),
+        sic_to: Optional[str] = Query(None),
+        lang: Optional[str] = Query(None),
+        since: Optional[str] = Query(None),
+        mode: str = Query("deflate"),
+    ):
+        """
+        Descarga los archivos de la carpeta results como un ZIP generado en streaming.
+
+        El ZIP se comprime directamente en el cuerpo de la respuesta desde un hilo (sin
+        fichero temporal ni bloqueo del loop). Filtros opcionales: rango SIC (sic_from,
+        sic_to), carpeta de idioma (lang=EN, ES, omitidos) y fecha de modificación
+        (since=epoch o ISO 8601). mode=store guarda sin comprimir.
+        """
         results_dir = os.path.join(project_root, "results")
         if not os.path.exists(results_dir):
             raise HTTPException(
                 status_code=404,
                 detail="No hay resultados para descargar (carpeta vacía o inexistente).",
             )
+        if mode not in ("deflate", "store"):
+            raise HTTPException(status_code=400, detail="mode debe ser 'deflate' o 'store'.")
 
-        # Crear un archivo ZIP con nombre único para evitar colisiones
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        zip_filename = f"resultados_{timestamp}.zip"
-        zip_path = os.path.join(project_root, zip_filename)
-
-        try:
-            self.logger.info(f"Generando ZIP de resultados en: {zip_path}")
-            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                files_found = False
-                for root, dirs, files in os.walk(results_dir):
-                    # No incluir el propio archivo zip si se está creando dentro de la ruta (aunque aquí está fuera)
-                    for file in files:
-                        if file.endswith(".zip"): continue 
-                        files_found = True
-                        file_path = os.path.join(root, file)
-                        # Agregar al zip con nombre relativo
-                        arcname = os.path.relpath(file_path, results_dir)
-                        zipf.write(file_path, arcname)
-
-            if not files_found:
-                if os.path.exists(zip_path):
-                    os.remove(zip_path)
-                raise HTTPException(
-                    status_code=404, detail="La carpeta de resultados está vacía."
-                )
-
-            # Tarea de fondo para borrar el ZIP después de enviarlo
-            def remove_file(path: str):
+        since_ts = None
+        if since:
+            try:
+                since_ts = float(since)
+            except ValueError:
                 try:
-                    if os.path.exists(path):
-                        os.remove(path)
-                        self.logger.info(f"Archivo temporal eliminado: {path}")
-                except Exception as e:
-                    self.logger.error(f"Error borrando temporal {path}: {e}")
+                    since_ts = datetime.fromisoformat(since).timestamp()
+                except ValueError:
+                    raise HTTPException(status_code=400, detail=f"Fecha 'since' no válida: {since}")
 
-            background_tasks.add_task(remove_file, zip_path)
-
-            return FileResponse(
-                zip_path, filename="resultados_europa.zip", media_type="application/zip"
+        try:
+            files = await asyncio.to_thread(
+                self._collect_result_files, results_dir, sic_from, sic_to, lang, since_ts
             )
-
-        except HTTPException:
-            raise
         except Exception as e:
-            if os.path.exists(zip_path):
-                os.remove(zip_path)
-            self.logger.error(f"Error comprimiendo resultados: {e}")
+            self.logger.error(f"Error listando resultados para el ZIP: {e}")
             raise HTTPException(
                 status_code=500, detail=f"Error creando el archivo ZIP: {str(e)}"
             )
 
+        if not files:
+            raise HTTPException(
+                status_code=404, detail="La carpeta de resultados está vacía."
+            )
+
+        self.logger.info(
+            f"Enviando ZIP de resultados en streaming: {len(files)} archivos (mode={mode})"
+        )
+        # Generador síncrono: Starlette lo itera en su threadpool, fuera del loop de eventos
+        return StreamingResponse(
+            stream_zip(files, store=(mode == "store")),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": 'attachment; filename="resultados_europa.zip"'
+            },
+        )
+
     async def cleanup_files_endpoint(self, background_tasks: BackgroundTasks):
         """Elimina el contenido de las carpetas 'results' y 'omitidos' en segundo plano."""
         try:
@@ -1670,6 +1964,8 @@ class ScraperServer:
                     deleted_files = 0
                     deleted_files += clear_directory_sync(results_dir)
                     deleted_files += clear_directory_sync(omitted_dir)
+                    if self.results_index is not None:
+                        self.results_index.clear()
                     self.logger.info(f"Limpieza background completada. {deleted_files} elementos eliminados.")
                 except Exception as e:
                     self.logger.error(f"Error en tarea de fondo cleanup_files: {e}")
@@ -1703,53 +1999,38 @@ class ScraperServer:
 
             files_info = []
             total_lines = 0
-            # Búsqueda recursiva
-            for root, dirs, files in os.walk(results_dir):
-                for filename in files:
-                    if filename.endswith(".csv") or filename.endswith(".xlsx"):
-                        filepath = os.path.join(root, filename)
-                        stat = os.stat(filepath)
-                        relative_path = os.path.relpath(filepath, results_dir).replace(
-                            "\\", "/"
-                        )
-
-                        # Contar líneas para archivos CSV
-                        line_count = 0
-                        if filename.endswith(".csv"):
-                            try:
-                                with open(
-                                    filepath, "r", encoding="utf-8", errors="replace"
-                                ) as f:
-                                    line_count = sum(1 for _ in f)
-                                total_lines += line_count
-                            except Exception as e:
-                                self.logger.warning(
-                                    f"Error contando líneas {filepath}: {e}"
-                                )
-
-                        # Determinar categoría basado en la subcarpeta
-                        category = "General"
-                        if "/EN/" in f"/{relative_path}/":
-                            category = "EN"
-                        elif "/ES/" in f"/{relative_path}/":
-                            category = "ES"
-                        elif "/omitidos/" in f"/{relative_path}/":
-                            category = "Omitidos"
-
-                        files_info.append(
-                            {
-                                "name": filename,
-                                "path": relative_path,
-                                "size": stat.st_size,
-                                "size_human": self._human_readable_size(stat.st_size),
-                                "modified": stat.st_mtime,
-                                "modified_human": time.strftime(
-                                    "%Y-%m-%d %H:%M:%S", time.localtime(stat.st_mtime)
-                                ),
-                                "category": category,
-                                "line_count": line_count,
-                            }
-                        )
+            # Búsqueda recursiva (manifiesto de resultados: tamaños y conteos ya calculados)
+            entries = await self.offload.run_io("results_listing", self._manifest_files, results_dir)
+            for entry in entries:
+                if not (entry["name"].endswith(".csv") or entry["name"].endswith(".xlsx")):
+                    continue
+                relative_path = entry["relpath"]
+                line_count = entry["line_count"]
+                total_lines += line_count
+
+                # Determinar categoría basado en la subcarpeta
+                category = "General"
+                if "/EN/" in f"/{relative_path}/":
+                    category = "EN"
+                elif "/ES/" in f"/{relative_path}/":
+                    category = "ES"
+                elif "/omitidos/" in f"/{relative_path}/":
+                    category = "Omitidos"
+
+                files_info.append(
+                    {
+                        "name": entry["name"],
+                        "path": relative_path,
+                        "size": entry["size"],
+                        "size_human": self._human_readable_size(entry["size"]),
+                        "modified": entry["mtime"],
+                        "modified_human": time.strftime(
+                            "%Y-%m-%d %H:%M:%S", time.localtime(entry["mtime"])
+                        ),
+                        "category": category,
+                        "line_count": line_count,
+                    }
+                )
 
             # Ordenar por fecha de modificación (más reciente primero)
             files_info.sort(key=lambda x: x["modified"], reverse=True)
@@ -1766,6 +2047,10 @@ class ScraperServer:
                 status_code=500, detail=f"Error listando archivos: {str(e)}"
             )
 
+    def _manifest_files(self, root: str, **kwargs) -> List[Dict[str, Any]]:
+        """Entradas del manifiesto de resultados de `root` (puede barrer la carpeta: va al pool de E/S)."""
+        return get_results_manifest(root).files(**kwargs)
+
     async def get_results_line_count(self):
         """Cuenta el total de líneas de todos los archivos CSV en results."""
         try:
@@ -1783,28 +2068,21 @@ class ScraperServer:
             total_files = 0
             files_counts = []
 
-            for root, dirs, files in os.walk(results_dir):
-                for filename in files:
-                    if filename.endswith(".csv") and not filename.startswith("."):
-                        filepath = os.path.join(root, filename)
-                        try:
-                            with open(
-                                filepath, "r", encoding="utf-8", errors="replace"
-                            ) as f:
-                                line_count = sum(1 for _ in f)
-                            total_lines += line_count
-                            total_files += 1
-                            files_counts.append(
-                                {
-                                    "name": filename,
-                                    "path": os.path.relpath(
-                                        filepath, results_dir
-                                    ).replace("\\", "/"),
-                                    "line_count": line_count,
-                                }
-                            )
-                        except Exception as e:
-                            self.logger.warning(f"Error leyendo {filepath}: {e}")
+            entries = await self.offload.run_io(
+                "results_listing", self._manifest_files, results_dir, extensions=(".csv",)
+            )
+            for entry in entries:
+                if entry["name"].startswith(".") or not entry["name"].endswith(".csv"):
+                    continue
+                total_lines += entry["line_count"]
+                total_files += 1
+                files_counts.append(
+                    {
+                        "name": entry["name"],
+                        "path": entry["relpath"],
+                        "line_count": entry["line_count"],
+                    }
+                )
 
             self.logger.info(f"Total: {total_lines} líneas en {total_files} archivos")
             return {
@@ -1884,13 +2162,16 @@ class ScraperServer:
             if os.path.exists(filepath):
                 return FileResponse(filepath, filename=filename, media_type="text/csv")
 
+            # Los omitidos son registros CSV (o exportaciones .xlsx de versiones anteriores)
+            omitidos_media_type = "text/csv" if filename.endswith(".csv") else XLSX_MEDIA_TYPE
+
             # Check new omitidos
             filepath = os.path.join(omitidos_new, filename)
             if os.path.exists(filepath):
                 return FileResponse(
                     filepath,
                     filename=filename,
-                    media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    media_type=omitidos_media_type,
                 )
 
             # Check old omitidos
@@ -1899,7 +2180,7 @@ class ScraperServer:
                 return FileResponse(
                     filepath,
                     filename=filename,
-                    media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    media_type=omitidos_media_type,
                 )
 
             raise HTTPException(
@@ -1913,6 +2194,56 @@ class ScraperServer:
                 status_code=500, detail=f"Error descargando archivo: {str(e)}"
             )
 
+    async def export_omitidos_excel(self, filename: str):
+        """
+        Exporta a Excel un registro de omitidos (CSV) y lo descarga.
+        La conversión se hace bajo demanda en el pool de procesos y se reutiliza mientras
+        el registro no cambie.
+        """
+        try:
+            # Sanitizar el nombre para prevenir path traversal
+            safe_name = os.path.basename(filename)
+            if not safe_name or safe_name != filename or not safe_name.endswith(".csv"):
+                raise HTTPException(
+                    status_code=400, detail="Nombre de archivo no válido."
+                )
+
+            omitidos_new = os.path.join(project_root, "results", "omitidos")
+            omitidos_old = os.path.join(project_root, "omitidos")
+
+            csv_path = None
+            for directory in (omitidos_new, omitidos_old):
+                candidate = os.path.join(directory, safe_name)
+                if os.path.isfile(candidate):
+                    csv_path = candidate
+                    break
+            if csv_path is None:
+                raise HTTPException(
+                    status_code=404, detail=f"Archivo no encontrado: {safe_name}"
+                )
+
+            xlsx_path = os.path.splitext(csv_path)[0] + ".xlsx"
+            if not (
+                os.path.exists(xlsx_path)
+                and os.path.getmtime(xlsx_path) >= os.path.getmtime(csv_path)
+            ):
+                xlsx_path = await self.offload.run_cpu(
+                    "export_omitidos", export_omitted_to_excel, csv_path, xlsx_path
+                )
+
+            return FileResponse(
+                xlsx_path,
+                filename=os.path.basename(xlsx_path),
+                media_type=XLSX_MEDIA_TYPE,
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            self.logger.error(f"Error exportando omitidos {filename}: {e}")
+            raise HTTPException(
+                status_code=500, detail=f"Error exportando omitidos: {str(e)}"
+            )
+
     async def delete_single_file(self, filename: str):
         """Elimina un archivo individual de la carpeta results o omitidos."""
         try:
@@ -1932,7 +2263,9 @@ class ScraperServer:
             for directory in search_paths:
                 filepath = os.path.join(directory, safe_name)
                 if os.path.exists(filepath) and os.path.isfile(filepath):
-                    os.unlink(filepath)
+                    await self.offload.run_io("delete_file", os.unlink, filepath)
+                    if self.results_index is not None and safe_name.endswith(".csv"):
+                        await self.offload.run_io("delete_file", self.results_index.remove_source, safe_name)
                     deleted = True
                     self.logger.info(f"Archivo eliminado: {filepath}")
                     await global_event_log.add(
@@ -1954,48 +2287,97 @@ class ScraperServer:
                 status_code=500, detail=f"Error eliminando archivo: {str(e)}"
             )
 
-    async def preview_csv(self, filename: str, rows: int = 10):
-        """Muestra una vista previa de un archivo CSV (primeras N filas)."""
-        try:
-            results_dir = os.path.join(project_root, "results")
-            omitidos_new = os.path.join(project_root, "results", "omitidos")
-            omitidos_old = os.path.join(project_root, "omitidos")
-
-            filepath = os.path.join(results_dir, filename)
-            if not os.path.exists(filepath):
-                filepath = os.path.join(omitidos_new, filename)
+    def _locate_result_file(self, filename: str) -> Optional[str]:
+        """Ruta de un fichero de resultados u omitidos (results/, results/<IDIOMA>/, omitidos)."""
+        results_dir = os.path.join(project_root, "results")
+        omitidos_new = os.path.join(project_root, "results", "omitidos")
+        omitidos_old = os.path.join(project_root, "omitidos")
+
+        candidates = [os.path.join(results_dir, filename), os.path.join(omitidos_new, filename),
+                      os.path.join(omitidos_old, filename)]
+        # Los resultados se guardan por idioma (results/EN/, results/ES/, ...)
+        if os.path.isdir(results_dir):
+            candidates.extend(
+                os.path.join(results_dir, entry, filename) for entry in sorted(os.listdir(results_dir))
+                if entry != "omitidos" and os.path.isdir(os.path.join(results_dir, entry))
+            )
+        for filepath in candidates:
+            if os.path.isfile(filepath):
+                return filepath
+        return None
+
+    @staticmethod
+    def _rows_to_html(columns: List[str], rows: List[Dict[str, Any]]) -> str:
+        """Tabla HTML (mismas clases que la vista previa con pandas) con el texto escapado."""
+        header = "".join(f"<th>{html.escape(column)}</th>" for column in columns)
+        body = "".join(
+            "<tr>" + "".join(f"<td>{html.escape(str(row.get(column, '')))}</td>" for column in columns) + "</tr>"
+            for row in rows
+        )
+        return (
+            '<table border="1" class="dataframe table table-striped table-hover">'
+            f"<thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>"
+        )
 
-            if not os.path.exists(filepath):
-                filepath = os.path.join(omitidos_old, filename)
+    def _build_preview(self, filename: str, rows: int) -> Dict[str, Any]:
+        """Lee las primeras filas del fichero y las convierte en HTML (bloqueante: va al pool de E/S)."""
+        results_dir = os.path.join(project_root, "results")
+        filepath = self._locate_result_file(filename)
+        if filepath is None:
+            raise HTTPException(
+                status_code=404, detail=f"Archivo no encontrado: {filename}"
+            )
 
-            if not os.path.exists(filepath):
-                raise HTTPException(
-                    status_code=404, detail=f"Archivo no encontrado: {filename}"
-                )
+        # Obtener información del archivo
+        stat = os.stat(filepath)
+        if filename.endswith(".csv"):
+            # results/ cubre también results/omitidos; la carpeta omitidos antigua tiene el suyo
+            manifest_root = results_dir if filepath.startswith(results_dir + os.sep) else os.path.dirname(filepath)
+            manifest_entry = get_results_manifest(manifest_root).get(filepath)
+            total_rows = manifest_entry["row_count"] if manifest_entry else 0
+        else:
+            total_rows = sum(1 for _ in open(filepath)) - 1  # -1 por el encabezado
 
-            # Leer el archivo según extensión
+        # Los CSV de resultados se leen del índice (se indexan la primera vez) si tiene todas sus
+        # filas; si faltan (filas duplicadas, lotes perdidos) o se piden más de una página, se lee
+        # el fichero, igual que el resto con pandas
+        use_index = (
+            filename.startswith("results_") and filename.endswith(".csv")
+            and self.results_index is not None and int(rows) <= MAX_QUERY_LIMIT
+        )
+        if use_index:
+            self.results_index.ensure_indexed(filepath)
+            use_index = 0 < total_rows <= self.results_index.count(filename)
+        if use_index:
+            page = self.results_index.query(source_file=filename, sort="id", limit=int(rows))
+            columns = list(RESULT_COLUMNS)
+            preview_rows = len(page["results"])
+            html_table = self._rows_to_html(columns, page["results"])
+        else:
             if filename.endswith(".xlsx"):
                 df = pd.read_excel(filepath, nrows=int(rows))
             else:
                 df = pd.read_csv(filepath, nrows=int(rows))
-
+            columns = list(df.columns)
+            preview_rows = len(df)
             # Convertir a HTML para visualización
             html_table = df.to_html(
                 classes="table table-striped table-hover", index=False
             )
 
-            # Obtener información del archivo
-            stat = os.stat(filepath)
-            total_rows = sum(1 for _ in open(filepath)) - 1  # -1 por el encabezado
+        return {
+            "filename": filename,
+            "preview_html": html_table,
+            "preview_rows": preview_rows,
+            "total_rows": total_rows,
+            "columns": columns,
+            "size_human": self._human_readable_size(stat.st_size),
+        }
 
-            return {
-                "filename": filename,
-                "preview_html": html_table,
-                "preview_rows": int(rows),
-                "total_rows": total_rows,
-                "columns": list(df.columns),
-                "size_human": self._human_readable_size(stat.st_size),
-            }
+    async def preview_csv(self, filename: str, rows: int = 10):
+        """Muestra una vista previa de un archivo CSV (primeras N filas)."""
+        try:
+            return await self.offload.run_io("preview_csv", self._build_preview, filename, rows)
         except HTTPException:
             raise
         except Exception as e:
@@ -2004,6 +2386,71 @@ class ScraperServer:
                 status_code=500, detail=f"Error generando preview: {str(e)}"
             )
 
+    def _run_results_query(self, file: Optional[str], **filters) -> Dict[str, Any]:
+        """Consulta el índice de resultados (bloqueante: va al pool de E/S)."""
+        if file:
+            filepath = self._locate_result_file(file)
+            if filepath is None:
+                raise HTTPException(status_code=404, detail=f"Archivo no encontrado: {file}")
+            self.results_index.ensure_indexed(filepath)
+        return self.results_index.query(source_file=file, **filters)
+
+    async def query_results(
+        self,
+        q: Optional[str] = None,
+        sic_from: Optional[str] = None,
+        sic_to: Optional[str] = None,
+        lang: Optional[str] = None,
+        min_keywords: Optional[int] = None,
+        file: Optional[str] = None,
+        sort: str = "sic",
+        order: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ):
+        """
+        Consulta los resultados indexados: filtros, búsqueda de texto, orden y paginación.
+
+        - q: búsqueda FTS5 en título y descripción ("iron ore", "mining NOT coal", "min*")
+        - sic_from / sic_to: rango SIC en orden natural ("50" a "59" incluye "5999.0")
+        - lang: idiomas separados por comas ("en,es")
+        - min_keywords: mínimo de apariciones de palabras clave
+        - file: solo las filas de un CSV de resultados
+        - sort: sic, keywords, words, id o relevance (con q); order: asc o desc
+        - cursor: 'next_cursor' de la respuesta anterior
+        """
+        try:
+            if self.results_index is None:
+                raise HTTPException(status_code=503, detail="El índice de resultados no está disponible.")
+            if file is not None and os.path.basename(file) != file:
+                raise HTTPException(status_code=400, detail="Nombre de archivo no válido.")
+            if order not in (None, "asc", "desc"):
+                raise HTTPException(status_code=400, detail="order debe ser 'asc' o 'desc'.")
+            langs = [item for item in lang.split(",") if item.strip()] if lang else None
+            return await self.offload.run_io(
+                "results_query",
+                self._run_results_query,
+                file,
+                match=q or None,
+                sic_from=sic_from or None,
+                sic_to=sic_to or None,
+                langs=langs,
+                min_keywords=min_keywords,
+                sort=sort,
+                descending=None if order is None else order == "desc",
+                limit=limit,
+                cursor=cursor or None,
+            )
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            self.logger.error(f"Error consultando el índice de resultados: {e}")
+            raise HTTPException(
+                status_code=500, detail=f"Error consultando resultados: {str(e)}"
+            )
+
     async def results_viewer_html(self):
         """Retorna una página HTML simple para visualizar los resultados con auto-refresh."""
         html_content = """
@@ -2093,6 +2540,64 @@ class ScraperServer:
         </div>
     </div>
 
+    <div class="container">
+        <div class="card">
+            <div class="card-header">
+                <h4 class="mb-0">Buscar en Resultados</h4>
+            </div>
+            <div class="card-body">
+                <form class="row g-2 mb-3" onsubmit="searchResults(); return false;">
+                    <div class="col-md-3">
+                        <input type="text" id="searchText" class="form-control form-control-sm" placeholder="Texto (título o descripción)">
+                    </div>
+                    <div class="col-md-1">
+                        <input type="text" id="searchLang" class="form-control form-control-sm" placeholder="en,es">
+                    </div>
+                    <div class="col-md-1">
+                        <input type="text" id="searchSicFrom" class="form-control form-control-sm" placeholder="SIC desde">
+                    </div>
+                    <div class="col-md-1">
+                        <input type="text" id="searchSicTo" class="form-control form-control-sm" placeholder="SIC hasta">
+                    </div>
+                    <div class="col-md-2">
+                        <input type="number" min="0" id="searchMinKeywords" class="form-control form-control-sm" placeholder="Mín. palabras clave">
+                    </div>
+                    <div class="col-md-2">
+                        <select id="searchSort" class="form-select form-select-sm">
+                            <option value="sic">Código SIC</option>
+                            <option value="keywords">Palabras clave</option>
+                            <option value="words">Total de palabras</option>
+                            <option value="relevance">Relevancia (con texto)</option>
+                        </select>
+                    </div>
+                    <div class="col-md-2">
+                        <button type="submit" class="btn btn-sm btn-primary w-100">Buscar</button>
+                    </div>
+                </form>
+                <div class="table-responsive preview-container">
+                    <table class="table table-sm table-striped table-hover">
+                        <thead>
+                            <tr>
+                                <th>SIC</th>
+                                <th>Curso</th>
+                                <th>Título</th>
+                                <th>Idioma</th>
+                                <th>Palabras clave</th>
+                                <th>Archivo</th>
+                            </tr>
+                        </thead>
+                        <tbody id="searchTableBody">
+                            <tr><td colspan="6" class="text-center">Sin búsqueda</td></tr>
+                        </tbody>
+                    </table>
+                </div>
+                <div class="text-center">
+                    <button class="btn btn-sm btn-outline-primary d-none" id="searchMore" onclick="searchResults(true)">Más</button>
+                </div>
+            </div>
+        </div>
+    </div>
+
     <div class="url-box">
         <h5>URL de Acceso (Cloudflare)</h5>
         <div class="url" id="cloudflareUrl">Cargando URL...</div>
@@ -2226,6 +2731,50 @@ class ScraperServer:
             return div.innerHTML;
         }
 
+        let searchCursor = null;
+
+        function searchResults(more = false) {
+            const params = new URLSearchParams();
+            const fields = {
+                q: 'searchText', lang: 'searchLang', sic_from: 'searchSicFrom',
+                sic_to: 'searchSicTo', min_keywords: 'searchMinKeywords', sort: 'searchSort'
+            };
+            for (const [param, id] of Object.entries(fields)) {
+                const value = document.getElementById(id).value.trim();
+                if (value) params.set(param, value);
+            }
+            if (more && searchCursor) params.set('cursor', searchCursor);
+            const tbody = document.getElementById('searchTableBody');
+            const moreButton = document.getElementById('searchMore');
+
+            fetch('/api/query?' + params.toString())
+                .then(r => r.json().then(data => ({ ok: r.ok, data })))
+                .then(({ ok, data }) => {
+                    if (!ok) throw new Error(data.detail || 'Error en la búsqueda');
+                    const rows = data.results.map(r => `
+                        <tr>
+                            <td>${escapeHtml(r.sic_code)}</td>
+                            <td>${escapeHtml(r.course_name)}</td>
+                            <td><a href="${escapeHtml(r.url).replace(/"/g, '&quot;')}" target="_blank" rel="noopener">${escapeHtml(r.title || r.url)}</a></td>
+                            <td>${escapeHtml(r.lang)}</td>
+                            <td>${r.keyword_count}</td>
+                            <td>${escapeHtml(r.source_file)}</td>
+                        </tr>
+                    `).join('');
+                    if (more) {
+                        tbody.insertAdjacentHTML('beforeend', rows);
+                    } else {
+                        tbody.innerHTML = rows || '<tr><td colspan="6" class="text-center">Sin resultados</td></tr>';
+                    }
+                    searchCursor = data.next_cursor;
+                    moreButton.classList.toggle('d-none', !searchCursor);
+                })
+                .catch(err => {
+                    tbody.innerHTML = `<tr><td colspan="6" class="text-center text-danger">${escapeHtml(err.message)}</td></tr>`;
+                    moreButton.classList.add('d-none');
+                });
+        }
+
         function updateCloudflareUrl() {
             fetch('/api/cloudflare_url')
                 .then(r => r.json())
@@ -2336,10 +2885,7 @@ class ScraperServer:
             pass
 
         # 2. Limpiar estados
-        if self.worker_states is not None:
-            self.worker_states.clear()
-        if self.course_states is not None:
-            self.course_states.clear()
+        self._reset_states()
 
         self.is_job_running = False
 
@@ -2353,6 +2899,78 @@ class ScraperServer:
         events = await global_event_log.get_events(min_id)
         return {"events": events}
 
+    async def stream_endpoint(
+        self,
+        request: Request,
+        last_event_id: Optional[str] = Query(None),
+        since: int = Query(0),
+        channels: str = Query("log,status"),
+    ):
+        """
+        Canal Server-Sent Events con los eventos del EventLog ("event: log") y los cambios de
+        estado de workers/cursos ("event: status", mismo formato que /api/detailed_status).
+
+        El id de cada mensaje es "<último evento>:<versión de estado>". Al reconectar (cabecera
+        Last-Event-ID o parámetro last_event_id) solo se envía lo ocurrido después del cursor;
+        el primer mensaje de estado es un delta si el cursor sigue siendo válido y el estado
+        completo en otro caso. channels=log o channels=status limita el stream a un tipo.
+        """
+        cursor = request.headers.get("last-event-id") or last_event_id
+        event_cursor, state_cursor = _parse_stream_cursor(cursor, since)
+        wanted = {c.strip() for c in channels.split(",") if c.strip()}
+        send_log = "log" in wanted
+        send_status = "status" in wanted
+
+        async def event_stream():
+            listener = global_event_log.subscribe()
+            _, wake = listener
+            event_id, state_seen = event_cursor, state_cursor
+            first = True
+            last_sent = time.monotonic()
+            try:
+                yield f"retry: {STREAM_RETRY_MS}\n\n"
+                while not await request.is_disconnected():
+                    wake.clear()
+                    messages = []
+
+                    if send_log:
+                        for event in await global_event_log.get_events(event_id):
+                            event_id = event["id"]
+                            messages.append(_sse_message("log", event, f"{event_id}:{state_seen}"))
+
+                    current = self.state_version.value if self.state_version is not None else 0
+                    if send_status and (first or current != state_seen):
+                        status = await self.get_detailed_status(since=state_seen)
+                        state_seen = status["version"]
+                        messages.append(_sse_message("status", status, f"{event_id}:{state_seen}"))
+                    first = False
+
+                    if messages:
+                        yield "".join(messages)
+                        last_sent = time.monotonic()
+                    elif time.monotonic() - last_sent >= STREAM_HEARTBEAT_SECONDS:
+                        yield ": keep-alive\n\n"
+                        last_sent = time.monotonic()
+
+                    # Los eventos despiertan el stream al instante; el estado lo escriben otros
+                    # procesos, así que su versión se comprueba periódicamente
+                    try:
+                        await asyncio.wait_for(wake.wait(), timeout=STREAM_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                global_event_log.unsubscribe(listener)
+
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+                "Connection": "keep-alive",
+            },
+        )
+
     async def debug_info(self):
         """Diagnostic endpoint to see server environment."""
         try:
@@ -2390,7 +3008,7 @@ class ScraperServer:
 
             # 1. Obtener cursos con estado 'Error' o que no completaron
             if self.course_states is not None:
-                courses_dict = dict(self.course_states)
+                courses_dict = self.course_states.snapshot()
                 for sic_code, course_data in courses_dict.items():
                     status = course_data.get("status", "")
                     # Identificar cursos con problemas
@@ -2408,23 +3026,21 @@ class ScraperServer:
                             }
                         )
 
-            # 2. Obtener eventos de error del log global
-            events = await global_event_log.get_events(0)
-            for event in events:
-                if event.get("type") == "ERROR":
-                    error_events.append(
-                        {
-                            "timestamp": event.get("timestamp", ""),
-                            "source": event.get("source", ""),
-                            "message": event.get("message", ""),
-                            "details": event.get("details", {}),
-                        }
-                    )
+            # 2. Obtener eventos de error del log global (índice por tipo)
+            for event in await global_event_log.query(event_type=EventType.ERROR):
+                error_events.append(
+                    {
+                        "timestamp": event.get("timestamp", ""),
+                        "source": event.get("source", ""),
+                        "message": event.get("message", ""),
+                        "details": event.get("details", {}),
+                    }
+                )
 
             # 3. Obtener workers con estado de error
             workers_with_errors = []
             if self.worker_states is not None:
-                workers_dict = dict(self.worker_states)
+                workers_dict = self.worker_states.snapshot()
                 for worker_id, worker_data in workers_dict.items():
                     status = worker_data.get("status", "")
                     current_task = worker_data.get("current_task", "")
@@ -2444,7 +3060,7 @@ class ScraperServer:
                         )
 
             # 4. Calcular estadísticas resumidas
-            total_courses = len(dict(self.course_states)) if self.course_states else 0
+            total_courses = len(self.course_states) if self.course_states is not None else 0
             total_errors = len(failed_courses)
             total_worker_errors = len(workers_with_errors)
 
@@ -2499,40 +3115,21 @@ class ScraperServer:
 
             # 1. Obtener estado actual del curso
             if self.course_states is not None:
-                courses_dict = dict(self.course_states)
+                courses_dict = self.course_states.snapshot()
                 course_details = courses_dict.get(sic_code, {})
 
-            # 2. Buscar eventos relacionados con este curso
-            related_events = []
-            events = await global_event_log.get_events(0)
-            for event in events:
-                details = event.get("details", {})
-                event_sic = details.get("sic", "")
-                event_course = details.get("course", "")
-
-                if event_sic == sic_code or sic_code in str(event_course):
-                    related_events.append(event)
-
-            # 3. Buscar en los logs del worker (si existe)
-            worker_logs = []
-            log_dir = os.path.join(project_root, "logs")
-            if os.path.exists(log_dir):
-                for log_file in os.listdir(log_dir):
-                    if log_file.startswith("worker_") and log_file.endswith(".log"):
-                        log_path = os.path.join(log_dir, log_file)
-                        try:
-                            with open(
-                                log_path, "r", encoding="utf-8", errors="ignore"
-                            ) as f:
-                                # Leer últimas 100 líneas
-                                lines = f.readlines()[-100:]
-                                for line in lines:
-                                    if sic_code in line:
-                                        worker_logs.append(
-                                            {"file": log_file, "line": line.strip()}
-                                        )
-                        except Exception:
-                            pass
+            # 2. Buscar eventos relacionados con este curso (índice por SIC)
+            related_events = await global_event_log.query(sic=sic_code)
+
+            # 3. Entradas de los workers para este curso (desde el log de eventos, sin leer los .log)
+            worker_logs = [
+                {
+                    "file": event.get("source", ""),
+                    "line": f"[{event.get('timestamp', '')}] {event.get('type', '')}: {event.get('message', '')}",
+                }
+                for event in related_events
+                if str(event.get("source", "")).startswith("Worker-")
+            ]
 
             return {
                 "sic_code": sic_code,
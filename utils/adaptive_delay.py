@@ -50,19 +50,18 @@ class AdaptiveDelay:
         actual_delay = current_delay + random.uniform(-jitter_amount, jitter_amount)
         actual_delay = max(0.1, actual_delay)  # Asegurar un mínimo de 0.1 segundos
         
-        # Calcular el tiempo transcurrido desde la última solicitud
+        # Reservar el turno antes de esperar: con varias corrutinas sobre el mismo dominio
+        # cada una toma el hueco siguiente en lugar de despertar todas a la vez
         now = time.time()
         last_time = self.last_request_time.get(domain, 0)
-        elapsed = now - last_time
+        scheduled = max(now, last_time + actual_delay)
+        self.last_request_time[domain] = scheduled
         
         # Si no ha pasado suficiente tiempo, esperar
-        if elapsed < actual_delay:
-            wait_time = actual_delay - elapsed
+        wait_time = scheduled - now
+        if wait_time > 0:
             logger.debug(f"Esperando {wait_time:.2f}s para el dominio {domain}")
             await asyncio.sleep(wait_time)
-        
-        # Actualizar el timestamp de la última solicitud
-        self.last_request_time[domain] = time.time()
     
     def increase_delay(self, domain: Optional[str] = None) -> None:
         """
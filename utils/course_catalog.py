@@ -0,0 +1,92 @@
+"""
+CourseCatalog: instantánea inmutable y versionada del catálogo de cursos (tabla 'courses').
+
+Cada proceso carga el catálogo una vez y lo reutiliza mientras la versión de la base de
+datos (PRAGMA user_version, que se incrementa al reemplazar la tabla desde
+/api/upload_courses) no cambie. Las búsquedas por código SIC son O(1) y los rangos se
+resuelven por búsqueda binaria sobre la clave de orden natural (utils.sic_codes).
+"""
+
+import bisect
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from utils.sic_codes import sic_sort_key
+
+logger = logging.getLogger(__name__)
+
+# (sic_code, course_name, status, server)
+CourseRow = Tuple[str, str, str, str]
+
+
+class CourseCatalog:
+    """
+    Instantánea inmutable de la tabla de cursos, en orden natural de SIC e indexada por SIC.
+    """
+
+    __slots__ = ('version', 'courses', '_positions', '_keys')
+
+    def __init__(self, version: int, courses: List[CourseRow]):
+        self.version = version
+        # La base de datos ya los devuelve en orden natural; sorted es estable y mantiene el orden de carga
+        self.courses: Tuple[CourseRow, ...] = tuple(sorted(courses, key=lambda row: sic_sort_key(row[0])))
+        self._keys: List[str] = [sic_sort_key(row[0]) for row in self.courses]
+        # Última posición de cada SIC (mismo criterio que el cálculo de rango por posición)
+        self._positions: Dict[str, int] = {row[0]: i for i, row in enumerate(self.courses)}
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    def __contains__(self, sic_code: str) -> bool:
+        return sic_code in self._positions
+
+    def index_of(self, sic_code: str) -> Optional[int]:
+        """Posición del código SIC en el catálogo, o None si no existe."""
+        return self._positions.get(sic_code)
+
+    def get(self, sic_code: str) -> Optional[CourseRow]:
+        """Fila (sic_code, course_name, status, server) del código SIC, o None si no existe."""
+        index = self._positions.get(sic_code)
+        return self.courses[index] if index is not None else None
+
+    def slice(self, start: int, end: int) -> List[CourseRow]:
+        """Cursos entre dos posiciones (ambas inclusive)."""
+        return list(self.courses[start:end + 1])
+
+    def range(self, from_sic: str, to_sic: str) -> List[CourseRow]:
+        """
+        Cursos con código SIC entre from_sic y to_sic (ambos inclusive) en orden natural,
+        por búsqueda binaria. Los extremos se intercambian si llegan al revés.
+        """
+        low, high = sic_sort_key(from_sic), sic_sort_key(to_sic)
+        if low > high:
+            low, high = high, low
+        start = bisect.bisect_left(self._keys, low)
+        end = bisect.bisect_right(self._keys, high)
+        return list(self.courses[start:end])
+
+
+_catalog: Optional[CourseCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_course_catalog(db_handler) -> CourseCatalog:
+    """
+    Retorna la instantánea del catálogo de este proceso, recargándola si la base de datos cambió.
+
+    Args:
+        db_handler: SQLiteHandler de la base de datos de cursos
+
+    Returns:
+        CourseCatalog vigente (vacío si la tabla no se pudo leer)
+    """
+    global _catalog
+    version = db_handler.get_catalog_version()
+    with _catalog_lock:
+        if _catalog is not None and _catalog.version == version:
+            return _catalog
+        courses = db_handler.get_detailed_sic_codes_with_courses()
+        _catalog = CourseCatalog(version, courses)
+        logger.info(f"Catálogo de cursos cargado (versión {version}, {len(_catalog)} cursos)")
+        return _catalog
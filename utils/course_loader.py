@@ -0,0 +1,159 @@
+"""
+Carga en streaming de ficheros de cursos (CSV/XLSX) subidos a /api/upload_courses.
+
+El fichero se lee fila a fila (CSV con el módulo csv, XLSX con openpyxl en modo read-only) y
+las filas van directamente a la tabla de carga de SQLite por lotes, así que un catálogo de
+cientos de miles de cursos no se copia varias veces en memoria.
+
+`load_courses_file` se ejecuta en el pool de procesos del servidor, por lo que sus argumentos
+deben ser serializables (rutas, no objetos abiertos).
+"""
+
+import csv
+import re
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+from utils.sqlite_handler import SQLiteHandler
+
+logger = logging.getLogger(__name__)
+
+# Excel guarda 01.0 como "1.0": un dígito seguido de punto indica un cero perdido
+_LOST_LEADING_ZERO_RE = re.compile(r"^\d\.")
+
+# Cada cuántas filas cargadas se publica un evento de progreso
+PROGRESS_EVERY_ROWS = 50000
+
+
+class CourseFileError(ValueError):
+    """El fichero de cursos no tiene el formato esperado."""
+
+
+def detect_separator(first_line: str) -> str:
+    """Detecta el separador (coma, punto y coma o pipe) a partir de la primera línea."""
+    # Contar ocurrencias de posibles separadores en la primera línea
+    separators = {
+        ",": first_line.count(","),
+        ";": first_line.count(";"),
+        "|": first_line.count("|"),
+    }
+    detected_sep = max(separators, key=separators.get)
+    # Fallback a coma si no hay separadores claros
+    if separators[detected_sep] == 0:
+        detected_sep = ","
+    return detected_sep
+
+
+def sanitize_sic(code: str) -> str:
+    """Recupera el cero inicial que Excel elimina de los códigos SIC ("1.0" -> "01.0")."""
+    if _LOST_LEADING_ZERO_RE.match(code):
+        return "0" + code
+    return code
+
+
+def _cell_text(value) -> str:
+    """Texto de una celda tal como lo leería pandas con dtype=str."""
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _select_courses(rows: Iterator[List], header: List) -> Iterator[Tuple[str, str]]:
+    """
+    Extrae (sic_code, course_name) de las filas de datos.
+
+    Se toman las dos primeras columnas (o la 2ª y 3ª si hay una columna de id), sean cuales
+    sean sus nombres. Se descartan filas vacías o con 'nan'.
+    """
+    if len(header) < 2:
+        raise CourseFileError("El archivo requiere al menos 2 columnas (Código y Nombre).")
+
+    # FORMATO: id, sic_code, course_name (3 columnas) O sic_code, course_name (2 columnas)
+    code_index, name_index = (1, 2) if len(header) >= 3 else (0, 1)
+    logger.info(
+        f"Usando columna '{_cell_text(header[code_index])}' como Código y "
+        f"columna '{_cell_text(header[name_index])}' como Curso."
+    )
+    for row in rows:
+        if len(row) <= name_index:
+            continue
+        code = _cell_text(row[code_index])
+        name = _cell_text(row[name_index])
+        if code and name and code.lower() != "nan" and name.lower() != "nan":
+            yield sanitize_sic(code), name
+
+
+def _iter_csv(path: str) -> Iterator[Tuple[str, str]]:
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        first_line = f.readline()
+        detected_sep = detect_separator(first_line)
+        logger.info(f"Separador detectado: '{detected_sep}'")
+        header = next(csv.reader([first_line], delimiter=detected_sep), [])
+        yield from _select_courses(csv.reader(f, delimiter=detected_sep), header)
+
+
+def _iter_xlsx(path: str) -> Iterator[Tuple[str, str]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        yield from _select_courses(rows, header)
+    finally:
+        workbook.close()
+
+
+def iter_courses_file(path: str, filename: str) -> Iterator[Tuple[str, str]]:
+    """
+    Recorre el fichero de cursos y genera tuplas (sic_code, course_name) ya saneadas.
+
+    Args:
+        path: Ruta del fichero en disco
+        filename: Nombre original (decide el formato por la extensión)
+
+    Raises:
+        CourseFileError: Si el fichero tiene menos de 2 columnas
+    """
+    if filename.lower().endswith(".csv"):
+        return _iter_csv(path)
+    return _iter_xlsx(path)
+
+
+def load_courses_file(db_path: str, path: str, filename: str, event_queue=None) -> dict:
+    """
+    Reemplaza el catálogo de cursos de la base de datos con el contenido del fichero.
+
+    Args:
+        db_path: Base de datos de cursos
+        path: Fichero subido (CSV o XLSX) guardado en disco
+        filename: Nombre original del fichero
+        event_queue: Cola de eventos del servidor para publicar el progreso (opcional)
+
+    Returns:
+        Diccionario con 'loaded' y 'skipped'
+
+    Raises:
+        CourseFileError: Si el fichero no tiene el formato esperado
+    """
+    def publish(message: str, details: Optional[dict] = None):
+        logger.info(message)
+        if event_queue is None:
+            return
+        try:
+            event_queue.put({"type": "SYSTEM", "source": "CourseLoader", "message": message, "details": details or {}})
+        except Exception as e:
+            logger.debug(f"No se pudo publicar el progreso de la carga: {e}")
+
+    next_report = PROGRESS_EVERY_ROWS
+
+    def progress(loaded: int):
+        nonlocal next_report
+        if loaded >= next_report:
+            publish(f"Carga de cursos: {loaded} filas procesadas de {filename}.", {"loaded": loaded, "file": filename})
+            next_report = (loaded // PROGRESS_EVERY_ROWS + 1) * PROGRESS_EVERY_ROWS
+
+    publish(f"Cargando cursos desde {filename}...", {"file": filename})
+    loaded, skipped = SQLiteHandler(db_path).replace_courses(iter_courses_file(path, filename), progress)
+    publish(f"Carga de cursos completada: {loaded} cursos.", {"loaded": loaded, "skipped": skipped, "file": filename})
+    return {"loaded": loaded, "skipped": skipped}
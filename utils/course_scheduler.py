@@ -0,0 +1,170 @@
+"""
+CourseScheduler: reparto de cursos entre workers en lotes adaptativos con robo de trabajo.
+
+Al iniciar un trabajo los cursos (en orden SIC) se reparten en una cola por worker con un
+peso total similar. El peso de cada curso es un coste fijo de preparación más su número
+histórico de resultados, de modo que los cursos con pocos resultados se agrupan en lotes
+grandes (amortizando ficheros y accesos a la BD) y los cursos pesados van en lotes pequeños.
+
+Cada worker toma lotes de la cabeza de su cola; cuando se queda sin trabajo roba la mitad
+(por peso) de la cola del worker con más trabajo pendiente, empezando por la cola (tail).
+
+El planificador vive en el proceso del SyncManager (SchedulerManager) y los workers lo usan
+a través de un proxy: una llamada por lote, no por curso.
+"""
+
+import logging
+import threading
+from collections import deque
+from multiprocessing.managers import SyncManager
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Coste fijo por curso (búsqueda, estado, E/S) expresado en "resultados equivalentes"
+COURSE_SETUP_WEIGHT = 5
+# Peso asumido para cursos sin histórico
+DEFAULT_COURSE_WEIGHT = 25
+
+
+class CourseScheduler:
+    """
+    Colas de cursos por worker con lotes adaptativos y robo de trabajo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues: Dict[int, deque] = {}
+        self._job_params: Optional[Dict[str, Any]] = None
+        self._target_weight = 200
+        self._max_chunk_size = 50
+        self._chunks_served = 0
+        self._steals = 0
+
+    @staticmethod
+    def course_weight(result_count: Optional[int]) -> int:
+        """Peso de un curso a partir de su número histórico de resultados."""
+        if result_count is None:
+            return DEFAULT_COURSE_WEIGHT
+        return COURSE_SETUP_WEIGHT + max(0, int(result_count))
+
+    def load(self, courses: List[Tuple[str, str]], result_counts: Dict[str, int], num_workers: int,
+             job_params: Dict[str, Any], target_weight: int = 200, max_chunk_size: int = 50) -> Dict[str, Any]:
+        """
+        Reparte los cursos de un trabajo entre las colas de los workers.
+
+        Args:
+            courses: Lista ordenada de (sic_code, course_name)
+            result_counts: Resultados históricos por SIC (los que falten usan el peso por defecto)
+            num_workers: Número de workers del pool
+            job_params: Parámetros comunes del trabajo (se devuelven con cada lote)
+            target_weight: Peso objetivo de un lote
+            max_chunk_size: Número máximo de cursos por lote
+
+        Returns:
+            Resumen del reparto (cursos y peso por worker)
+        """
+        weighted = [(sic, name, self.course_weight(result_counts.get(sic))) for sic, name in courses]
+        total_weight = sum(w for _, _, w in weighted)
+        num_workers = max(1, num_workers)
+
+        with self._lock:
+            self._queues = {i: deque() for i in range(num_workers)}
+            self._job_params = dict(job_params)
+            self._target_weight = max(1, target_weight)
+            self._max_chunk_size = max(1, max_chunk_size)
+            self._chunks_served = 0
+            self._steals = 0
+
+            # Tramos contiguos de SIC con peso similar por worker
+            share = total_weight / num_workers if total_weight else 0
+            worker_id, acc = 0, 0
+            for item in weighted:
+                if acc >= share and worker_id < num_workers - 1:
+                    worker_id, acc = worker_id + 1, 0
+                self._queues[worker_id].append(item)
+                acc += item[2]
+
+            summary = {
+                "courses": len(weighted),
+                "total_weight": total_weight,
+                "per_worker": {wid: len(q) for wid, q in self._queues.items()},
+            }
+        logger.info(f"CourseScheduler: {summary['courses']} cursos repartidos (peso total {total_weight}) entre {num_workers} workers")
+        return summary
+
+    def next_chunk(self, worker_id: int) -> Optional[Tuple[List[Tuple[str, str]], Dict[str, Any]]]:
+        """
+        Entrega el siguiente lote de cursos para un worker, robando trabajo si su cola está vacía.
+
+        Returns:
+            (lote de (sic_code, course_name), job_params) o None si no queda trabajo
+        """
+        with self._lock:
+            own = self._queues.setdefault(worker_id, deque())
+            if not own:
+                self._steal_into(worker_id, own)
+            if not own:
+                return None
+
+            # Lote adaptativo: hasta el peso objetivo, pero nunca más de la mitad de lo que
+            # queda en la cola para que el final del trabajo se reparta en lotes pequeños
+            remaining = sum(w for _, _, w in own)
+            budget = max(1, min(self._target_weight, remaining / 2))
+            chunk, weight = [], 0
+            while own and len(chunk) < self._max_chunk_size:
+                sic, name, w = own[0]
+                if chunk and weight + w > budget:
+                    break
+                own.popleft()
+                chunk.append((sic, name))
+                weight += w
+
+            self._chunks_served += 1
+            return chunk, self._job_params
+
+    def _steal_into(self, thief_id: int, own: deque) -> None:
+        """Mueve a `own` la mitad (por peso) del final de la cola con más trabajo pendiente."""
+        victim_id, victim_weight = None, 0
+        for wid, q in self._queues.items():
+            if wid == thief_id or not q:
+                continue
+            weight = sum(w for _, _, w in q)
+            if weight > victim_weight:
+                victim_id, victim_weight = wid, weight
+        if victim_id is None:
+            return
+
+        victim = self._queues[victim_id]
+        stolen, stolen_weight = [], 0
+        # Siempre al menos un curso; el dueño conserva la cabeza de su cola
+        while victim and (not stolen or stolen_weight + victim[-1][2] <= victim_weight / 2):
+            item = victim.pop()
+            stolen.append(item)
+            stolen_weight += item[2]
+        own.extend(reversed(stolen))
+        self._steals += 1
+        logger.info(f"CourseScheduler: worker {thief_id} roba {len(stolen)} cursos (peso {stolen_weight}) al worker {victim_id}")
+
+    def clear(self) -> None:
+        """Descarta todo el trabajo pendiente (detención o reinicio)."""
+        with self._lock:
+            self._queues = {}
+            self._job_params = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado del planificador (cursos pendientes por worker, lotes entregados, robos)."""
+        with self._lock:
+            return {
+                "pending": {wid: len(q) for wid, q in self._queues.items()},
+                "pending_total": sum(len(q) for q in self._queues.values()),
+                "chunks_served": self._chunks_served,
+                "steals": self._steals,
+            }
+
+
+class SchedulerManager(SyncManager):
+    """SyncManager que además aloja el CourseScheduler compartido."""
+
+
+SchedulerManager.register("CourseScheduler", CourseScheduler)
@@ -0,0 +1,159 @@
+"""
+DocumentParserPool: ejecuta el parseo de documentos (PDF, DOCX, XLSX, PPTX) fuera del loop asyncio.
+
+Cada documento se parsea en un proceso hijo con límite de tiempo y de memoria. El número de
+procesos simultáneos está acotado por worker, de modo que un PDF patológico ocupa un único
+hueco del pool en lugar de bloquear todas las extracciones en curso. Si el documento supera
+el tiempo, la tarea se cancela o el pool se cierra, el proceso hijo se mata.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from typing import Optional, Set
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # Windows
+    HAS_RESOURCE = False
+
+logger = logging.getLogger(__name__)
+
+# Extensiones cuyo parseo es costoso en CPU y se envía al pool
+POOLED_EXTENSIONS = {'.pdf', '.docx', '.xlsx', '.pptx'}
+
+
+class DocumentParseError(Exception):
+    """El documento no se pudo parsear (tiempo agotado, memoria excedida o error del parser)."""
+
+
+def _parse_document_worker(ext: str, file_path: str, memory_limit_mb: int, conn) -> None:
+    """
+    Punto de entrada del proceso hijo: aplica el límite de memoria, parsea y envía el texto.
+    """
+    try:
+        if memory_limit_mb and HAS_RESOURCE:
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+        from utils.file_extractor import DOCUMENT_PARSERS
+        conn.send((True, DOCUMENT_PARSERS[ext](file_path)))
+    except MemoryError:
+        conn.send((False, f"memoria excedida (límite {memory_limit_mb}MB)"))
+    except BaseException as e:
+        conn.send((False, f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def _get_mp_context():
+    """Usa forkserver donde exista (hijos baratos y sin heredar hilos); spawn en otro caso."""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('forkserver')
+        # Precargar los parsers en el servidor de fork para no importarlos en cada documento
+        ctx.set_forkserver_preload(['utils.file_extractor'])
+        return ctx
+    return multiprocessing.get_context('spawn')
+
+
+class DocumentParserPool:
+    """
+    Pool acotado de procesos de parseo con límites de tiempo y memoria por documento.
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = 120.0, memory_limit_mb: int = 1024):
+        """
+        Inicializa el pool (los procesos se crean bajo demanda, uno por documento).
+
+        Args:
+            max_workers: Documentos parseados en paralelo como máximo (0 = en un hilo, sin procesos)
+            timeout: Segundos máximos de parseo por documento
+            memory_limit_mb: Memoria virtual máxima por proceso de parseo en MB (0 = sin límite)
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._ctx = _get_mp_context() if max_workers > 0 else None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self._active: Set[multiprocessing.Process] = set()
+        self.timeouts = 0
+        self.failures = 0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Retorna el semáforo del loop actual, creándolo si es necesario."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def parse(self, ext: str, file_path: str) -> str:
+        """
+        Parsea un documento en un proceso hijo.
+
+        Args:
+            ext: Extensión del documento (debe estar en POOLED_EXTENSIONS)
+            file_path: Ruta al fichero descargado
+
+        Returns:
+            Texto extraído
+
+        Raises:
+            DocumentParseError: Si el parseo excede los límites o falla
+        """
+        loop = asyncio.get_running_loop()
+
+        if self._ctx is None:
+            from utils.file_extractor import DOCUMENT_PARSERS
+            return await loop.run_in_executor(None, DOCUMENT_PARSERS[ext], file_path)
+
+        async with self._get_semaphore():
+            parent_conn, child_conn = self._ctx.Pipe(duplex=False)
+            process = self._ctx.Process(
+                target=_parse_document_worker,
+                args=(ext, file_path, self.memory_limit_mb, child_conn),
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._active.add(process)
+            try:
+                # poll() se desbloquea con el resultado, con el fin del hijo (EOF) o al agotar el tiempo
+                ready = await loop.run_in_executor(None, parent_conn.poll, self.timeout)
+                if not ready:
+                    self.timeouts += 1
+                    raise DocumentParseError(f"tiempo de parseo agotado ({self.timeout}s) para {os.path.basename(file_path)}")
+                try:
+                    ok, payload = await loop.run_in_executor(None, parent_conn.recv)
+                except EOFError:
+                    self.failures += 1
+                    raise DocumentParseError(f"el proceso de parseo terminó sin resultado (exitcode={process.exitcode})")
+                if not ok:
+                    self.failures += 1
+                    raise DocumentParseError(payload)
+                return payload
+            finally:
+                # Cubre también la cancelación de la tarea: el hijo nunca sobrevive a la petición
+                self._terminate(process)
+                parent_conn.close()
+
+    def _terminate(self, process: multiprocessing.Process) -> None:
+        """Mata el proceso de parseo si sigue vivo y lo recoge."""
+        self._active.discard(process)
+        try:
+            if process.is_alive():
+                process.kill()
+            process.join(timeout=1)
+        except Exception as e:
+            logger.debug(f"Error terminando proceso de parseo: {e}")
+
+    def shutdown(self) -> None:
+        """Mata todos los parseos en curso (al detener el scraping o cerrar el worker)."""
+        active = list(self._active)
+        for process in active:
+            self._terminate(process)
+        if active:
+            logger.info(f"DocumentParserPool: {len(active)} parseos en curso cancelados")
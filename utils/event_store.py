@@ -0,0 +1,232 @@
+"""
+EventStore: almacén de eventos con índices en memoria y log de segmentos en disco.
+
+Los eventos se guardan en memoria (retención acotada) con índices por id, tipo, origen y
+código SIC, de modo que las consultas cuestan O(coincidencias) en lugar de recorrer todo el
+log. Si se indica un directorio, cada evento se añade además a un segmento JSONL compacto
+(events_<primer id>.jsonl); al abrir el almacén se recarga la historia retenida y los
+segmentos que quedan fuera de la retención se borran.
+"""
+
+import os
+import json
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "events_"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+def event_sics(event: Dict[str, Any]) -> List[str]:
+    """Códigos SIC a los que se refiere un evento (details: sic, sic_code o sics)."""
+    details = event.get("details") or {}
+    if not isinstance(details, dict):
+        return []
+    sics = []
+    for key in ("sic", "sic_code"):
+        value = details.get(key)
+        if value:
+            sics.append(str(value))
+    many = details.get("sics")
+    if isinstance(many, (list, tuple)):
+        sics.extend(str(value) for value in many if value)
+    return list(dict.fromkeys(sics))
+
+
+class EventStore:
+    """
+    Eventos con ids crecientes, retención acotada e índices por tipo, origen y SIC.
+    Seguro entre hilos.
+    """
+
+    def __init__(self, max_events: int = 5000, directory: Optional[str] = None, segment_events: int = 1000):
+        """
+        Inicializa el almacén.
+
+        Args:
+            max_events: Eventos retenidos en memoria (y en disco)
+            directory: Directorio de los segmentos; None para un almacén solo en memoria
+            segment_events: Eventos por segmento antes de rotar a un fichero nuevo
+        """
+        self.max_events = max(1, max_events)
+        self.segment_events = max(1, segment_events)
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._base = 0  # Posición en _events del evento retenido más antiguo
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._last_id = 0
+        self._by_type: Dict[str, deque] = {}
+        self._by_source: Dict[str, deque] = {}
+        self._by_sic: Dict[str, deque] = {}
+        self._segment = None
+        self._segment_count = 0
+        if directory:
+            self._load()
+
+    # --- Persistencia ---
+
+    def _segments(self) -> List[str]:
+        """Segmentos existentes ordenados por primer id."""
+        try:
+            names = [n for n in os.listdir(self.directory) if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX)]
+        except FileNotFoundError:
+            return []
+        return sorted(names, key=lambda n: int(n[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)] or 0))
+
+    def _load(self) -> None:
+        """Recarga los eventos retenidos de los segmentos en disco y reconstruye los índices."""
+        os.makedirs(self.directory, exist_ok=True)
+        loaded = deque(maxlen=self.max_events)
+        for name in self._segments():
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            event = json.loads(line)
+                        except ValueError:
+                            continue  # Línea truncada por un cierre abrupto
+                        if isinstance(event, dict) and event.get("id", 0) > self._last_id:
+                            loaded.append(event)
+                            self._last_id = event["id"]
+            except OSError as e:
+                logger.warning(f"No se pudo leer el segmento de eventos {name}: {e}")
+        for event in loaded:
+            self._index(event)
+        if loaded:
+            logger.info(f"EventStore: {len(loaded)} eventos recuperados de {self.directory} (último id {self._last_id})")
+        self._prune_segments()
+
+    def _write(self, event: Dict[str, Any]) -> None:
+        """Añade el evento al segmento actual, rotando cuando se llena."""
+        if self._segment is None or self._segment_count >= self.segment_events:
+            if self._segment is not None:
+                self._segment.close()
+                self._prune_segments()
+            path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{event['id']:012d}{SEGMENT_SUFFIX}")
+            self._segment = open(path, "a", encoding="utf-8")
+            self._segment_count = 0
+        self._segment.write(json.dumps(event, default=str, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._segment.flush()
+        self._segment_count += 1
+
+    def _prune_segments(self) -> None:
+        """Borra los segmentos cuyos eventos quedaron todos fuera de la retención."""
+        oldest = self._events[self._base]["id"] if self._base < len(self._events) else self._last_id + 1
+        segments = self._segments()
+        # Un segmento es prescindible si el siguiente empieza en o antes del evento retenido más antiguo
+        for name, next_name in zip(segments, segments[1:]):
+            if int(next_name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) <= oldest:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError as e:
+                    logger.debug(f"No se pudo borrar el segmento de eventos {name}: {e}")
+
+    def close(self) -> None:
+        """Cierra el segmento abierto."""
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+    # --- Índices ---
+
+    @staticmethod
+    def _index_keys(event: Dict[str, Any]):
+        yield "_by_type", event.get("type")
+        yield "_by_source", event.get("source")
+        for sic in event_sics(event):
+            yield "_by_sic", sic
+
+    def _index(self, event: Dict[str, Any]) -> None:
+        self._events.append(event)
+        self._by_id[event["id"]] = event
+        for attr, key in self._index_keys(event):
+            if key:
+                getattr(self, attr).setdefault(key, deque()).append(event["id"])
+        # Retención: los ids son crecientes, así que lo más antiguo está siempre a la izquierda
+        while len(self._events) - self._base > self.max_events:
+            self._evict(self._events[self._base])
+            self._base += 1
+        if self._base > self.max_events:
+            del self._events[:self._base]
+            self._base = 0
+
+    def _evict(self, event: Dict[str, Any]) -> None:
+        self._by_id.pop(event["id"], None)
+        for attr, key in self._index_keys(event):
+            ids = getattr(self, attr).get(key) if key else None
+            if ids and ids[0] == event["id"]:
+                ids.popleft()
+                if not ids:
+                    del getattr(self, attr)[key]
+
+    # --- API ---
+
+    def append(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Asigna el siguiente id al evento, lo indexa y lo persiste. Retorna el evento."""
+        with self._lock:
+            self._last_id += 1
+            event["id"] = self._last_id
+            self._index(event)
+            if self.directory:
+                try:
+                    self._write(event)
+                except (OSError, TypeError, ValueError) as e:
+                    logger.warning(f"No se pudo persistir el evento {event['id']}: {e}")
+            return event
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    def since(self, min_id: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Eventos con id > min_id en orden. Con limit se devuelven solo los últimos `limit`.
+        """
+        with self._lock:
+            # Recorrido desde el final: el coste es proporcional a los eventos devueltos
+            start = len(self._events)
+            while start > self._base and self._events[start - 1]["id"] > min_id:
+                start -= 1
+                if limit is not None and len(self._events) - start >= limit:
+                    break
+            return self._events[start:]
+
+    def query(self, event_type: Optional[str] = None, source: Optional[str] = None,
+              sic: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Eventos que cumplen todos los filtros indicados, en orden de id.
+        Recorre solo el índice más selectivo, así que el coste es O(coincidencias).
+
+        Args:
+            event_type: Tipo de evento (EventType)
+            source: Origen ("Server", "Worker-3", ...)
+            sic: Código SIC del curso
+            limit: Devolver solo los últimos `limit` eventos
+        """
+        with self._lock:
+            candidates: List[Iterable[int]] = []
+            for attr, key in (("_by_type", event_type), ("_by_source", source), ("_by_sic", sic)):
+                if key is not None:
+                    candidates.append(getattr(self, attr).get(key, ()))
+            if not candidates:
+                events = self._events[self._base:]
+            else:
+                ids = min(candidates, key=len)
+                events = [self._by_id[i] for i in ids if i in self._by_id]
+                if event_type is not None:
+                    events = [e for e in events if e.get("type") == event_type]
+                if source is not None:
+                    events = [e for e in events if e.get("source") == source]
+                if sic is not None and len(candidates) > 1:
+                    events = [e for e in events if sic in event_sics(e)]
+            return events[-limit:] if limit else list(events)
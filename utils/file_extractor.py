@@ -11,6 +11,7 @@ from utils.proxy_manager import ProxyManager
 from utils.user_agent_manager import UserAgentManager
 from utils.adaptive_delay import AdaptiveDelay
 from utils.url_cache import URLCache
+from utils.document_parser_pool import DocumentParserPool, DocumentParseError, POOLED_EXTENSIONS
 
 # Importar bibliotecas para diferentes tipos de archivos
 try:
@@ -48,13 +49,201 @@ import certifi
 
 logger = logging.getLogger(__name__)
 
+
+def extract_pdf_text(file_path: str) -> str:
+    """
+    Extrae texto de un archivo PDF usando múltiples bibliotecas.
+
+    Args:
+        file_path: Ruta al archivo PDF
+
+    Returns:
+        Texto extraído
+    """
+    text = ""
+
+    # Lista de métodos de extracción en orden de preferencia
+    extraction_methods = []
+
+    # Añadir pdfminer si está disponible (mejor calidad)
+    if HAS_PDFMINER:
+        extraction_methods.append(_extract_with_pdfminer)
+
+    # Añadir PyPDF2 si está disponible
+    if HAS_PYPDF2:
+        extraction_methods.append(_extract_with_pypdf2)
+
+    # Intentar métodos en orden hasta que uno tenga éxito
+    for method in extraction_methods:
+        try:
+            extracted_text = method(file_path)
+            if extracted_text and len(extracted_text.strip()) > 50:  # Texto significativo
+                return extracted_text
+        except Exception as e:
+            logger.warning(f"Error extrayendo texto con {method.__name__}: {str(e)}")
+
+    # Si ningún método funcionó, intentar con un enfoque más agresivo
+    try:
+        # Intentar con PyPDF2 ignorando errores
+        if HAS_PYPDF2:
+            with open(file_path, 'rb') as file:
+                reader = PyPDF2.PdfReader(file)
+                text = ""
+                for page_num in range(len(reader.pages)):
+                    try:
+                        page = reader.pages[page_num]
+                        text += page.extract_text() + "\n"
+                    except Exception:
+                        # Ignorar errores en páginas individuales
+                        continue
+
+            if text:
+                return text
+    except Exception as e:
+        logger.warning(f"Error en extracción agresiva de PDF: {str(e)}")
+
+    # Si todo falla, devolver texto vacío o mensaje de error
+    if not text:
+        logger.error(f"No se pudo extraer texto del PDF {file_path}")
+        text = "Error: No se pudo extraer texto del documento PDF."
+
+    return text
+
+def _extract_with_pdfminer(file_path: str) -> str:
+    """
+    Extrae texto de un PDF usando pdfminer.
+
+    Args:
+        file_path: Ruta al archivo PDF
+
+    Returns:
+        Texto extraído
+    """
+    return pdf_extract_text(file_path)
+
+def _extract_with_pypdf2(file_path: str) -> str:
+    """
+    Extrae texto de un PDF usando PyPDF2.
+
+    Args:
+        file_path: Ruta al archivo PDF
+
+    Returns:
+        Texto extraído
+    """
+    with open(file_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        text = ""
+        for page_num in range(len(reader.pages)):
+            page = reader.pages[page_num]
+            text += page.extract_text() + "\n"
+        return text
+
+def extract_docx_text(file_path: str) -> str:
+    """
+    Extrae texto de un archivo DOCX.
+
+    Args:
+        file_path: Ruta al archivo DOCX
+
+    Returns:
+        Texto extraído
+    """
+    if not HAS_DOCX:
+        logger.error("Biblioteca python-docx no disponible")
+        return ""
+
+    try:
+        doc = docx.Document(file_path)
+        text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+        return text
+    except Exception as e:
+        logger.error(f"Error extrayendo texto de DOCX: {str(e)}")
+        return ""
+
+def extract_xlsx_text(file_path: str) -> str:
+    """
+    Extrae texto de un archivo XLSX.
+
+    Args:
+        file_path: Ruta al archivo XLSX
+
+    Returns:
+        Texto extraído
+    """
+    if not HAS_XLSX:
+        logger.error("Biblioteca openpyxl no disponible")
+        return ""
+
+    try:
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        text = []
+
+        for sheet_name in workbook.sheetnames:
+            sheet = workbook[sheet_name]
+            text.append(f"Sheet: {sheet_name}")
+
+            for row in sheet.iter_rows(values_only=True):
+                row_text = " ".join([str(cell) if cell is not None else "" for cell in row])
+                if row_text.strip():
+                    text.append(row_text)
+
+        return "\n".join(text)
+    except Exception as e:
+        logger.error(f"Error extrayendo texto de XLSX: {str(e)}")
+        return ""
+
+def extract_pptx_text(file_path: str) -> str:
+    """
+    Extrae texto de un archivo PPTX.
+
+    Args:
+        file_path: Ruta al archivo PPTX
+
+    Returns:
+        Texto extraído
+    """
+    if not HAS_PPTX:
+        logger.error("Biblioteca python-pptx no disponible")
+        return ""
+
+    try:
+        presentation = Presentation(file_path)
+        text = []
+
+        for i, slide in enumerate(presentation.slides):
+            text.append(f"Slide {i+1}")
+            for shape in slide.shapes:
+                if hasattr(shape, "text") and shape.text:
+                    text.append(shape.text)
+
+        return "\n".join(text)
+    except Exception as e:
+        logger.error(f"Error extrayendo texto de PPTX: {str(e)}")
+        return ""
+
+
+# Parsers costosos que se ejecutan en el DocumentParserPool (deben ser funciones de módulo)
+DOCUMENT_PARSERS = {
+    '.pdf': extract_pdf_text,
+    '.docx': extract_docx_text,
+    '.xlsx': extract_xlsx_text,
+    '.pptx': extract_pptx_text,
+}
+
 class FileExtractor:
     """
     Extrae texto de diferentes tipos de archivos (PDF, DOCX, XLSX, PPTX, TXT).
     """
 
-    def __init__(self):
-        """Inicializa el extractor de archivos."""
+    def __init__(self, parser_pool: Optional[DocumentParserPool] = None):
+        """
+        Inicializa el extractor de archivos.
+
+        Args:
+            parser_pool: Pool de procesos para parsear documentos (se crea uno por defecto si no se indica)
+        """
+        self.parser_pool = parser_pool or DocumentParserPool()
         # Inicializar mimetypes
         mimetypes.init()
         
@@ -497,7 +686,7 @@ class FileExtractor:
                 # Extraer texto según el tipo de archivo
                 if ext and ext in self.extractors:
                     logger.info(f"Extrayendo texto de archivo {ext} en {url}")
-                    text = self.extractors[ext](temp_path)
+                    text = await self.parse_file(temp_path, ext)
                     
                     # Para el caso específico de Ultramicroscopes, si no hay texto o es muy corto,
                     # devolver un texto predeterminado para asegurar que pase los filtros
@@ -594,176 +783,42 @@ class FileExtractor:
             return None
     
     def _extract_pdf(self, file_path: str) -> str:
-        """
-        Extrae texto de un archivo PDF usando múltiples bibliotecas.
-        
-        Args:
-            file_path: Ruta al archivo PDF
-        
-        Returns:
-            Texto extraído
-        """
-        text = ""
-    
-        # Lista de métodos de extracción en orden de preferencia
-        extraction_methods = []
-    
-        # Añadir pdfminer si está disponible (mejor calidad)
-        if HAS_PDFMINER:
-            extraction_methods.append(self._extract_with_pdfminer)
-    
-        # Añadir PyPDF2 si está disponible
-        if HAS_PYPDF2:
-            extraction_methods.append(self._extract_with_pypdf2)
-    
-        # Intentar métodos en orden hasta que uno tenga éxito
-        for method in extraction_methods:
-            try:
-                extracted_text = method(file_path)
-                if extracted_text and len(extracted_text.strip()) > 50:  # Texto significativo
-                    return extracted_text
-            except Exception as e:
-                logger.warning(f"Error extrayendo texto con {method.__name__}: {str(e)}")
-    
-        # Si ningún método funcionó, intentar con un enfoque más agresivo
-        try:
-            # Intentar con PyPDF2 ignorando errores
-            if HAS_PYPDF2:
-                with open(file_path, 'rb') as file:
-                    reader = PyPDF2.PdfReader(file)
-                    text = ""
-                    for page_num in range(len(reader.pages)):
-                        try:
-                            page = reader.pages[page_num]
-                            text += page.extract_text() + "\n"
-                        except Exception:
-                            # Ignorar errores en páginas individuales
-                            continue
-                
-                if text:
-                    return text
-        except Exception as e:
-            logger.warning(f"Error en extracción agresiva de PDF: {str(e)}")
-    
-        # Si todo falla, devolver texto vacío o mensaje de error
-        if not text:
-            logger.error(f"No se pudo extraer texto del PDF {file_path}")
-            text = "Error: No se pudo extraer texto del documento PDF."
-    
-        return text
-
-    def _extract_with_pdfminer(self, file_path: str) -> str:
-        """
-        Extrae texto de un PDF usando pdfminer.
-        
-        Args:
-            file_path: Ruta al archivo PDF
-        
-        Returns:
-            Texto extraído
-        """
-        return pdf_extract_text(file_path)
+        """Extrae texto de un PDF de forma síncrona (ver extract_pdf_text)."""
+        return extract_pdf_text(file_path)
 
-    def _extract_with_pypdf2(self, file_path: str) -> str:
-        """
-        Extrae texto de un PDF usando PyPDF2.
-        
-        Args:
-            file_path: Ruta al archivo PDF
-        
-        Returns:
-            Texto extraído
-        """
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page_num in range(len(reader.pages)):
-                page = reader.pages[page_num]
-                text += page.extract_text() + "\n"
-            return text
-    
     def _extract_docx(self, file_path: str) -> str:
-        """
-        Extrae texto de un archivo DOCX.
-        
-        Args:
-            file_path: Ruta al archivo DOCX
-            
-        Returns:
-            Texto extraído
-        """
-        if not HAS_DOCX:
-            logger.error("Biblioteca python-docx no disponible")
-            return ""
-        
-        try:
-            doc = docx.Document(file_path)
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            return text
-        except Exception as e:
-            logger.error(f"Error extrayendo texto de DOCX: {str(e)}")
-            return ""
-    
+        """Extrae texto de un DOCX de forma síncrona (ver extract_docx_text)."""
+        return extract_docx_text(file_path)
+
     def _extract_xlsx(self, file_path: str) -> str:
-        """
-        Extrae texto de un archivo XLSX.
-        
-        Args:
-            file_path: Ruta al archivo XLSX
-            
-        Returns:
-            Texto extraído
-        """
-        if not HAS_XLSX:
-            logger.error("Biblioteca openpyxl no disponible")
-            return ""
-        
-        try:
-            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-            text = []
-            
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                text.append(f"Sheet: {sheet_name}")
-                
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = " ".join([str(cell) if cell is not None else "" for cell in row])
-                    if row_text.strip():
-                        text.append(row_text)
-            
-            return "\n".join(text)
-        except Exception as e:
-            logger.error(f"Error extrayendo texto de XLSX: {str(e)}")
-            return ""
-    
+        """Extrae texto de un XLSX de forma síncrona (ver extract_xlsx_text)."""
+        return extract_xlsx_text(file_path)
+
     def _extract_pptx(self, file_path: str) -> str:
+        """Extrae texto de un PPTX de forma síncrona (ver extract_pptx_text)."""
+        return extract_pptx_text(file_path)
+
+    async def parse_file(self, file_path: str, ext: str) -> str:
         """
-        Extrae texto de un archivo PPTX.
-        
+        Extrae texto de un archivo ya descargado sin bloquear el loop asyncio.
+
+        Los formatos costosos (PDF, DOCX, XLSX, PPTX) se parsean en el DocumentParserPool con
+        límites de tiempo y memoria; el resto se lee directamente.
+
         Args:
-            file_path: Ruta al archivo PPTX
-            
+            file_path: Ruta al archivo
+            ext: Extensión del archivo
+
         Returns:
-            Texto extraído
+            Texto extraído (cadena vacía si el parseo falla o excede los límites)
         """
-        if not HAS_PPTX:
-            logger.error("Biblioteca python-pptx no disponible")
-            return ""
-        
-        try:
-            presentation = Presentation(file_path)
-            text = []
-            
-            for i, slide in enumerate(presentation.slides):
-                text.append(f"Slide {i+1}")
-                for shape in slide.shapes:
-                    if hasattr(shape, "text") and shape.text:
-                        text.append(shape.text)
-            
-            return "\n".join(text)
-        except Exception as e:
-            logger.error(f"Error extrayendo texto de PPTX: {str(e)}")
-            return ""
+        if ext in POOLED_EXTENSIONS:
+            try:
+                return await self.parser_pool.parse(ext, file_path)
+            except DocumentParseError as e:
+                logger.warning(f"No se pudo parsear {ext} en {file_path}: {e}")
+                return ""
+        return self.extractors[ext](file_path)
     
     def _extract_txt(self, file_path: str) -> str:
         """
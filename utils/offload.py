@@ -0,0 +1,78 @@
+"""
+BlockingOffload: ejecuta fuera del loop de FastAPI el trabajo bloqueante de los handlers.
+
+- E/S (sistema de ficheros, SQLite, lecturas pequeñas con pandas): pool de hilos acotado.
+- CPU (parseo de ficheros grandes): pool de procesos, para no competir por el GIL con el loop.
+
+Cada endpoint tiene un límite de concurrencia propio: una subida grande no puede ocupar todos
+los hilos y dejar sin servicio a /api/detailed_status o /api/ping.
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BlockingOffload:
+    """
+    Pools de hilos y procesos con límites de concurrencia por endpoint.
+    """
+
+    def __init__(self, io_workers: int = 8, cpu_workers: int = 2,
+                 limits: Optional[Dict[str, int]] = None, default_limit: int = 4):
+        """
+        Args:
+            io_workers: Hilos para E/S bloqueante
+            cpu_workers: Procesos para trabajo de CPU (se crean al primer uso)
+            limits: Llamadas simultáneas máximas por endpoint
+            default_limit: Límite para endpoints sin entrada en `limits`
+        """
+        self.io_workers = max(1, io_workers)
+        self.cpu_workers = max(1, cpu_workers)
+        self.limits = dict(limits or {})
+        self.default_limit = max(1, default_limit)
+        self._io = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="offload-io")
+        self._cpu: Optional[ProcessPoolExecutor] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, endpoint: str) -> asyncio.Semaphore:
+        # Los semáforos se crean en el loop de FastAPI (único) la primera vez que se usan
+        semaphore = self._semaphores.get(endpoint)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(endpoint, self.default_limit))
+            self._semaphores[endpoint] = semaphore
+        return semaphore
+
+    def _cpu_pool(self) -> ProcessPoolExecutor:
+        if self._cpu is None:
+            self._cpu = ProcessPoolExecutor(
+                max_workers=self.cpu_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._cpu
+
+    async def run_io(self, endpoint: str, fn: Callable, *args, **kwargs) -> Any:
+        """Ejecuta `fn` en el pool de hilos respetando el límite del endpoint."""
+        async with self._semaphore(endpoint):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._io, functools.partial(fn, *args, **kwargs))
+
+    async def run_cpu(self, endpoint: str, fn: Callable, *args) -> Any:
+        """
+        Ejecuta `fn` en el pool de procesos respetando el límite del endpoint.
+        `fn` y sus argumentos deben ser serializables (funciones de módulo, no métodos).
+        """
+        async with self._semaphore(endpoint):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._cpu_pool(), fn, *args)
+
+    def shutdown(self) -> None:
+        """Cierra los pools sin esperar a las tareas pendientes."""
+        self._io.shutdown(wait=False, cancel_futures=True)
+        if self._cpu is not None:
+            self._cpu.shutdown(wait=False, cancel_futures=True)
+            self._cpu = None
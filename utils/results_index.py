@@ -0,0 +1,371 @@
+"""
+ResultsIndex: índice SQLite de los resultados guardados, con búsqueda de texto (FTS5).
+
+Cada fila que el ResultManager escribe en un CSV se copia aquí (por lotes) con su código SIC,
+curso, título, descripción, URL, idioma y los conteos de palabras clave. La tabla `results_fts`
+indexa título y descripción; los filtros por rango SIC, idioma y palabras clave usan índices
+normales y la paginación es por clave (keyset), así que pedir la página 100 cuesta lo mismo
+que pedir la primera.
+
+Los CSV siguen siendo la fuente de verdad: un fichero se indexa completo la primera vez que se
+consulta (`ensure_indexed`); las filas añadidas en vivo se ignoran al releerlo.
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import base64
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.sic_codes import sic_sort_key, sic_upper_bound
+from utils.scraper.text_processor import parse_word_counts
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULTS_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'results_index.sqlite'
+)
+
+RESULTS_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    source_file TEXT NOT NULL,
+    sic_code TEXT NOT NULL,
+    sic_sort_key TEXT NOT NULL,
+    course_name TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    url TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    total_words TEXT,
+    word_count INTEGER NOT NULL DEFAULT 0,
+    keyword_count INTEGER NOT NULL DEFAULT 0,
+    keyword_counts TEXT,
+    indexed_at REAL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_results_row ON results (source_file, url, lang, sic_code, course_name);
+CREATE INDEX IF NOT EXISTS idx_results_sic ON results (sic_sort_key, id);
+CREATE INDEX IF NOT EXISTS idx_results_lang_sic ON results (lang, sic_sort_key, id);
+CREATE INDEX IF NOT EXISTS idx_results_keywords ON results (keyword_count, id);
+CREATE INDEX IF NOT EXISTS idx_results_words ON results (word_count, id);
+CREATE INDEX IF NOT EXISTS idx_results_source ON results (source_file, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS results_fts USING fts5(
+    title, description, content='results', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS results_fts_insert AFTER INSERT ON results BEGIN
+    INSERT INTO results_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS results_fts_delete AFTER DELETE ON results BEGIN
+    INSERT INTO results_fts(results_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TABLE IF NOT EXISTS indexed_files (
+    source_file TEXT PRIMARY KEY,
+    indexed_at REAL
+);
+"""
+
+INSERT_SQL = """
+INSERT OR IGNORE INTO results (
+    source_file, sic_code, sic_sort_key, course_name, title, description, url, lang,
+    total_words, word_count, keyword_count, keyword_counts, indexed_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Columnas devueltas por query(); 'keyword_counts' se devuelve como diccionario
+QUERY_COLUMNS = [
+    'id', 'source_file', 'sic_code', 'course_name', 'title', 'description', 'url', 'lang',
+    'total_words', 'word_count', 'keyword_count', 'keyword_counts'
+]
+
+# Criterios de orden: expresión SQL y sentido por defecto (True = descendente)
+SORT_COLUMNS = {
+    'sic': ('r.sic_sort_key', False),
+    'keywords': ('r.keyword_count', True),
+    'words': ('r.word_count', True),
+    'id': ('r.id', False),
+    'relevance': ('results_fts.rank', False),
+}
+
+MAX_QUERY_LIMIT = 500
+BUSY_TIMEOUT_SECONDS = 30
+# Filas por executemany al indexar un CSV existente
+BACKFILL_BATCH_SIZE = 5000
+
+_local = threading.local()
+_initialized_dbs = set()
+_init_lock = threading.Lock()
+
+
+def _encode_cursor(value: Any, row_id: int) -> str:
+    payload = json.dumps([value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def _decode_cursor(cursor: str) -> Tuple[Any, int]:
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return value, int(row_id)
+    except Exception:
+        raise ValueError("Cursor de paginación no válido")
+
+
+class ResultsIndex:
+    """
+    Índice de resultados compartido por los workers (escriben) y el servidor (consulta).
+    """
+
+    def __init__(self, db_path: str = DEFAULT_RESULTS_INDEX_PATH, batch_rows: int = 500):
+        """
+        Args:
+            db_path: Fichero SQLite del índice
+            batch_rows: Filas en espera que provocan una escritura
+        """
+        self.db_path = db_path
+        self.batch_rows = max(1, batch_rows)
+        self._pending: List[Tuple] = []
+        with _init_lock:
+            if self.db_path not in _initialized_dbs:
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+                conn = self._connect()
+                conn.executescript(RESULTS_INDEX_SCHEMA)
+                conn.commit()
+                _initialized_dbs.add(self.db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexión persistente de este hilo (WAL y busy timeout: varios workers escriben a la vez)."""
+        connections = getattr(_local, 'connections', None)
+        if connections is None:
+            connections = _local.connections = {}
+        pid = os.getpid()
+        entry = connections.get(self.db_path)
+        if entry is not None and entry[0] == pid:
+            return entry[1]
+
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+        except sqlite3.DatabaseError as e:
+            logger.warning(f"No se pudo activar WAL en {self.db_path}: {e}")
+        conn.row_factory = sqlite3.Row
+        connections[self.db_path] = (pid, conn)
+        return conn
+
+    @staticmethod
+    def _row_values(row: Dict[str, Any], source_file: str, now: float) -> Tuple:
+        word_count, keyword_counts = parse_word_counts(row.get('total_words', ''))
+        sic_code = str(row.get('sic_code', '') or '')
+        return (
+            source_file, sic_code, sic_sort_key(sic_code), str(row.get('course_name', '') or ''),
+            row.get('title', ''), row.get('description', ''), str(row.get('url', '') or ''),
+            (row.get('lang') or 'en').lower(), str(row.get('total_words', '') or ''),
+            word_count, sum(keyword_counts.values()),
+            json.dumps(keyword_counts, ensure_ascii=False), now,
+        )
+
+    def add(self, row: Dict[str, Any], source_file: str) -> None:
+        """
+        Añade una fila de resultados (se escribe al llegar a `batch_rows` o en flush).
+
+        Args:
+            row: Fila tal como se escribe en el CSV
+            source_file: Nombre del CSV que contiene la fila
+        """
+        self._pending.append(self._row_values(row, os.path.basename(source_file), time.time()))
+        if len(self._pending) >= self.batch_rows:
+            self.flush()
+
+    def _insert(self, values: List[Tuple]) -> None:
+        conn = self._connect()
+        try:
+            conn.executemany(INSERT_SQL, values)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def flush(self) -> None:
+        """Escribe las filas en espera en una sola transacción."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            self._insert(pending)
+        except Exception as e:
+            logger.error(f"Error escribiendo {len(pending)} filas en el índice de resultados: {e}")
+
+    def is_indexed(self, source_file: str) -> bool:
+        """
+        Indica si el CSV ya tiene sus filas en el índice.
+
+        Solo index_csv marca un fichero: las filas añadidas en vivo (add) no garantizan
+        que estén todas (CSV empezados antes del índice, lotes que fallaron).
+        """
+        cursor = self._connect().execute(
+            "SELECT 1 FROM indexed_files WHERE source_file = ?", (os.path.basename(source_file),)
+        )
+        return cursor.fetchone() is not None
+
+    def index_csv(self, path: str) -> int:
+        """
+        Indexa un CSV de resultados existente (idempotente: las filas ya indexadas se ignoran).
+
+        Returns:
+            Filas leídas del fichero
+        """
+        source_file = os.path.basename(path)
+        # El idioma de los CSV antiguos sin columna 'lang' es el de su carpeta (results/ES/...)
+        folder_lang = os.path.basename(os.path.dirname(os.path.abspath(path))).lower()
+        csv.field_size_limit(sys.maxsize)
+        rows = 0
+        now = time.time()
+        batch: List[Tuple] = []
+        with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+            for row in csv.DictReader(f):
+                row['lang'] = row.get('lang') or folder_lang
+                batch.append(self._row_values(row, source_file, now))
+                rows += 1
+                if len(batch) >= BACKFILL_BATCH_SIZE:
+                    self._insert(batch)
+                    batch = []
+        if batch:
+            self._insert(batch)
+        conn = self._connect()
+        conn.execute("INSERT OR IGNORE INTO indexed_files (source_file, indexed_at) VALUES (?, ?)", (source_file, now))
+        conn.commit()
+        logger.info(f"Indexadas {rows} filas de {source_file}")
+        return rows
+
+    def ensure_indexed(self, path: str) -> None:
+        """Indexa el CSV si todavía no está en el índice."""
+        if not self.is_indexed(path):
+            self.index_csv(path)
+
+    def remove_source(self, source_file: str) -> int:
+        """Elimina del índice las filas de un CSV (al borrar el fichero). Retorna las filas borradas."""
+        source_file = os.path.basename(source_file)
+        conn = self._connect()
+        try:
+            cursor = conn.execute("DELETE FROM results WHERE source_file = ?", (source_file,))
+            conn.execute("DELETE FROM indexed_files WHERE source_file = ?", (source_file,))
+            conn.commit()
+            return cursor.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+
+    def clear(self) -> None:
+        """Vacía el índice (al limpiar la carpeta results)."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM results")
+            conn.execute("DELETE FROM indexed_files")
+            conn.execute("INSERT INTO results_fts(results_fts) VALUES ('rebuild')")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def count(self, source_file: str) -> int:
+        """Filas indexadas de un CSV."""
+        cursor = self._connect().execute(
+            "SELECT COUNT(*) FROM results WHERE source_file = ?", (os.path.basename(source_file),)
+        )
+        return cursor.fetchone()[0]
+
+    def query(self, sic_from: Optional[str] = None, sic_to: Optional[str] = None,
+              langs: Optional[Iterable[str]] = None, min_keywords: Optional[int] = None,
+              match: Optional[str] = None, source_file: Optional[str] = None,
+              sort: str = 'sic', descending: Optional[bool] = None,
+              limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Consulta el índice con filtros, búsqueda de texto, orden y paginación por clave.
+
+        Args:
+            sic_from: Código SIC inicial (incluido; orden natural de los códigos)
+            sic_to: Código SIC final (incluido)
+            langs: Idiomas admitidos ("en", "es", ...)
+            min_keywords: Mínimo de apariciones de palabras clave
+            match: Consulta FTS5 sobre título y descripción ("iron ore", "mining NOT coal")
+            source_file: Solo las filas de este CSV
+            sort: 'sic', 'keywords', 'words', 'id' o 'relevance' (requiere match)
+            descending: Sentido del orden (por defecto, el natural de cada criterio)
+            limit: Filas por página (máximo MAX_QUERY_LIMIT)
+            cursor: 'next_cursor' de la página anterior
+
+        Returns:
+            Diccionario con 'results' y 'next_cursor' (None en la última página)
+
+        Raises:
+            ValueError: Si el orden, el cursor o la consulta de texto no son válidos
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Orden no válido: {sort}. Opciones: {', '.join(SORT_COLUMNS)}")
+        if sort == 'relevance' and not match:
+            raise ValueError("El orden por relevancia requiere una búsqueda de texto")
+        sort_expr, default_desc = SORT_COLUMNS[sort]
+        if descending is None:
+            descending = default_desc
+        limit = max(1, min(int(limit), MAX_QUERY_LIMIT))
+
+        select = ", ".join(f"r.{column}" for column in QUERY_COLUMNS)
+        sql = f"SELECT {select}, {sort_expr} AS sort_value FROM results r"
+        where: List[str] = []
+        params: List[Any] = []
+
+        if match:
+            sql += " JOIN results_fts ON results_fts.rowid = r.id"
+            where.append("results_fts MATCH ?")
+            params.append(match)
+        if sic_from or sic_to:
+            if sic_from and sic_to and sic_sort_key(sic_from) > sic_sort_key(sic_to):
+                sic_from, sic_to = sic_to, sic_from
+            low = sic_sort_key(sic_from) if sic_from else ''
+            high = sic_upper_bound(sic_to) if sic_to else '\uffff'
+            where.append("r.sic_sort_key BETWEEN ? AND ?")
+            params.extend([low, high])
+        if langs:
+            langs = [lang.strip().lower() for lang in langs if lang and lang.strip()]
+            if langs:
+                where.append(f"r.lang IN ({', '.join('?' for _ in langs)})")
+                params.extend(langs)
+        if min_keywords:
+            where.append("r.keyword_count >= ?")
+            params.append(int(min_keywords))
+        if source_file:
+            where.append("r.source_file = ?")
+            params.append(os.path.basename(source_file))
+        if cursor:
+            value, row_id = _decode_cursor(cursor)
+            where.append(f"({sort_expr}, r.id) {'<' if descending else '>'} (?, ?)")
+            params.extend([value, row_id])
+
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        direction = "DESC" if descending else "ASC"
+        sql += f" ORDER BY {sort_expr} {direction}, r.id {direction} LIMIT ?"
+        params.append(limit + 1)
+
+        try:
+            rows = self._connect().execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            # Los errores de sintaxis de FTS5 llegan como OperationalError con mensajes variados
+            if match and 'locked' not in str(e):
+                raise ValueError(f"Búsqueda de texto no válida: {e}")
+            raise
+
+        results = []
+        for row in rows[:limit]:
+            item = {column: row[column] for column in QUERY_COLUMNS}
+            item['keyword_counts'] = json.loads(item['keyword_counts'] or '{}')
+            results.append(item)
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = _encode_cursor(last['sort_value'], last['id'])
+        return {"results": results, "next_cursor": next_cursor}
@@ -0,0 +1,247 @@
+"""
+ResultsManifest: índice compartido de los ficheros de resultados con conteo de líneas incremental.
+
+Para cada fichero se guarda (tamaño, mtime, inodo, líneas, offset del último salto de línea).
+Cuando un CSV crece solo se leen los bytes añadidos; si se trunca o se reemplaza se vuelve a
+contar entero. Con watchdog instalado los cambios llegan por notificaciones del sistema de
+ficheros y solo se revisan las rutas afectadas; sin watchdog se hace un barrido por stat
+(sin leer contenido) como mucho cada `poll_interval` segundos.
+"""
+
+import os
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+    FileSystemEventHandler = object
+
+logger = logging.getLogger(__name__)
+
+TRACKED_EXTENSIONS = (".csv", ".xlsx")
+COUNT_CHUNK_SIZE = 1024 * 1024
+
+
+class _FileEntry:
+    __slots__ = ("size", "mtime", "ino", "newlines", "last_newline")
+
+    def __init__(self):
+        self.size = 0
+        self.mtime = 0.0
+        self.ino = 0
+        self.newlines = 0
+        self.last_newline = -1
+
+    @property
+    def line_count(self) -> int:
+        """Líneas de texto (como `sum(1 for _ in f)`): la última cuenta aunque no termine en salto."""
+        return self.newlines + (1 if self.size > self.last_newline + 1 else 0)
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Marca como pendientes las rutas notificadas por watchdog."""
+
+    def __init__(self, manifest: "ResultsManifest"):
+        self.manifest = manifest
+
+    def on_any_event(self, event):
+        self.manifest._mark_dirty(event.src_path, event.is_directory)
+        dest = getattr(event, "dest_path", None)
+        if dest:
+            self.manifest._mark_dirty(dest, event.is_directory)
+
+
+class ResultsManifest:
+    """
+    Índice de los ficheros de resultados bajo un directorio (recursivo).
+    """
+
+    def __init__(self, root: str, poll_interval: float = 2.0, rescan_interval: float = 60.0):
+        """
+        Args:
+            root: Carpeta de resultados
+            poll_interval: Sin watchdog, segundos mínimos entre barridos por stat
+            rescan_interval: Con watchdog, barrido de seguridad (eventos perdidos, carpeta creada después)
+        """
+        self.root = os.path.abspath(root)
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self._entries: Dict[str, _FileEntry] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._last_scan = 0.0
+        self._observer = None
+
+    def start(self) -> None:
+        """Arranca el observador de watchdog si está disponible y hace el primer barrido."""
+        if HAS_WATCHDOG and self._observer is None and os.path.isdir(self.root):
+            try:
+                observer = Observer()
+                observer.schedule(_ChangeHandler(self), self.root, recursive=True)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+                logger.info(f"ResultsManifest: observando cambios en {self.root}")
+            except Exception as e:
+                logger.warning(f"ResultsManifest: watchdog no disponible para {self.root} ({e}); se usará stat")
+        self.refresh(force=True)
+
+    def stop(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def _mark_dirty(self, path: str, is_directory: bool = False) -> None:
+        with self._lock:
+            # Un cambio en un directorio (creación, borrado, renombrado) obliga a releer su listado
+            self._dirty.add(("dir" if is_directory else "file", os.path.abspath(path)))
+
+    # --- Actualización ---
+
+    def refresh(self, force: bool = False) -> None:
+        """Aplica los cambios pendientes (notificados o detectados por stat)."""
+        with self._lock:
+            now = time.monotonic()
+            interval = self.rescan_interval if self._observer is not None else self.poll_interval
+            if force or now - self._last_scan >= interval:
+                self._scan()
+                self._dirty.clear()
+                self._last_scan = now
+                return
+            dirty, self._dirty = self._dirty, set()
+            for kind, path in dirty:
+                if kind == "dir" or os.path.isdir(path):
+                    self._scan(path)
+                else:
+                    self._update(path)
+
+    def _scan(self, top: Optional[str] = None) -> None:
+        """Recorre `top` (o la raíz) por stat y actualiza las entradas que cambiaron."""
+        top = top or self.root
+        seen = set()
+        for dirpath, _, filenames in os.walk(top):
+            for name in filenames:
+                if name.lower().endswith(TRACKED_EXTENSIONS):
+                    path = os.path.join(dirpath, name)
+                    seen.add(path)
+                    self._update(path)
+        prefix = top.rstrip(os.sep) + os.sep
+        for path in [p for p in self._entries if p.startswith(prefix) and p not in seen]:
+            del self._entries[path]
+
+    def _update(self, path: str) -> None:
+        """Actualiza una entrada: conteo incremental si el fichero solo creció."""
+        if not path.lower().endswith(TRACKED_EXTENSIONS):
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._entries.pop(path, None)
+            return
+        entry = self._entries.get(path)
+        if entry is not None and entry.size == st.st_size and entry.mtime == st.st_mtime and entry.ino == st.st_ino:
+            return
+        if not path.lower().endswith(".csv"):
+            entry = entry or _FileEntry()
+        elif entry is not None and entry.ino == st.st_ino and st.st_size >= entry.size and self._prefix_intact(path, entry):
+            self._count(path, entry, entry.size)
+        else:
+            entry = _FileEntry()
+            self._count(path, entry, 0)
+        entry.size, entry.mtime, entry.ino = st.st_size, st.st_mtime, st.st_ino
+        self._entries[path] = entry
+
+    @staticmethod
+    def _prefix_intact(path: str, entry: _FileEntry) -> bool:
+        """Comprueba que el último salto de línea contado sigue en su sitio (no hubo reescritura)."""
+        if entry.last_newline < 0:
+            return True
+        try:
+            with open(path, "rb") as f:
+                f.seek(entry.last_newline)
+                return f.read(1) == b"\n"
+        except OSError:
+            return False
+
+    @staticmethod
+    def _count(path: str, entry: _FileEntry, offset: int) -> None:
+        """Cuenta los saltos de línea a partir de `offset` y actualiza la entrada."""
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                pos = offset
+                while True:
+                    chunk = f.read(COUNT_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    n = chunk.count(b"\n")
+                    if n:
+                        entry.newlines += n
+                        entry.last_newline = pos + chunk.rfind(b"\n")
+                    pos += len(chunk)
+        except OSError as e:
+            logger.debug(f"ResultsManifest: error contando {path}: {e}")
+
+    # --- Consultas ---
+
+    def _describe(self, path: str, entry: _FileEntry) -> Dict[str, Any]:
+        line_count = entry.line_count if path.lower().endswith(".csv") else 0
+        return {
+            "path": path,
+            "name": os.path.basename(path),
+            "relpath": os.path.relpath(path, self.root).replace("\\", "/"),
+            "size": entry.size,
+            "mtime": entry.mtime,
+            "line_count": line_count,
+            # Filas de datos (sin cabecera)
+            "row_count": max(0, line_count - 1),
+        }
+
+    def files(self, recursive: bool = True, extensions=TRACKED_EXTENSIONS) -> List[Dict[str, Any]]:
+        """
+        Ficheros conocidos con tamaño, mtime y conteos (aplicando antes los cambios pendientes).
+
+        Args:
+            recursive: False para limitarse a los ficheros directamente bajo la raíz
+            extensions: Extensiones a incluir
+        """
+        self.refresh()
+        with self._lock:
+            result = []
+            for path, entry in self._entries.items():
+                if not path.lower().endswith(extensions):
+                    continue
+                if not recursive and os.path.dirname(path) != self.root:
+                    continue
+                result.append(self._describe(path, entry))
+            return result
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """Entrada de un fichero concreto (se actualiza al momento si cambió)."""
+        path = os.path.abspath(path)
+        with self._lock:
+            self._update(path)
+            entry = self._entries.get(path)
+            return self._describe(path, entry) if entry is not None else None
+
+
+_manifests: Dict[str, ResultsManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_results_manifest(root: str) -> ResultsManifest:
+    """Retorna el manifiesto compartido (por proceso) de una carpeta de resultados, arrancándolo si es nuevo."""
+    root = os.path.abspath(root)
+    with _manifests_lock:
+        manifest = _manifests.get(root)
+        if manifest is None:
+            manifest = ResultsManifest(root)
+            _manifests[root] = manifest
+            manifest.start()
+        return manifest
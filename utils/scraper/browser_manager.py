@@ -5,6 +5,8 @@ from typing import Optional, Dict, Any
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 import random
 import sys
+import time
+from urllib.parse import urlparse
 
 from utils.user_agent_manager import UserAgentManager
 from utils.captcha_solver import CaptchaSolver
@@ -13,14 +15,38 @@ import random
 
 logger = logging.getLogger(__name__)
 
+# Tipos de recurso que el perfil "lean" no descarga (no aportan texto a la extracción)
+LEAN_BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+# Dominios de analítica/publicidad que el perfil "lean" bloquea (incluye subdominios)
+LEAN_BLOCKED_TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "adservice.google.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "clarity.ms",
+    "bat.bing.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "analytics.twitter.com",
+    "ads-twitter.com",
+    "webanalytics.europa.eu",
+)
+
 class BrowserManager:
   """
   Gestiona una instancia global y única del navegador para el scraping.
   """
   
-  def __init__(self, config_manager: Config, server_state: Any, gui_instance=None):
+  def __init__(self, config_manager: Config, server_state: Any, gui_instance=None, worker_id: Optional[int] = None):
       """Inicializa el gestor de navegadores."""
       self.config = config_manager
+      self.worker_id = worker_id
       self.gui = gui_instance
       self.browser = None
       self.context = None
@@ -32,8 +58,56 @@ class BrowserManager:
       self.max_pool_size = 5
       self.is_initialized = False
       self._lock = asyncio.Lock()
+      # Perfil de navegación: "lean" bloquea imágenes, fuentes, media y trackers; "full" lo carga todo
+      self.browser_profile = str(self.config.get("browser_profile", "lean")).lower()
+      self.har_path = None
+      self.blocked_requests = 0
       logger.debug(f"BrowserManager instance created: {id(self)}")
 
+  def _get_har_options(self) -> Dict[str, Any]:
+      """
+      Construye las opciones de captura de red (HAR) para el contexto.
+
+      La captura es un modo de diagnóstico opcional (config "network_capture"). Cada worker
+      escribe en su propio fichero para no compartir un único HAR en el directorio de trabajo.
+
+      Returns:
+          Diccionario de argumentos record_har_* para new_context (vacío si está deshabilitada).
+      """
+      if not self.config.get("network_capture", False):
+          return {}
+
+      capture_dir = os.path.join(self.config.get("log_dir", "logs"), "network")
+      os.makedirs(capture_dir, exist_ok=True)
+      owner = f"worker_{self.worker_id}" if self.worker_id is not None else f"pid_{os.getpid()}"
+      self.har_path = os.path.join(capture_dir, f"network_trace_{owner}_{int(time.time())}.zip")
+
+      options = {
+          "record_har_path": self.har_path,
+          # "minimal" y sin cuerpos por defecto: "full"/"embed" solo para depuración puntual
+          "record_har_mode": self.config.get("network_capture_mode", "minimal"),
+          "record_har_content": self.config.get("network_capture_content", "omit"),
+      }
+      logger.info(f"Captura de red habilitada: {self.har_path} (mode={options['record_har_mode']}, content={options['record_har_content']})")
+      return options
+
+  @staticmethod
+  def _is_tracker(url: str) -> bool:
+      """Indica si la URL pertenece a un dominio de analítica o publicidad conocido."""
+      host = (urlparse(url).hostname or "").lower()
+      return any(host == domain or host.endswith("." + domain) for domain in LEAN_BLOCKED_TRACKER_DOMAINS)
+
+  async def _lean_route_handler(self, route):
+      """Aborta las peticiones que el perfil "lean" no necesita y deja pasar el resto."""
+      request = route.request
+      url = request.url
+      # Las imágenes de CAPTCHA se siguen cargando para poder resolverlas
+      if (request.resource_type in LEAN_BLOCKED_RESOURCE_TYPES and "captcha" not in url.lower()) or self._is_tracker(url):
+          self.blocked_requests += 1
+          await route.abort()
+      else:
+          await route.continue_()
+
   async def navigate_and_handle_captcha(self, page: Page, url: str) -> bool:
       """
       Navega a una URL y maneja cualquier CAPTCHA que aparezca.
@@ -397,6 +471,18 @@ class BrowserManager:
                   except Exception:
                       pass
               self.page_pool = []
+
+              # Cerrar el contexto explícitamente para que se vuelque el HAR (si hay captura)
+              if self.context:
+                  try:
+                      await self.context.close()
+                  except Exception:
+                      pass
+                  self.context = None
+                  if self.har_path:
+                      logger.info(f"Captura de red guardada en {self.har_path}")
+              if self.blocked_requests:
+                  logger.info(f"Perfil 'lean': {self.blocked_requests} peticiones bloqueadas")
               
               # Close browser
               if self.browser:
@@ -552,9 +638,13 @@ class BrowserManager:
                   timezone_id=selected_timezone,
                   geolocation=selected_location,
                   permissions=['geolocation'],
-                  record_har_path="network_trace.zip",
-                  record_har_mode="full"
+                  **self._get_har_options()
               )
+
+              if self.browser_profile == "lean":
+                  # Se registra en el contexto para que aplique a todas las páginas, incluidas las del pool
+                  await self.context.route("**/*", self._lean_route_handler)
+                  logger.info("Perfil de navegación 'lean': bloqueando imágenes, fuentes, media y trackers")
               
               self.is_initialized = True
               logger.info("Browser initialized successfully with stealth enhancements.")
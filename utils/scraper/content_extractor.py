@@ -9,11 +9,12 @@ import time
 import random
 import os
 import tempfile
-import socket
 
 from utils.scraper.browser_manager import BrowserManager
 from utils.file_extractor import FileExtractor
+from utils.document_parser_pool import DocumentParserPool
 from utils.url_cache import URLCache
+from utils.scraper.http_session_pool import HttpSessionPool
 
 logger = logging.getLogger(__name__)
 
@@ -22,15 +23,18 @@ class ContentExtractor:
     Extrae contenido de páginas web y archivos.
     """
 
-    def __init__(self, browser_manager):
+    def __init__(self, browser_manager, http_pool: Optional[HttpSessionPool] = None, parser_pool: Optional[DocumentParserPool] = None):
         """
         Inicializa el extractor de contenido.
         
         Args:
             browser_manager: Instancia de BrowserManager para navegar por páginas web
+            http_pool: Pool HTTP compartido del worker (se crea uno propio si no se indica)
+            parser_pool: Pool de procesos para parsear documentos (se crea uno propio si no se indica)
         """
         self.browser_manager = browser_manager
-        self.file_extractor = FileExtractor()
+        self.http_pool = http_pool or HttpSessionPool()
+        self.file_extractor = FileExtractor(parser_pool=parser_pool)
         self.url_cache = URLCache()  # Añadir sistema de caché
         
         # Cache for extracted content
@@ -145,28 +149,25 @@ class ContentExtractor:
                 }
 
                 timeout = aiohttp.ClientTimeout(total=30)
-                # Configurar resolver DNS personalizado para evitar problemas en WSL
-                resolver = aiohttp.AsyncResolver(nameservers=["8.8.8.8", "1.1.1.1"])
-                connector = aiohttp.TCPConnector(resolver=resolver, family=socket.AF_INET, ssl=False)
-                async with aiohttp.ClientSession(headers=headers, timeout=timeout, connector=connector) as session:
-                    async with session.get(url, timeout=30, ssl=False, allow_redirects=True) as response:
-                        if response.status != 200:
-                            self.log_error("AIOHTTP_STATUS_ERROR", f"Returned status {response.status}", url)
-                            return None
-                        content_type = response.headers.get('Content-Type', '').lower()
+                session = await self.http_pool.get_session()
+                async with session.get(url, headers=headers, timeout=timeout, ssl=False, allow_redirects=True) as response:
+                    if response.status != 200:
+                        self.log_error("AIOHTTP_STATUS_ERROR", f"Returned status {response.status}", url)
+                        return None
+                    content_type = response.headers.get('Content-Type', '').lower()
 
-                        if 'text/html' in content_type or 'application/xhtml+xml' in content_type:
-                            html = await response.text()
-                            text = re.sub(r'<script.*?</script>', ' ', html, flags=re.DOTALL)
-                            text = re.sub(r'<style.*?</style>', ' ', text, flags=re.DOTALL)
-                            text = re.sub(r'<[^>]+>', ' ', text)
-                            text = re.sub(r'\s+', ' ', text).strip()
-                            return text
-                        elif any(mime in content_type for mime in ['pdf', 'msword', 'officedocument', 'text/plain']):
-                            return await self.file_extractor.extract_text_from_url(url)
-                        else:
-                            self.log_error("AIOHTTP_CONTENT_TYPE_ERROR", f"Unsupported content type: {content_type}", url)
-                            return None
+                    if 'text/html' in content_type or 'application/xhtml+xml' in content_type:
+                        html = await response.text()
+                        text = re.sub(r'<script.*?</script>', ' ', html, flags=re.DOTALL)
+                        text = re.sub(r'<style.*?</style>', ' ', text, flags=re.DOTALL)
+                        text = re.sub(r'<[^>]+>', ' ', text)
+                        text = re.sub(r'\s+', ' ', text).strip()
+                        return text
+                    elif any(mime in content_type for mime in ['pdf', 'msword', 'officedocument', 'text/plain']):
+                        return await self.file_extractor.extract_text_from_url(url)
+                    else:
+                        self.log_error("AIOHTTP_CONTENT_TYPE_ERROR", f"Unsupported content type: {content_type}", url)
+                        return None
             except aiohttp.ClientConnectorError as e:
                 wait_time = 2 ** (attempt + 1)
                 self.log_error("AIOHTTP_EXTRACTION_ERROR", f"Connection error (attempt {attempt + 1}/{max_retries}): {e}. Retrying in {wait_time}s...", url, exc_info=False)
@@ -363,7 +364,7 @@ class ContentExtractor:
             if url.lower().endswith('.pdf'):
                 temp_path, _ = await self.file_extractor.download_file(url)
                 if temp_path:
-                    pdf_text = self.file_extractor._extract_pdf(temp_path)
+                    pdf_text = await self.file_extractor.parse_file(temp_path, '.pdf')
                     if os.path.exists(temp_path):
                         os.unlink(temp_path)
                     return pdf_text
@@ -491,21 +492,21 @@ class ContentExtractor:
                 if retry_count == 0:
                     logger.info(f"Trying alternative download method for {url}")
                     try:
-                        async with aiohttp.ClientSession() as session:
-                            async with session.get(url, timeout=30, ssl=False) as response:
-                                if response.status == 200:
-                                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-                                    temp_path = temp_file.name
-                                    temp_file.close()
-                                    buffer = await response.read()
-                                    with open(temp_path, 'wb') as f:
-                                        f.write(buffer)
-                                    pdf_text = self.file_extractor._extract_pdf(temp_path)
-                                    if os.path.exists(temp_path):
-                                        os.unlink(temp_path)
-                                    if pdf_text:
-                                        logger.info(f"Content extracted using alternative method: {len(pdf_text)} characters")
-                                        return pdf_text
+                        session = await self.http_pool.get_session()
+                        async with session.get(url, timeout=aiohttp.ClientTimeout(total=30), ssl=False) as response:
+                            if response.status == 200:
+                                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+                                temp_path = temp_file.name
+                                temp_file.close()
+                                buffer = await response.read()
+                                with open(temp_path, 'wb') as f:
+                                    f.write(buffer)
+                                pdf_text = await self.file_extractor.parse_file(temp_path, '.pdf')
+                                if os.path.exists(temp_path):
+                                    os.unlink(temp_path)
+                                if pdf_text:
+                                    logger.info(f"Content extracted using alternative method: {len(pdf_text)} characters")
+                                    return pdf_text
                     except Exception as alt_e:
                         self.log_error("FILE_DOWNLOAD_ERROR", f"Alternative download method failed: {alt_e}", url)
                 
@@ -635,7 +636,7 @@ class ContentExtractor:
             temp_file.close()
             with open(temp_path, 'wb') as f:
                 f.write(buffer)
-            pdf_text = self.file_extractor._extract_pdf(temp_path)
+            pdf_text = await self.file_extractor.parse_file(temp_path, '.pdf')
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
             return pdf_text
@@ -652,22 +653,20 @@ class ContentExtractor:
             'Accept-Language': 'en-US,en;q=0.9',
             'Referer': urlparse(url).scheme + '://' + urlparse(url).netloc + '/',
         }
-        resolver = aiohttp.AsyncResolver(nameservers=["8.8.8.8", "1.1.1.1"])
-        connector = aiohttp.TCPConnector(resolver=resolver, family=socket.AF_INET, ssl=False)
-        async with aiohttp.ClientSession(connector=connector) as session:
-            async with session.get(url, headers=headers, timeout=30, ssl=False) as response:
-                if response.status != 200:
-                    self.log_error("PDF_DOWNLOAD_AIOHTTP_ERROR", f"Respuesta no válida: {response.status}", url)
-                    return ""
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-                temp_path = temp_file.name
-                temp_file.close()
-                with open(temp_path, 'wb') as f:
-                    f.write(await response.read())
-                pdf_text = self.file_extractor._extract_pdf(temp_path)
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-                return pdf_text
+        session = await self.http_pool.get_session()
+        async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=30), ssl=False) as response:
+            if response.status != 200:
+                self.log_error("PDF_DOWNLOAD_AIOHTTP_ERROR", f"Respuesta no válida: {response.status}", url)
+                return ""
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+            temp_path = temp_file.name
+            temp_file.close()
+            with open(temp_path, 'wb') as f:
+                f.write(await response.read())
+            pdf_text = await self.file_extractor.parse_file(temp_path, '.pdf')
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            return pdf_text
 
     async def _download_pdf_with_curl_like(self, url: str) -> str:
         """
@@ -689,25 +688,23 @@ class ContentExtractor:
             'Cache-Control': 'no-cache',
         }
         timeout = aiohttp.ClientTimeout(total=60)
-        resolver = aiohttp.AsyncResolver(nameservers=["8.8.8.8", "1.1.1.1"])
-        connector = aiohttp.TCPConnector(resolver=resolver, family=socket.AF_INET, ssl=False)
-        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
-            try:
-                async with session.get(url, headers=headers, ssl=False, allow_redirects=True) as response:
-                    if response.status != 200:
-                        self.log_error("PDF_DOWNLOAD_CURL_ERROR", f"Respuesta no válida: {response.status}", url)
-                        return ""
-                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-                    temp_path = temp_file.name
-                    temp_file.close()
-                    chunk_size = 1024
-                    with open(temp_path, 'wb') as fd:
-                        async for chunk in response.content.iter_chunked(chunk_size):
-                            fd.write(chunk)
-                    pdf_text = self.file_extractor._extract_pdf(temp_path)
-                    if os.path.exists(temp_path):
-                        os.unlink(temp_path)
-                    return pdf_text
-            except Exception as e:
-                self.log_error("PDF_DOWNLOAD_CURL_FATAL_ERROR", f"Error en descarga tipo curl: {e}", url, exc_info=True)
-                return ""
\ No newline at end of file
+        session = await self.http_pool.get_session()
+        try:
+            async with session.get(url, headers=headers, timeout=timeout, ssl=False, allow_redirects=True) as response:
+                if response.status != 200:
+                    self.log_error("PDF_DOWNLOAD_CURL_ERROR", f"Respuesta no válida: {response.status}", url)
+                    return ""
+                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+                temp_path = temp_file.name
+                temp_file.close()
+                chunk_size = 1024
+                with open(temp_path, 'wb') as fd:
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        fd.write(chunk)
+                pdf_text = await self.file_extractor.parse_file(temp_path, '.pdf')
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                return pdf_text
+        except Exception as e:
+            self.log_error("PDF_DOWNLOAD_CURL_FATAL_ERROR", f"Error en descarga tipo curl: {e}", url, exc_info=True)
+            return ""
\ No newline at end of file
@@ -1,8 +1,15 @@
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional
+import json
+import math
+import random
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from urllib.parse import quote_plus
 
+import aiohttp
+
+from utils.scraper.cordis_page_cache import CordisPageCache
+
 logger = logging.getLogger(__name__)
 
 class CordisApiClient:
@@ -18,14 +25,257 @@ class CordisApiClient:
     """
 
     SEARCH_URL = "https://cordis.europa.eu/search"
+    RESULTS_PER_PAGE = 100  # Max allowed
+    MAX_PAGES = 1000  # Safety: max 1000 pages
+    PAGE_DELAY = 0.3  # Be nice to server - seconds between requests
+    MAX_RETRIES = 5
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, page_concurrency: int = 1, page_cache: Optional[CordisPageCache] = None):
+        """
+        Args:
+            api_key: Clave opcional para la API DET de Cordis.
+            page_concurrency: Número máximo de páginas en vuelo a la vez. Con 1 se
+                mantiene el recorrido secuencial; con un valor mayor, una vez conocido
+                totalHits se planifican las páginas restantes y se descargan en paralelo.
+            page_cache: Caché persistente opcional de páginas, compartida entre workers.
+        """
         self.api_key = api_key
+        self.page_concurrency = max(1, int(page_concurrency or 1))
+        self.page_cache = page_cache
         self.headers = {
             'Accept': 'application/json',
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept-Language': 'en-US,en;q=0.9',
         }
+        # Cliente HTTP asíncrono compartido (se crea bajo demanda en el loop del worker)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        # Páginas planificadas que no se entregaron (error o paginación cortada), acumulado por worker
+        self.missed_pages = 0
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Retorna la sesión aiohttp compartida, creándola si no existe para el loop actual."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit_per_host=self.page_concurrency, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=90),
+                connector=connector,
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """Cierra la sesión HTTP compartida y la conexión a la caché."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+        if self.page_cache is not None:
+            self.page_cache.close()
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """Retorna los contadores de aciertos/fallos de la caché de páginas."""
+        if self.page_cache is None:
+            return {'cordis_cache_hits': 0, 'cordis_cache_misses': 0}
+        return self.page_cache.get_stats()
+
+    def get_page_stats(self) -> Dict[str, int]:
+        """Retorna el contador de páginas de Cordis que no se pudieron entregar."""
+        return {'cordis_pages_missed': self.missed_pages}
+
+    def _planned_pages(self, total_hits: int, max_results: int) -> int:
+        """Páginas necesarias para recoger min(totalHits, max_results) documentos."""
+        return min(math.ceil(min(total_hits, max_results) / self.RESULTS_PER_PAGE), self.MAX_PAGES)
+
+    def _build_search_url(self, encoded_query: str, page: int) -> str:
+        # Build URL: https://cordis.europa.eu/search?q=QUERY&format=json&p=PAGE&num=100
+        return f"{self.SEARCH_URL}?q={encoded_query}&format=json&p={page}&num={self.RESULTS_PER_PAGE}"
+
+    async def _fetch_page_data(self, encoded_query: str, page: int) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Obtiene una página de resultados, primero de la caché persistente y si no,
+        de la red aplicando backoff exponencial ante 429/5xx.
+        
+        Returns:
+            Tupla (JSON decodificado de la página o None si no se pudo obtener,
+            True si la página salió de la caché sin tocar la red)
+        """
+        if self.page_cache is not None:
+            # SQLite bloqueante: fuera del loop para no frenar la tabulación del worker
+            cached_body = await asyncio.to_thread(self.page_cache.get, encoded_query, page, self.RESULTS_PER_PAGE)
+            if cached_body is not None:
+                try:
+                    logger.info(f"V27 - Page {page}: servida desde caché")
+                    return json.loads(cached_body), True
+                except Exception as e:
+                    logger.warning(f"V27 - Página {page} en caché corrupta, se descarga de nuevo: {e}")
+
+        search_url = self._build_search_url(encoded_query, page)
+        logger.info(f"V27 - Fetching page {page}: {search_url}")
+
+        if self.page_concurrency > 1:
+            session = await self._get_session()
+
+            async def _fetch():
+                async with session.get(search_url) as resp:
+                    body = await resp.read()
+                    return resp.status, body
+        else:
+            loop = asyncio.get_running_loop()
+
+            async def _fetch():
+                def _get():
+                    import requests
+                    return requests.get(search_url, headers=self.headers, timeout=90)
+                response = await loop.run_in_executor(None, _get)
+                return response.status_code, response.content
+
+        retry_count = 0
+        status_code = None
+        body = None
+
+        while retry_count <= self.MAX_RETRIES:
+            status_code, body = await _fetch()
+            if status_code == 429:
+                wait_time = (2 ** retry_count) + random.uniform(0.5, 2.0)
+                logger.warning(f"V27 - Rate limited (429) on page {page}. Retrying in {wait_time:.2f}s... (Attempt {retry_count + 1}/{self.MAX_RETRIES + 1})")
+                await asyncio.sleep(wait_time)
+                retry_count += 1
+            elif status_code >= 500:
+                wait_time = (2 ** retry_count) + random.uniform(1.0, 3.0)
+                logger.warning(f"V27 - Server error ({status_code}) on page {page}. Retrying in {wait_time:.2f}s...")
+                await asyncio.sleep(wait_time)
+                retry_count += 1
+            else:
+                break
+
+        if status_code != 200:
+            logger.error(f"V27 - Error fetching page {page}: Status {status_code or 'Unknown'} after {retry_count} retries")
+            return None, False
+
+        try:
+            data = json.loads(body)
+        except Exception as e:
+            logger.error(f"V27 - JSON parse error on page {page}: {e}")
+            return None, False
+
+        if self.page_cache is not None:
+            await asyncio.to_thread(self.page_cache.put, encoded_query, page, self.RESULTS_PER_PAGE, body)
+        return data, False
+
+    @staticmethod
+    def _extract_hits(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Extrae la lista de hits de una respuesta JSON de Cordis."""
+        hits = []
+        
+        # Structure 1 (ACTUAL CORDIS STRUCTURE): data['hits'] direct list
+        if 'hits' in data and isinstance(data['hits'], list):
+            hits = data['hits']
+        # Structure 2: data['hits'] as dict with 'hit' key
+        elif 'hits' in data and isinstance(data['hits'], dict):
+            hits = data['hits'].get('hit', [])
+        # Structure 3: result.hits (legacy fallback)
+        elif 'result' in data and 'hits' in data['result']:
+            result_hits = data['result']['hits']
+            if isinstance(result_hits, dict) and 'hit' in result_hits:
+                hits = result_hits['hit']
+            elif isinstance(result_hits, list):
+                hits = result_hits
+        
+        # Ensure hits is a list
+        if isinstance(hits, dict):
+            hits = [hits]
+        elif not isinstance(hits, list):
+            hits = []
+        return hits
+
+    @staticmethod
+    def _build_entries(hits: List[Dict[str, Any]], encoded_query: str) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Convierte los hits de una página en entradas de resultado (una por documento, con
+        la lista de idiomas disponibles en 'langs').
+        
+        Returns:
+            Tupla (entradas, documentos únicos en la página)
+        """
+        entries = []
+        page_count = 0
+        for hit in hits:
+            # Each hit contains various content types: article, project, result, etc.
+            # We need to extract from whichever is present
+            content = None
+            content_type = 'unknown'
+            
+            # Check for different content types
+            for ctype in ['article', 'project', 'result', 'publication', 'event']:
+                if ctype in hit:
+                    content = hit[ctype]
+                    content_type = ctype
+                    break
+            
+            if not content:
+                continue
+            
+            # Extract fields
+            rcn = content.get('rcn', '')
+            item_id = content.get('id', rcn)
+            title = content.get('title', content.get('acronym', 'No Title'))
+            teaser = content.get('teaser', content.get('objective', ''))
+            
+            # Build URL based on content type
+            if content_type == 'project':
+                url = f"https://cordis.europa.eu/project/id/{item_id}"
+            elif content_type == 'article':
+                url = f"https://cordis.europa.eu/article/id/{item_id}"
+            elif content_type == 'result':
+                url = f"https://cordis.europa.eu/result/id/{item_id}"
+            elif content_type == 'publication':
+                url = f"https://cordis.europa.eu/publication/id/{item_id}"
+            else:
+                url = f"https://cordis.europa.eu/search?q={encoded_query}"
+            
+            # Capture main language
+            main_lang = content.get('language', 'en')
+            
+            # Get available languages if present
+            available_langs = content.get('availableLanguages', '')
+            if isinstance(available_langs, str):
+                # Format: "en,es,fr"
+                langs_list = [l.strip().lower() for l in available_langs.split(',') if l.strip()]
+            elif isinstance(available_langs, list):
+                langs_list = [str(l).lower() for l in available_langs]
+            else:
+                langs_list = [main_lang.lower()]
+            
+            # If empty or missing, fallback to main_lang
+            if not langs_list:
+                langs_list = [main_lang.lower()]
+            
+            # Ensure main_lang is in the list
+            if main_lang.lower() not in langs_list:
+                langs_list.append(main_lang.lower())
+            
+            # One canonical entry per document; the CSV of each language is written at save time
+            entries.append({
+                'url': url,
+                'title': title,
+                'description': teaser[:1000] if teaser else f"Cordis {content_type}: {title}",
+                'source': 'Cordis Europa JSON V27',
+                'mediatype': content_type,
+                'rcn': rcn,
+                'lang': main_lang.lower(),
+                'langs': langs_list
+            })
+            page_count += 1
+        return entries, page_count
+
+    @staticmethod
+    def _read_total_hits(data: Dict[str, Any]) -> int:
+        header = data.get('result', {}).get('header', {})
+        total_hits_str = header.get('totalHits', '0')
+        return int(total_hits_str) if total_hits_str else 0
     
     async def search_projects_and_publications(self, query_term: str, search_mode: str = 'broad', max_results: int = 50000, progress_callback=None) -> List[Dict[str, Any]]:
         """
@@ -33,69 +283,64 @@ class CordisApiClient:
         
         1. First request gets totalHits
         2. Paginates through ALL pages to collect every result
-        3. Returns complete list for tabulation
+           (sequentially, or through a bounded concurrent window when page_concurrency > 1)
+        3. Returns complete list for tabulation, in page order
+        """
+        all_results = []
+        async for entries in self.iter_projects_and_publications(query_term, search_mode, max_results, progress_callback):
+            all_results.extend(entries)
+        return all_results
+
+    async def iter_projects_and_publications(self, query_term: str, search_mode: str = 'broad', max_results: int = 50000, progress_callback=None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Same search as search_projects_and_publications, but yields the entries of each page
+        (in page order) as soon as it is available, so tabulation can start on the first page
+        while the rest are still being fetched.
         """
         logger.info(f"*** V27 ACTIVADA ***: Iniciando búsqueda JSON en Cordis para '{query_term}'")
         
-        all_results = []
+        encoded_query = quote_plus(query_term)
+        docs_collected = 0
+        missed_before = self.missed_pages
+
+        if self.page_concurrency > 1:
+            pages = self._search_concurrent(encoded_query, max_results, progress_callback)
+        else:
+            pages = self._search_sequential(encoded_query, max_results, progress_callback)
+        try:
+            async for entries in pages:
+                docs_collected += len(entries)
+                yield entries
+        finally:
+            # Si el consumidor deja de leer, cerrar también la paginación (y sus descargas en vuelo)
+            await pages.aclose()
+        
+        missed = self.missed_pages - missed_before
+        if missed:
+            logger.warning(f"V27 - {missed} páginas de Cordis sin descargar para '{query_term}': los resultados están incompletos")
+        logger.info(f"*** V27 COMPLETADO ***: Recopilados {docs_collected} documentos de Cordis")
+
+    async def _search_sequential(self, encoded_query: str, max_results: int, progress_callback=None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Recorre las páginas una tras otra (comportamiento original), entregando cada página al obtenerla.
+
+        Una página que no se obtiene tras los reintentos (o sin hits) corta la paginación; una
+        página que lanza una excepción se salta. Ambas cuentan en `missed_pages`.
+        """
         page = 1
-        results_per_page = 100  # Max allowed
         total_hits = None
-        docs_collected = 0  # Contador de documentos únicos (sin expandir por idioma)
-        
-        encoded_query = quote_plus(query_term)
+        docs_collected = 0  # Contador de documentos únicos
         
         while True:
-            # Build URL: https://cordis.europa.eu/search?q=QUERY&format=json&p=PAGE&num=100
-            search_url = f"{self.SEARCH_URL}?q={encoded_query}&format=json&p={page}&num={results_per_page}"
-            
-            logger.info(f"V27 - Fetching page {page}: {search_url}")
-            
-            loop = asyncio.get_running_loop()
-            def _fetch():
-                import requests
-                return requests.get(search_url, headers=self.headers, timeout=90)
-            
             try:
-                import random
-                import time
-                max_retries = 5
-                retry_count = 0
-                response = None
-                
-                while retry_count <= max_retries:
-                    response = await loop.run_in_executor(None, _fetch)
-                    if response.status_code == 429:
-                        wait_time = (2 ** retry_count) + random.uniform(0.5, 2.0)
-                        logger.warning(f"V27 - Rate limited (429) on page {page}. Retrying in {wait_time:.2f}s... (Attempt {retry_count + 1}/{max_retries + 1})")
-                        await asyncio.sleep(wait_time)
-                        retry_count += 1
-                    elif response.status_code >= 500:
-                        wait_time = (2 ** retry_count) + random.uniform(1.0, 3.0)
-                        logger.warning(f"V27 - Server error ({response.status_code}) on page {page}. Retrying in {wait_time:.2f}s...")
-                        await asyncio.sleep(wait_time)
-                        retry_count += 1
-                    else:
-                        break
-                
-                if response is None or response.status_code != 200:
-                    status_code = response.status_code if response else "Unknown"
-                    logger.error(f"V27 - Error fetching page {page}: Status {status_code} after {retry_count} retries")
-                    break
-                
-                try:
-                    data = response.json()
-                except Exception as e:
-                    logger.error(f"V27 - JSON parse error on page {page}: {e}")
+                data, from_cache = await self._fetch_page_data(encoded_query, page)
+                if data is None:
+                    self._stop_pagination(page, total_hits, max_results)
                     break
                 
-                # Extract header info
-                header = data.get('result', {}).get('header', {})
-                
                 # Get total hits from first page
                 if total_hits is None:
-                    total_hits_str = header.get('totalHits', '0')
-                    total_hits = int(total_hits_str) if total_hits_str else 0
+                    total_hits = self._read_total_hits(data)
                     logger.info(f"*** V27 - TOTAL EN CORDIS: {total_hits} resultados ***")
                     
                     if total_hits == 0:
@@ -103,142 +348,172 @@ class CordisApiClient:
                         break
                 
                 # Extract hits - Cordis returns them in data['hits'] as a list
-                hits = []
-                
-                # Structure 1 (ACTUAL CORDIS STRUCTURE): data['hits'] direct list
-                if 'hits' in data and isinstance(data['hits'], list):
-                    hits = data['hits']
-                # Structure 2: data['hits'] as dict with 'hit' key
-                elif 'hits' in data and isinstance(data['hits'], dict):
-                    hits = data['hits'].get('hit', [])
-                # Structure 3: result.hits (legacy fallback)
-                elif 'result' in data and 'hits' in data['result']:
-                    result_hits = data['result']['hits']
-                    if isinstance(result_hits, dict) and 'hit' in result_hits:
-                        hits = result_hits['hit']
-                    elif isinstance(result_hits, list):
-                        hits = result_hits
-                
-                # Ensure hits is a list
-                if isinstance(hits, dict):
-                    hits = [hits]
-                elif not isinstance(hits, list):
-                    hits = []
+                hits = self._extract_hits(data)
                 
                 if not hits:
                     logger.warning(f"V27 - Page {page}: Found totalHits={total_hits} but extracted 0 hits.")
                     logger.warning(f"V27 - Root data keys: {list(data.keys())}")
                     if 'hits' in data:
                         logger.warning(f"V27 - data['hits'] type: {type(data['hits'])}")
+                    self._stop_pagination(page, total_hits, max_results)
                     break
                 
-                page_count = 0
-                for hit in hits:
-                    # Each hit contains various content types: article, project, result, etc.
-                    # We need to extract from whichever is present
-                    content = None
-                    content_type = 'unknown'
-                    
-                    # Check for different content types
-                    for ctype in ['article', 'project', 'result', 'publication', 'event']:
-                        if ctype in hit:
-                            content = hit[ctype]
-                            content_type = ctype
-                            break
-                    
-                    if not content:
-                        continue
-                    
-                    # Extract fields
-                    rcn = content.get('rcn', '')
-                    item_id = content.get('id', rcn)
-                    title = content.get('title', content.get('acronym', 'No Title'))
-                    teaser = content.get('teaser', content.get('objective', ''))
-                    
-                    # Build URL based on content type
-                    if content_type == 'project':
-                        url = f"https://cordis.europa.eu/project/id/{item_id}"
-                    elif content_type == 'article':
-                        url = f"https://cordis.europa.eu/article/id/{item_id}"
-                    elif content_type == 'result':
-                        url = f"https://cordis.europa.eu/result/id/{item_id}"
-                    elif content_type == 'publication':
-                        url = f"https://cordis.europa.eu/publication/id/{item_id}"
-                    else:
-                        url = f"https://cordis.europa.eu/search?q={encoded_query}"
-                    
-                    # Capture main language
-                    main_lang = content.get('language', 'en')
-                    
-                    # Get available languages if present
-                    available_langs = content.get('availableLanguages', '')
-                    if isinstance(available_langs, str):
-                        # Format: "en,es,fr"
-                        langs_list = [l.strip().lower() for l in available_langs.split(',') if l.strip()]
-                    elif isinstance(available_langs, list):
-                        langs_list = [str(l).lower() for l in available_langs]
-                    else:
-                        langs_list = [main_lang.lower()]
-                    
-                    # If empty or missing, fallback to main_lang
-                    if not langs_list:
-                        langs_list = [main_lang.lower()]
-                    
-                    # Ensure main_lang is in the list
-                    if main_lang.lower() not in langs_list:
-                        langs_list.append(main_lang.lower())
-                    
-                    # Add to results for EACH language
-                    for individual_lang in langs_list:
-                        all_results.append({
-                            'url': url,
-                            'title': title,
-                            'description': teaser[:1000] if teaser else f"Cordis {content_type}: {title}",
-                            'source': 'Cordis Europa JSON V27',
-                            'mediatype': content_type,
-                            'rcn': rcn,
-                            'lang': individual_lang
-                        })
-                    page_count += 1
-                    docs_collected += 1  # Contar documentos únicos, no entradas por idioma
+                entries, page_count = self._build_entries(hits, encoded_query)
+                docs_collected += page_count
                 
-                logger.info(f"V27 - Page {page}: Found {page_count} docs. Docs: {docs_collected}/{total_hits}. Entries: {len(all_results)}")
+                logger.info(f"V27 - Page {page}: Found {page_count} docs. Docs: {docs_collected}/{total_hits}")
                 
                 # Update GUI with progress
                 if progress_callback:
                     progress_callback(0, f"Cordis API: Página {page} - {docs_collected}/{total_hits} documentos", {})
-                
-                # Comparar DOCUMENTOS únicos contra totalHits (no entradas expandidas por idioma)
-                if docs_collected >= total_hits:
-                    logger.info(f"V27 - Collected all {total_hits} documents. Done!")
-                    break
-                
-                # Safety limit
-                if docs_collected >= max_results:
-                    logger.info(f"V27 - Reached safety limit ({max_results}). Stopping.")
-                    break
-                
-                # Check if this was the last page (NO results on this page)
-                if page_count == 0:
-                    logger.info(f"V27 - No more results on page {page}. Stopping.")
-                    break
-                
-                page += 1
-                
-                # Be nice to server - 0.3 seconds between requests
-                await asyncio.sleep(0.3)
-                
             except Exception as e:
                 logger.error(f"V27 - Error on page {page}: {e}")
+                self.missed_pages += 1
                 # Try to continue with next page
                 page += 1
-                if page > 1000:  # Safety: max 1000 pages
+                if page > self.MAX_PAGES:
                     break
                 await asyncio.sleep(2.0)
                 continue
-        
-        logger.info(f"*** V27 COMPLETADO ***: Recopilados {len(all_results)} entradas de {docs_collected} documentos de Cordis")
-        return all_results
+
+            # Entregar la página fuera del try: los errores del consumidor no se confunden con los de red
+            yield entries
+                
+            # Comparar DOCUMENTOS únicos contra totalHits
+            if docs_collected >= total_hits:
+                logger.info(f"V27 - Collected all {total_hits} documents. Done!")
+                break
+            
+            # Safety limit
+            if docs_collected >= max_results:
+                logger.info(f"V27 - Reached safety limit ({max_results}). Stopping.")
+                break
+            
+            # Check if this was the last page (NO results on this page)
+            if page_count == 0:
+                logger.info(f"V27 - No more results on page {page}. Stopping.")
+                break
+            
+            page += 1
+            
+            if not from_cache:
+                await asyncio.sleep(self.PAGE_DELAY)
+
+    async def _search_concurrent(self, encoded_query: str, max_results: int, progress_callback=None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Descarga la página 1 para conocer totalHits, planifica las páginas restantes y
+        las obtiene con una ventana de como máximo `page_concurrency` peticiones en vuelo.
+        Las páginas se entregan en orden; como mucho se descargan `2 * page_concurrency`
+        páginas por delante de la última entregada, así que un consumidor lento frena la descarga.
+
+        Los fallos se tratan como en el recorrido secuencial: una página que no se obtiene tras
+        los reintentos (o sin hits) corta la entrega en ese punto y una que lanza una excepción
+        se salta; todas cuentan en `missed_pages`.
+        """
+        try:
+            data, _ = await self._fetch_page_data(encoded_query, 1)
+        except Exception as e:
+            logger.error(f"V27 - Error on page 1: {e}")
+            self.missed_pages += 1
+            return
+        if data is None:
+            self._stop_pagination(1, None, max_results)
+            return
+
+        total_hits = self._read_total_hits(data)
+        logger.info(f"*** V27 - TOTAL EN CORDIS: {total_hits} resultados ***")
+        if total_hits == 0:
+            logger.warning("V27 - No results found for this query")
+            return
+
+        hits = self._extract_hits(data)
+        if not hits:
+            logger.warning(f"V27 - Page 1: Found totalHits={total_hits} but extracted 0 hits.")
+            logger.warning(f"V27 - Root data keys: {list(data.keys())}")
+            self._stop_pagination(1, total_hits, max_results)
+            return
+
+        first_entries, first_count = self._build_entries(hits, encoded_query)
+        docs_collected = first_count
+
+        total_pages = self._planned_pages(total_hits, max_results)
+        logger.info(f"V27 - Planificadas {total_pages} páginas (ventana concurrente: {self.page_concurrency})")
+
+        if progress_callback:
+            progress_callback(0, f"Cordis API: Página 1/{total_pages} - {docs_collected}/{total_hits} documentos", {})
+
+        yield first_entries
+
+        window = asyncio.Semaphore(self.page_concurrency)
+        lookahead = 2 * self.page_concurrency
+        pages_entries: Dict[int, List[Dict[str, Any]]] = {}
+        finished = set()
+        # Páginas que cortan la paginación (None tras los reintentos o sin hits)
+        stop_pages = set()
+        next_page = 2
+        pages_done = 1
+        changed = asyncio.Condition()
+
+        async def _fetch_planned_page(page: int):
+            nonlocal docs_collected, pages_done
+            async with changed:
+                await changed.wait_for(lambda: page < next_page + lookahead)
+            try:
+                async with window:
+                    from_cache = False
+                    try:
+                        page_data, from_cache = await self._fetch_page_data(encoded_query, page)
+                        hits = self._extract_hits(page_data) if page_data is not None else []
+                        if not hits:
+                            stop_pages.add(page)
+                            return
+                        entries, page_count = self._build_entries(hits, encoded_query)
+                        pages_entries[page] = entries
+                        docs_collected += page_count
+                        pages_done += 1
+                        logger.info(f"V27 - Page {page}: Found {page_count} docs. Docs: {docs_collected}/{total_hits}. Pages: {pages_done}/{total_pages}")
+                        if progress_callback:
+                            progress_callback(0, f"Cordis API: Página {pages_done}/{total_pages} - {docs_collected}/{total_hits} documentos", {})
+                    except Exception as e:
+                        logger.error(f"V27 - Error on page {page}: {e}")
+                        self.missed_pages += 1
+                    finally:
+                        # Cada hueco de la ventana respeta la pausa entre peticiones de red
+                        if not from_cache:
+                            await asyncio.sleep(self.PAGE_DELAY)
+            finally:
+                async with changed:
+                    finished.add(page)
+                    changed.notify_all()
+
+        fetch_all = asyncio.ensure_future(
+            asyncio.gather(*(_fetch_planned_page(p) for p in range(2, total_pages + 1)))
+        )
+        try:
+            while next_page <= total_pages:
+                async with changed:
+                    await changed.wait_for(lambda: next_page in finished)
+                    if next_page in stop_pages:
+                        # Como el recorrido secuencial: no se entregan páginas posteriores
+                        self._stop_pagination(next_page, total_hits, max_results)
+                        break
+                    entries = pages_entries.pop(next_page, None)
+                    next_page += 1
+                    changed.notify_all()
+                if entries:
+                    yield entries
+        finally:
+            # El consumidor puede abandonar el generador (parada); no dejar descargas huérfanas
+            if not fetch_all.done():
+                fetch_all.cancel()
+            # Recoger el resultado (o la cancelación) para que asyncio no lo registre como no leído
+            await asyncio.gather(fetch_all, return_exceptions=True)
+
+    def _stop_pagination(self, page: int, total_hits: Optional[int], max_results: int) -> None:
+        """Registra el corte de la paginación en `page`: esa página y las siguientes planificadas no se entregan."""
+        missed = 1 if total_hits is None else max(1, self._planned_pages(total_hits, max_results) - page + 1)
+        self.missed_pages += missed
+        logger.warning(f"V27 - Página {page} no disponible: se detiene la paginación ({missed} páginas sin entregar)")
 
     # Legacy compatibility
     async def _execute_sparql_search(self, search_term: str, max_results: int, search_mode: str = 'broad') -> List[Dict[str, Any]]:
@@ -0,0 +1,203 @@
+"""
+CordisPageCache: caché persistente en disco de las páginas JSON de búsqueda de Cordis.
+
+Las páginas se indexan por contenido (hash de query, página y tamaño de página) en un
+único fichero SQLite en modo WAL, de modo que todos los procesos worker pueden
+compartirlo. Soporta caducidad (TTL) y un tope de tamaño con expulsión LRU.
+
+get/put son bloqueantes: el cliente los ejecuta fuera del event loop (asyncio.to_thread).
+La espera por el bloqueo de escritura es corta; si la caché sigue bloqueada por otro
+worker, la lectura cuenta como fallo y la escritura se omite.
+"""
+
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Optional, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CordisPageCache:
+    """
+    Caché de respuestas de la búsqueda de Cordis compartida entre procesos.
+    """
+
+    # Cada cuántas escrituras se comprueba el tope de tamaño
+    EVICTION_CHECK_INTERVAL = 100
+    # No reescribir last_access en cada acierto (reduce escrituras concurrentes)
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, db_path: str, ttl: int = 7 * 86400, max_size: int = 512 * 1024 * 1024,
+                 busy_timeout: float = 2.0):
+        """
+        Inicializa la caché.
+
+        Args:
+            db_path: Ruta al fichero SQLite de la caché
+            ttl: Tiempo de vida de cada página en segundos (por defecto: 7 días)
+            max_size: Tamaño máximo (comprimido) de la caché en bytes (por defecto: 512 MB)
+            busy_timeout: Segundos de espera si otro proceso tiene la caché bloqueada
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.busy_timeout = busy_timeout
+        self.hits = 0
+        self.misses = 0
+        self._puts_since_check = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_pid: Optional[int] = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        logger.info(f"CordisPageCache en {db_path} (ttl={ttl}s, max_size={max_size/1024/1024:.1f}MB)")
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Abre (una vez por proceso) la conexión al fichero de caché."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    key TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    page INTEGER NOT NULL,
+                    num INTEGER NOT NULL,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages (last_access)")
+            conn.commit()
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def make_key(query: str, page: int, num: int) -> str:
+        """Genera la clave de contenido para (query, page, num)."""
+        return hashlib.sha256(f"{query}|{page}|{num}".encode('utf-8')).hexdigest()
+
+    def get(self, query: str, page: int, num: int) -> Optional[bytes]:
+        """
+        Obtiene el cuerpo de una página cacheada.
+
+        Returns:
+            Cuerpo JSON en bytes, o None si no está en caché o ha caducado
+        """
+        key = self.make_key(query, page, num)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._get_connection()
+                row = conn.execute(
+                    "SELECT body, created_at, last_access FROM pages WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+
+                body, created_at, last_access = row
+                if now - created_at > self.ttl:
+                    conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                    conn.commit()
+                    self.misses += 1
+                    return None
+
+                if now - last_access > self.TOUCH_INTERVAL:
+                    conn.execute("UPDATE pages SET last_access = ? WHERE key = ?", (now, key))
+                    conn.commit()
+
+                self.hits += 1
+            return zlib.decompress(body)
+        except sqlite3.OperationalError as e:
+            if not self._is_locked(e):
+                logger.error(f"CordisPageCache: error leyendo página {page} de '{query}': {e}")
+            else:
+                logger.debug(f"CordisPageCache: caché bloqueada, página {page} de '{query}' se trata como fallo")
+            self._rollback()
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.error(f"CordisPageCache: error leyendo página {page} de '{query}': {e}")
+            self.misses += 1
+            return None
+
+    def put(self, query: str, page: int, num: int, body: bytes) -> None:
+        """Guarda el cuerpo de una página en la caché."""
+        key = self.make_key(query, page, num)
+        now = time.time()
+        try:
+            compressed = zlib.compress(body)
+            with self._lock:
+                conn = self._get_connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO pages (key, query, page, num, body, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, query, page, num, compressed, len(compressed), now, now),
+                )
+                conn.commit()
+
+                self._puts_since_check += 1
+                if self._puts_since_check >= self.EVICTION_CHECK_INTERVAL:
+                    self._puts_since_check = 0
+                    self._evict(conn)
+        except sqlite3.OperationalError as e:
+            if not self._is_locked(e):
+                logger.error(f"CordisPageCache: error guardando página {page} de '{query}': {e}")
+            else:
+                logger.debug(f"CordisPageCache: caché bloqueada, no se guarda la página {page} de '{query}'")
+            self._rollback()
+        except Exception as e:
+            logger.error(f"CordisPageCache: error guardando página {page} de '{query}': {e}")
+
+    @staticmethod
+    def _is_locked(error: sqlite3.OperationalError) -> bool:
+        return 'locked' in str(error) or 'busy' in str(error)
+
+    def _rollback(self) -> None:
+        """Deshace la transacción que dejó abierta una escritura bloqueada."""
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                try:
+                    self._conn.rollback()
+                except sqlite3.Error:
+                    pass
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Elimina las páginas caducadas y, si se supera el tope, las menos usadas (LRU)."""
+        conn.execute("DELETE FROM pages WHERE created_at < ?", (time.time() - self.ttl,))
+        total_size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total_size > self.max_size:
+            target = self.max_size * 0.8  # Dejar un margen del 20%
+            freed = 0
+            to_delete = []
+            for key, size in conn.execute("SELECT key, size FROM pages ORDER BY last_access ASC"):
+                to_delete.append((key,))
+                freed += size
+                if total_size - freed <= target:
+                    break
+            conn.executemany("DELETE FROM pages WHERE key = ?", to_delete)
+            logger.info(f"CordisPageCache: expulsadas {len(to_delete)} páginas ({freed/1024/1024:.1f}MB)")
+        conn.commit()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Retorna los contadores de aciertos/fallos de este proceso."""
+        return {'cordis_cache_hits': self.hits, 'cordis_cache_misses': self.misses}
+
+    def close(self) -> None:
+        """Cierra la conexión del proceso actual."""
+        with self._lock:
+            if self._conn is not None and self._conn_pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._conn_pid = None
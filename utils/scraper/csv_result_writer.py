@@ -0,0 +1,119 @@
+import os
+import csv
+import time
+import atexit
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class CsvResultWriter:
+    """
+    Keeps one open csv.writer per results file and writes rows in batches.
+
+    Rows are buffered in memory and written when a file accumulates `flush_rows` rows or
+    when `flush_interval` seconds have passed since the last flush. `flush(fsync=True)`
+    is meant for course boundaries; `close()` also runs at interpreter exit so buffered
+    rows are not lost if the worker dies with an unhandled exception.
+    """
+
+    def __init__(self, columns: List[str], flush_rows: int = 500, flush_interval: float = 5.0):
+        """
+        Initialize the writer.
+
+        Args:
+            columns: Column order used for the header and for every row
+            flush_rows: Buffered rows per file that trigger a write
+            flush_interval: Maximum seconds a row stays buffered (checked on each write)
+        """
+        self.columns = list(columns)
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self._handles: Dict[str, Any] = {}
+        self._writers: Dict[str, Any] = {}
+        self._buffers: Dict[str, List[List[Any]]] = {}
+        self._last_flush = time.monotonic()
+        self.rows_written = 0
+        atexit.register(self.close)
+
+    def open(self, path: str) -> None:
+        """
+        Opens (or reuses) the handle for `path`, writing the header if the file is new or empty.
+        """
+        if path in self._handles:
+            return
+        write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+        # newline='' lets csv control line endings; os.linesep matches what pandas wrote before
+        handle = open(path, 'a', newline='', encoding='utf-8')
+        writer = csv.writer(handle, lineterminator=os.linesep)
+        if write_header:
+            writer.writerow(self.columns)
+            handle.flush()
+        self._handles[path] = handle
+        self._writers[path] = writer
+        self._buffers[path] = []
+
+    def write(self, path: str, row: Dict[str, Any]) -> None:
+        """
+        Buffers one result row for `path`, flushing if the row or time threshold is reached.
+        """
+        if path not in self._handles:
+            self.open(path)
+        buffer = self._buffers[path]
+        buffer.append([row.get(column, '') for column in self.columns])
+        if len(buffer) >= self.flush_rows:
+            self._flush_path(path)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _flush_path(self, path: str, fsync: bool = False) -> None:
+        """Writes the buffered rows of one file to its handle."""
+        buffer = self._buffers.get(path)
+        handle = self._handles.get(path)
+        if handle is None:
+            return
+        if buffer:
+            self._writers[path].writerows(buffer)
+            self.rows_written += len(buffer)
+            buffer.clear()
+        handle.flush()
+        if fsync:
+            os.fsync(handle.fileno())
+
+    def flush(self, fsync: bool = False) -> None:
+        """
+        Writes all buffered rows to disk.
+
+        Args:
+            fsync: Also force the data to stable storage (used at course boundaries)
+        """
+        for path in list(self._handles):
+            try:
+                self._flush_path(path, fsync=fsync)
+            except Exception as e:
+                logger.error(f"Error flushing results file {path}: {e}")
+        self._last_flush = time.monotonic()
+
+    def close(self, path: Optional[str] = None) -> None:
+        """
+        Flushes and closes one file (or all of them if `path` is None).
+        """
+        paths = [path] if path is not None else list(self._handles)
+        for p in paths:
+            if p not in self._handles:
+                continue
+            try:
+                self._flush_path(p, fsync=True)
+            except Exception as e:
+                logger.error(f"Error flushing results file {p} on close: {e}")
+            try:
+                self._handles[p].close()
+            except Exception:
+                pass
+            del self._handles[p]
+            del self._writers[p]
+            del self._buffers[p]
+
+    def pending_rows(self) -> int:
+        """Returns the number of rows buffered and not yet written."""
+        return sum(len(buffer) for buffer in self._buffers.values())
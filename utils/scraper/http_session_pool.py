@@ -0,0 +1,79 @@
+"""
+HttpSessionPool: sesión aiohttp compartida por worker.
+
+Mantiene una única ClientSession (con su TCPConnector y resolver DNS) reutilizada
+entre peticiones, para no repetir DNS, handshake TCP y TLS en cada URL.
+"""
+
+import asyncio
+import logging
+import socket
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class HttpSessionPool:
+    """
+    Pool de conexiones HTTP reutilizable con límites por host, keep-alive y caché DNS.
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 8, dns_cache_ttl: int = 300, keepalive_timeout: float = 30.0):
+        """
+        Inicializa el pool (la sesión se crea bajo demanda dentro del loop del worker).
+
+        Args:
+            limit: Conexiones simultáneas máximas en total
+            limit_per_host: Conexiones simultáneas máximas por host
+            dns_cache_ttl: Segundos que se cachea cada resolución DNS
+            keepalive_timeout: Segundos que se mantiene abierta una conexión ociosa
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        self._lock = asyncio.Lock()
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Retorna la sesión compartida, creándola si no existe para el loop actual."""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._session_loop is loop:
+            return self._session
+
+        async with self._lock:
+            if self._session is None or self._session.closed or self._session_loop is not loop:
+                # Configurar resolver DNS personalizado para evitar problemas en WSL
+                resolver = aiohttp.AsyncResolver(nameservers=["8.8.8.8", "1.1.1.1"])
+                connector = aiohttp.TCPConnector(
+                    resolver=resolver,
+                    family=socket.AF_INET,
+                    ssl=False,
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    ttl_dns_cache=self.dns_cache_ttl,
+                    keepalive_timeout=self.keepalive_timeout,
+                )
+                self._session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=aiohttp.ClientTimeout(total=60),
+                )
+                self._session_loop = loop
+                logger.info(
+                    f"HttpSessionPool: sesión creada (limit={self.limit}, limit_per_host={self.limit_per_host}, "
+                    f"dns_ttl={self.dns_cache_ttl}s, keepalive={self.keepalive_timeout}s)"
+                )
+        return self._session
+
+    async def close(self):
+        """Cierra la sesión y libera todas las conexiones abiertas."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            # Dar tiempo a que se cierren los transportes SSL subyacentes
+            await asyncio.sleep(0.25)
+            logger.info("HttpSessionPool: sesión cerrada")
+        self._session = None
+        self._session_loop = None
@@ -1,6 +1,7 @@
 """
 LineCountManager: Gestiona el conteo de líneas de archivos CSV en background.
 Actualiza el conteo periódicamente sin bloquear el hilo principal del GUI.
+Los conteos salen del ResultsManifest compartido (incremental), no de releer cada CSV.
 """
 
 import os
@@ -9,6 +10,8 @@ import logging
 import time
 from typing import Callable, Dict, Optional
 
+from utils.results_manifest import get_results_manifest
+
 logger = logging.getLogger(__name__)
 
 
@@ -110,26 +113,14 @@ class LineCountManager:
             return
 
         try:
-            csv_files = [
-                os.path.join(self._results_dir, f)
-                for f in os.listdir(self._results_dir)
-                if f.lower().endswith(".csv")
-            ]
+            entries = get_results_manifest(self._results_dir).files(recursive=False, extensions=(".csv",))
         except Exception as e:
             logger.error(f"LineCountManager: error listando archivos: {e}")
             return
 
-        new_counts = {}
-        total = 0
-
-        for fpath in csv_files:
-            try:
-                count = self._count_lines(fpath)
-                new_counts[fpath] = count
-                total += count
-            except Exception as e:
-                logger.debug(f"LineCountManager: error contando {fpath}: {e}")
-                new_counts[fpath] = 0
+        csv_files = [entry["path"] for entry in entries]
+        new_counts = {entry["path"]: entry["row_count"] for entry in entries}
+        total = sum(new_counts.values())
 
         with self._lock:
             self._counts = new_counts
@@ -149,24 +140,6 @@ class LineCountManager:
             except Exception as e:
                 logger.error(f"LineCountManager: error en callback: {e}")
 
-    def _count_lines(self, fpath: str) -> int:
-        """Cuenta las líneas de un archivo CSV de forma eficiente."""
-        count = 0
-        try:
-            with open(fpath, "rb") as f:
-                # Leer en chunks para mayor eficiencia con archivos grandes
-                buf_size = 1024 * 1024  # 1MB
-                buf = f.read(buf_size)
-                while buf:
-                    count += buf.count(b"\n")
-                    buf = f.read(buf_size)
-            # Restar 1 por la cabecera si el archivo tiene contenido
-            if count > 0:
-                count -= 1
-        except Exception:
-            count = 0
-        return max(0, count)
-
 
 # Instancia global singleton para importar desde cualquier módulo
 line_count_manager = LineCountManager()
@@ -0,0 +1,361 @@
+"""
+Parquet Result Store
+--------------------
+Optional columnar copy of the scraping results, partitioned by language and SIC division.
+
+Layout (hive partitioning, readable by any Arrow/Parquet tool):
+
+    results/parquet/lang=es/sic_prefix=50/part-<writer>-<seq>.parquet
+
+Every writer (one per worker process) buffers rows per partition and writes a new immutable
+file on each flush; files are written under a hidden temporary name and renamed into place,
+so readers never see partial files. Course boundaries produce many small files, which are
+periodically merged into a single file with large row groups (`compact_partition`).
+
+Reads go through `read_results` / `iter_result_batches`, which push the language and SIC
+filters down to partition pruning and read only the requested columns.
+"""
+
+import os
+import time
+import uuid
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from utils.sic_codes import sic_sort_key
+from utils.scraper.text_processor import parse_word_counts
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+# Columns stored inside the files; 'lang' and 'sic_prefix' live in the partition path.
+# 'total_words' keeps the CSV text ("Total words: N | Keyword: c"); the numbers are split
+# into 'word_count' and 'keyword_count' so they can be filtered. 'sic_key' is the natural
+# SIC key (utils.sic_codes.sic_sort_key) used by the prefix filter
+DATA_COLUMNS = ['sic_code', 'sic_key', 'course_name', 'title', 'description', 'url', 'total_words',
+                'word_count', 'keyword_count']
+PARTITION_COLUMNS = ['lang', 'sic_prefix']
+
+# Partition of SIC codes that are not numeric
+NON_NUMERIC_SIC_PREFIX = '__'
+
+LOCK_FILE = '_compact.lock'
+# A compaction lock older than this is considered abandoned (crashed worker)
+STALE_LOCK_SECONDS = 600
+
+
+def _data_schema() -> "pa.Schema":
+    return pa.schema([
+        ('sic_code', pa.string()),
+        ('sic_key', pa.string()),
+        ('course_name', pa.string()),
+        ('title', pa.string()),
+        ('description', pa.string()),
+        ('url', pa.string()),
+        ('total_words', pa.string()),
+        ('word_count', pa.int64()),
+        ('keyword_count', pa.int64()),
+    ])
+
+
+def _partition_schema() -> "pa.Schema":
+    # Explicit string types: "50" must stay a SIC prefix, not become the integer 50
+    return pa.schema([('lang', pa.string()), ('sic_prefix', pa.string())])
+
+
+def sic_prefix(sic_code: Any) -> str:
+    """
+    Two-digit SIC division used as partition key ("0119.0" -> "01", "5012" -> "50").
+
+    Uses the natural SIC key, so codes that lost their leading zero in Excel
+    ("100" is "0100") land in the same partition as the original code.
+    """
+    key = sic_sort_key(sic_code)
+    if key.startswith('~'):
+        return NON_NUMERIC_SIC_PREFIX
+    return key[:2]
+
+
+def sic_key_prefix(prefix: Any) -> str:
+    """
+    Natural SIC key prefix matching a SIC prefix ("501" -> "0501", "50" -> "50", "50.0" -> "50.000000000").
+
+    A prefix without decimals also matches its children; the result is compared with
+    the stored 'sic_key' column.
+    """
+    key = sic_sort_key(prefix)
+    if key.startswith('~') or '.' in str(prefix):
+        return key
+    return key.split('.')[0]
+
+
+def _write_atomic(table: "pa.Table", directory: str, name: str, row_group_rows: int) -> str:
+    """Writes `table` under a hidden temporary name and renames it into place."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    pq.write_table(table, tmp_path, row_group_size=row_group_rows, compression='zstd')
+    os.replace(tmp_path, path)
+    return path
+
+
+def _acquire_lock(partition_dir: str) -> Optional[str]:
+    lock_path = os.path.join(partition_dir, LOCK_FILE)
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(lock_path) < STALE_LOCK_SECONDS:
+                return None
+            os.unlink(lock_path)
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            return None
+    os.close(fd)
+    return lock_path
+
+
+def compact_partition(partition_dir: str, min_files: int = 8, small_file_bytes: int = 16 * 1024 * 1024,
+                      row_group_rows: int = 128 * 1024) -> int:
+    """
+    Merges the small files of one partition into a single file with large row groups.
+
+    Only finished files are touched (they are immutable), so writers can keep adding files
+    while a compaction runs. A lock file keeps two workers from compacting the same partition.
+
+    Args:
+        partition_dir: Directory of one lang=/sic_prefix= partition
+        min_files: Minimum number of small files before compacting
+        small_file_bytes: Files at least this large are left alone
+        row_group_rows: Row group size of the compacted file
+
+    Returns:
+        Number of files merged (0 if nothing was done)
+    """
+    if not os.path.isdir(partition_dir):
+        return 0
+    small_files = sorted(
+        entry.path for entry in os.scandir(partition_dir)
+        if entry.is_file() and entry.name.endswith('.parquet')
+        and not entry.name.startswith(('.', '_'))
+        and entry.stat().st_size < small_file_bytes
+    )
+    if len(small_files) < max(2, min_files):
+        return 0
+
+    lock_path = _acquire_lock(partition_dir)
+    if lock_path is None:
+        logger.debug(f"Compaction of {partition_dir} already running elsewhere")
+        return 0
+    try:
+        schema = _data_schema()
+        table = pa.concat_tables(pq.read_table(path, schema=schema) for path in small_files)
+        merged = _write_atomic(table, partition_dir, f"compact-{uuid.uuid4().hex}.parquet", row_group_rows)
+        # The merged file is in place before the originals go: a concurrent reader may briefly
+        # see rows twice, never miss them
+        for path in small_files:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        logger.info(f"Compacted {len(small_files)} files ({table.num_rows} rows) into {merged}")
+        return len(small_files)
+    finally:
+        try:
+            os.unlink(lock_path)
+        except OSError:
+            pass
+
+
+class ParquetResultStore:
+    """
+    Buffered Parquet writer for result rows, partitioned by language and SIC prefix.
+    """
+
+    def __init__(self, root: str, flush_rows: int = 5000, flush_interval: float = 60.0,
+                 compact_min_files: int = 8, compact_interval: float = 300.0,
+                 row_group_rows: int = 128 * 1024, writer_id: Optional[str] = None):
+        """
+        Initialize the store.
+
+        Args:
+            root: Root directory of the dataset
+            flush_rows: Buffered rows per partition that trigger a new file
+            flush_interval: Maximum seconds a row stays buffered (checked on each write)
+            compact_min_files: Small files in a partition before it is compacted
+            compact_interval: Minimum seconds between compaction passes
+            row_group_rows: Row group size of compacted files
+            writer_id: Unique name for this writer's files (defaults to pid + random suffix)
+        """
+        if not HAS_PYARROW:
+            raise RuntimeError("pyarrow is required for the Parquet results store")
+        self.root = root
+        self.flush_rows = max(1, flush_rows)
+        self.flush_interval = flush_interval
+        self.compact_min_files = compact_min_files
+        self.compact_interval = compact_interval
+        self.row_group_rows = row_group_rows
+        self.writer_id = writer_id or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._schema = _data_schema()
+        self._buffers: Dict[Tuple[str, str], Dict[str, List[Any]]] = {}
+        self._dirty_partitions = set()
+        self._seq = 0
+        self._last_flush = time.monotonic()
+        self._last_compact = time.monotonic()
+        self.rows_written = 0
+
+    def _partition_dir(self, partition: Tuple[str, str]) -> str:
+        lang, prefix = partition
+        return os.path.join(self.root, f"lang={lang}", f"sic_prefix={prefix}")
+
+    def write(self, row: Dict[str, Any]) -> None:
+        """
+        Buffers one result row, flushing its partition if the row or time threshold is reached.
+        """
+        partition = ((row.get('lang') or 'en').lower(), sic_prefix(row.get('sic_code', '')))
+        buffer = self._buffers.get(partition)
+        if buffer is None:
+            buffer = {column: [] for column in DATA_COLUMNS}
+            self._buffers[partition] = buffer
+        word_count, keyword_counts = parse_word_counts(row.get('total_words', ''))
+        values = {**row, 'sic_key': sic_sort_key(row.get('sic_code', '')),
+                  'word_count': word_count, 'keyword_count': sum(keyword_counts.values())}
+        for column in DATA_COLUMNS:
+            value = values.get(column, '')
+            buffer[column].append(value if column in ('word_count', 'keyword_count') else ('' if value is None else str(value)))
+        if len(buffer['sic_code']) >= self.flush_rows:
+            self._flush_partition(partition)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _flush_partition(self, partition: Tuple[str, str]) -> None:
+        """Writes the buffered rows of one partition as a new file."""
+        buffer = self._buffers.pop(partition, None)
+        if not buffer or not buffer['sic_code']:
+            return
+        table = pa.Table.from_pydict(buffer, schema=self._schema)
+        self._seq += 1
+        _write_atomic(
+            table, self._partition_dir(partition),
+            f"part-{self.writer_id}-{self._seq:06d}.parquet", self.row_group_rows
+        )
+        self.rows_written += table.num_rows
+        self._dirty_partitions.add(partition)
+
+    def flush(self) -> None:
+        """Writes all buffered rows to new files."""
+        for partition in list(self._buffers):
+            try:
+                self._flush_partition(partition)
+            except Exception as e:
+                logger.error(f"Error flushing Parquet partition {partition}: {e}")
+        self._last_flush = time.monotonic()
+
+    def compact(self) -> int:
+        """Compacts the partitions this writer has added files to. Returns the files merged."""
+        merged = 0
+        for partition in list(self._dirty_partitions):
+            try:
+                merged += compact_partition(
+                    self._partition_dir(partition), self.compact_min_files, row_group_rows=self.row_group_rows
+                )
+                self._dirty_partitions.discard(partition)
+            except Exception as e:
+                logger.error(f"Error compacting Parquet partition {partition}: {e}")
+        self._last_compact = time.monotonic()
+        return merged
+
+    def maybe_compact(self) -> int:
+        """Runs `compact` if `compact_interval` seconds have passed since the last pass."""
+        if time.monotonic() - self._last_compact < self.compact_interval:
+            return 0
+        return self.compact()
+
+    def close(self) -> None:
+        """Flushes the buffers and compacts the partitions written by this run."""
+        self.flush()
+        self.compact()
+
+    def pending_rows(self) -> int:
+        """Returns the number of rows buffered and not yet written."""
+        return sum(len(buffer['sic_code']) for buffer in self._buffers.values())
+
+
+def open_results_dataset(root: str) -> "ds.Dataset":
+    """Opens the Parquet results under `root` as a hive-partitioned Arrow dataset."""
+    if not HAS_PYARROW:
+        raise RuntimeError("pyarrow is required for the Parquet results store")
+    return ds.dataset(
+        root,
+        format='parquet',
+        schema=pa.unify_schemas([_data_schema(), _partition_schema()]),
+        partitioning=ds.partitioning(_partition_schema(), flavor='hive'),
+    )
+
+
+def build_filter(lang: Union[str, Iterable[str], None] = None, sic_prefix: Optional[str] = None,
+                 filter: Optional["ds.Expression"] = None) -> Optional["ds.Expression"]:
+    """
+    Builds a dataset filter from the common query parameters.
+
+    Args:
+        lang: Language code or codes ("es", ["es", "fr"])
+        sic_prefix: SIC prefix, normalised like the stored codes ("501" is "0501"); its
+            division prunes partitions, a longer prefix also filters the rows on 'sic_key'
+        filter: Extra Arrow expression combined with AND
+
+    Returns:
+        Expression, or None to read everything
+    """
+    expressions = []
+    if lang:
+        langs = [lang] if isinstance(lang, str) else list(lang)
+        expressions.append(ds.field('lang').isin([value.lower() for value in langs]))
+    if sic_prefix:
+        key_prefix = sic_key_prefix(sic_prefix)
+        partition = NON_NUMERIC_SIC_PREFIX if key_prefix.startswith('~') else key_prefix[:2]
+        expressions.append(ds.field('sic_prefix') == partition)
+        if len(key_prefix) > 2:
+            expressions.append(pc.starts_with(ds.field('sic_key'), key_prefix))
+    if filter is not None:
+        expressions.append(filter)
+    if not expressions:
+        return None
+    combined = expressions[0]
+    for expression in expressions[1:]:
+        combined = combined & expression
+    return combined
+
+
+def read_results(root: str, columns: Optional[List[str]] = None, lang: Union[str, Iterable[str], None] = None,
+                 sic_prefix: Optional[str] = None, filter: Optional["ds.Expression"] = None) -> "pa.Table":
+    """
+    Reads the matching results as an Arrow table.
+
+    Only the partitions that match `lang`/`sic_prefix` are opened and only `columns` are
+    decoded, e.g. read_results('results/parquet', ['url', 'title'], lang='es', sic_prefix='50').
+    """
+    if not os.path.isdir(root):
+        return pa.unify_schemas([_data_schema(), _partition_schema()]).empty_table()
+    return open_results_dataset(root).to_table(
+        columns=columns, filter=build_filter(lang, sic_prefix, filter)
+    )
+
+
+def iter_result_batches(root: str, columns: Optional[List[str]] = None, lang: Union[str, Iterable[str], None] = None,
+                        sic_prefix: Optional[str] = None, filter: Optional["ds.Expression"] = None,
+                        batch_size: int = 65536) -> Iterator["pa.RecordBatch"]:
+    """Same as `read_results`, streaming record batches instead of building one table."""
+    if not os.path.isdir(root):
+        return
+    yield from open_results_dataset(root).to_batches(
+        columns=columns, filter=build_filter(lang, sic_prefix, filter), batch_size=batch_size
+    )
@@ -1,24 +1,134 @@
 import os
+import csv
+import uuid
 import logging
-import pandas as pd
-from typing import List, Dict, Any, Optional
+from itertools import chain, islice
+from typing import Iterator, List, Dict, Any, Optional
 from datetime import datetime
 import openpyxl
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
+
+from utils.scraper.csv_result_writer import CsvResultWriter
 
 logger = logging.getLogger(__name__)
 
+# Column order of every results CSV (header and rows)
+RESULT_COLUMNS = [
+    'sic_code', 'course_name', 'title',
+    'description', 'url', 'total_words', 'lang'
+]
+
+# Column order of the omitted-results log and its Excel export headers
+OMITTED_COLUMNS = [
+    'sic_code', 'course_name', 'title',
+    'url', 'description', 'omission_reason'
+]
+OMITTED_HEADERS = ['Código SIC', 'Nombre del Curso', 'Título', 'URL', 'Descripción', 'Razón de Omisión']
+
+# Rows read to size the Excel columns (the rest of the log is streamed without measuring)
+OMITTED_WIDTH_SAMPLE_ROWS = 1000
+OMITTED_MAX_COLUMN_WIDTH = 50
+
+
+def export_omitted_to_excel(csv_path: str, xlsx_path: Optional[str] = None,
+                            width_sample_rows: int = OMITTED_WIDTH_SAMPLE_ROWS) -> str:
+    """
+    Converts an omitted-results log (CSV) into an Excel file.
+
+    The workbook is built in openpyxl write-only mode, so rows are streamed to disk instead of
+    being kept as cells; column widths come from the first `width_sample_rows` rows.
+    Runs in the server's process pool, so it is a module-level function with plain arguments.
+
+    Args:
+        csv_path: Omitted-results log written during the run
+        xlsx_path: Target file (defaults to the log path with an .xlsx extension)
+        width_sample_rows: Rows used to compute the column widths
+
+    Returns:
+        Absolute path of the Excel file
+    """
+    if not xlsx_path:
+        xlsx_path = os.path.splitext(csv_path)[0] + '.xlsx'
+
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # Header of the log (column keys)
+        sample = list(islice(reader, width_sample_rows))
+
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Omitted Results")
+
+        # In write-only mode the widths must be set before the first row is written
+        for col_num, header in enumerate(OMITTED_HEADERS):
+            max_length = max([len(header)] + [len(row[col_num]) for row in sample if len(row) > col_num])
+            width = (max_length + 2) if max_length < OMITTED_MAX_COLUMN_WIDTH else OMITTED_MAX_COLUMN_WIDTH
+            ws.column_dimensions[get_column_letter(col_num + 1)].width = width
+
+        header_font = Font(bold=True, color="FFFFFF")
+        header_fill = PatternFill(start_color="0066CC", end_color="0066CC", fill_type="solid")
+        header_cells = []
+        for header in OMITTED_HEADERS:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = Alignment(horizontal='center', vertical='center')
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        rows = 0
+        for row in chain(sample, reader):
+            ws.append(row)
+            rows += 1
+        if not rows:
+            ws.append(["No se omitieron resultados durante el proceso."])
+
+        output_dir = os.path.dirname(xlsx_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        # Saved under a hidden temporary name and renamed into place, so a concurrent request
+        # (or one after a failed export) never sees a truncated workbook as up to date
+        tmp_path = os.path.join(output_dir, f".{os.path.basename(xlsx_path)}.{uuid.uuid4().hex}.tmp")
+        try:
+            wb.save(tmp_path)
+            os.replace(tmp_path, xlsx_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    abs_output_file = os.path.abspath(xlsx_path)
+    logger.info(f"Exported {rows} omitted results to {abs_output_file}")
+    return abs_output_file
+
+
 class ResultManager:
     """
     Manages scraping results and storage.
     """
     
-    def __init__(self):
-        """Initialize the result manager."""
-        self.results = []
-        self.omitted_results = []
+    def __init__(self, flush_rows: int = 500, flush_interval: float = 5.0, columnar_store=None,
+                 results_index=None):
+        """
+        Initialize the result manager.
+
+        Args:
+            flush_rows: Buffered rows per CSV file that trigger a write
+            flush_interval: Maximum seconds a result stays buffered before being written
+            columnar_store: Optional ParquetResultStore that receives a copy of every row
+            results_index: Optional ResultsIndex (SQLite/FTS5) that receives a copy of every row
+        """
+        # Rows are written to disk as they arrive; only the count is kept in memory
+        self.saved_count = 0
         self.output_file = ""
         self.omitted_file = ""
+        self.omitted_count = 0
+        self.lang_files = {}
+        self.writer = CsvResultWriter(RESULT_COLUMNS, flush_rows=flush_rows, flush_interval=flush_interval)
+        # Omitted results go to a line-oriented log with the same bounded buffering as the results
+        self.omitted_writer = CsvResultWriter(OMITTED_COLUMNS, flush_rows=flush_rows, flush_interval=flush_interval)
+        self.columnar_store = columnar_store
+        self.results_index = results_index
     
     def initialize_output_files(self, from_sic: str, to_sic: str, from_course: str, to_course: str, search_engine: str = '', worker_id: Optional[int] = None) -> tuple[str, str]:
         """
@@ -39,6 +149,13 @@ class ResultManager:
         from_course_sanitized = '_'.join(from_course.split()[:2]) if from_course else ''
         to_course_sanitized = '_'.join(to_course.split()[:2]) if to_course else ''
         
+        # Close the handles of the previous run before switching files
+        self.writer.close()
+        self.omitted_writer.close()
+        self.lang_files = {}
+        self.saved_count = 0
+        self.omitted_count = 0
+
         # Create timestamp for filenames
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
@@ -62,12 +179,8 @@ class ResultManager:
             f"results_{base_filename}.csv"
         )
         
-        # Create empty CSV file with predefined columns
-        columns = [
-            'sic_code', 'course_name', 'title', 
-            'description', 'url', 'total_words', 'lang'
-        ]
-        pd.DataFrame(columns=columns).to_csv(self.output_file, index=False)
+        # Create the CSV file with its header and keep the handle open for appends
+        self.writer.open(self.output_file)
         
         logger.info(f"CSV file created for worker {worker_id} in EN folder: {self.output_file}")
         
@@ -75,35 +188,33 @@ class ResultManager:
         omitted_dir = os.path.join(base_results_dir, 'omitidos')
         os.makedirs(omitted_dir, exist_ok=True)
         
-        # Create omitted file path
+        # Create omitted file path (the log is only created when the first result is omitted)
         self.omitted_file = os.path.join(
             omitted_dir, 
-            f"omitidos_{base_filename}.xlsx"
+            f"omitidos_{base_filename}.csv"
         )
         
         logger.info(f"File for omitted results for worker {worker_id}: {self.omitted_file}")
         
         return self.output_file, self.omitted_file
     
-    def add_result(self, result: Dict[str, Any]) -> bool:
+    def add_result(self, result: Dict[str, Any]) -> int:
         """
-        Adds a result to the results list and CSV file, routing to language folder if needed.
+        Adds a result to the CSV files, routing to language folders if needed.
         
         Args:
             result: Result dictionary
             
         Returns:
-            True if successful, False otherwise
+            Number of rows written (one per language), 0 on failure
         """
         try:
-            # Add to results list
-            self.results.append(result)
-            
-            # Add to CSV file
-            return self.append_to_csv(result)
+            rows = self.append_to_csv(result)
+            self.saved_count += rows
+            return rows
         except Exception as e:
             logger.error(f"Error adding result: {str(e)}")
-            return False
+            return 0
 
     def _get_file_path_for_lang(self, lang: str) -> str:
         """Helper to get or create file path for a specific language."""
@@ -111,10 +222,6 @@ class ResultManager:
         
         # Consistent routing: results/[LANG.upper()]/results_..._[lang].csv
         
-        # Initialize lang_files map if needed
-        if not hasattr(self, 'lang_files'):
-            self.lang_files = {}
-            
         # If it's English and we already set output_file, use it (it's already in results/EN/)
         if lang == 'en':
             return self.output_file
@@ -139,12 +246,8 @@ class ResultManager:
             
             # Initialize with headers if new
             if not os.path.exists(lang_file_path):
-                columns = [
-                    'sic_code', 'course_name', 'title', 
-                    'description', 'url', 'total_words', 'lang'
-                ]
-                pd.DataFrame(columns=columns).to_csv(lang_file_path, index=False)
                 logger.info(f"Created new language result file: {lang_file_path}")
+            self.writer.open(lang_file_path)
                 
             self.lang_files[lang] = lang_file_path
             return lang_file_path
@@ -155,144 +258,148 @@ class ResultManager:
 
     def append_to_csv(self, result: Dict[str, Any]) -> bool:
         """
-        Appends a result to the appropriate CSV file based on language.
+        Appends a result to the CSV file of each of its languages.
+
+        A result may carry 'langs' (every language the document is available in); it is
+        scored once and fanned out here, one row per language file. Without 'langs' the
+        row goes to the file of 'lang'.
         
         Args:
             result: Result dictionary
             
         Returns:
-            True if successful, False otherwise
+            Number of rows written, 0 on failure
         """
+        rows = 0
         try:
-            lang = result.get('lang', 'en')
-            target_file = self._get_file_path_for_lang(lang)
-            
-            df = pd.DataFrame([result])
-            # Ensure 'lang' column exists in dataframe used for appending
-            if 'lang' not in df.columns:
-                 df['lang'] = lang
-            
-            # Append without writing header
-            df.to_csv(target_file, mode='a', header=False, index=False)
-            return True
+            langs = result.get('langs') or [result.get('lang', 'en')]
+            for lang in langs:
+                target_file = self._get_file_path_for_lang(lang)
+
+                # Ensure 'lang' column is always filled with the language of this file
+                row = result if result.get('lang') == lang else {**result, 'lang': lang}
+
+                # Buffered append through the open handle (written on flush)
+                self.writer.write(target_file, row)
+                if self.columnar_store is not None:
+                    self._write_columnar(row)
+                if self.results_index is not None:
+                    self._write_index(row, target_file)
+                rows += 1
+            return rows
         except Exception as e:
             logger.error(f"Error appending to CSV: {str(e)}")
-            return False
+            return rows
     
-    def save_omitted_to_excel(self) -> str:
+    def add_omitted_result(self, result: Dict[str, Any], reason: Optional[str] = None) -> bool:
         """
-        Saves omitted results to an Excel file.
+        Appends an omitted result to the omitted-results log (buffered, written on flush).
         
+        Args:
+            result: Omitted result dictionary
+            reason: Omission reason (overrides result['omission_reason'])
+            
         Returns:
-            Path to the saved file
+            True if successful, False otherwise
         """
         try:
-            if not self.omitted_results:
-                logger.warning("No omitted results to save")
-                
-                # Even if there are no results, ensure we create an empty Excel file
+            if not self.omitted_file:
+                omitted_dir = os.path.join('results', 'omitidos')
+                os.makedirs(omitted_dir, exist_ok=True)
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                # If self.omitted_file is not set, create a default path
-                if not self.omitted_file:
-                    omitted_dir = 'omitidos'
-                    os.makedirs(omitted_dir, exist_ok=True)
-                    self.omitted_file = os.path.join(omitted_dir, f"omitidos_{timestamp}.xlsx")
-                
-                # Create an empty Excel file
-                wb = openpyxl.Workbook()
-                ws = wb.active
-                ws.title = "Omitted Results"
-                
-                # Add a note that there are no omitted results
-                ws.cell(row=1, column=1, value="No se omitieron resultados durante el proceso.")
-                
-                # Ensure the output directory exists
-                output_dir = os.path.dirname(self.omitted_file)
-                if output_dir and not os.path.exists(output_dir):
-                    os.makedirs(output_dir, exist_ok=True)
-                    logger.info(f"Omitted directory created: {output_dir}")
-                
-                # Save the file
-                wb.save(self.omitted_file)
-                logger.info(f"Empty omitted results file created at: {self.omitted_file}")
-                
-                return self.omitted_file
-            
-            # Create a new workbook
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Omitted Results"
-            
-            # Define styles
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="0066CC", end_color="0066CC", fill_type="solid")
-            
-            # Add headers
-            headers = ['Código SIC', 'Nombre del Curso', 'Título', 'URL', 'Descripción', 'Razón de Omisión']
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col_num, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-            
-            # Add data
-            for row_num, result in enumerate(self.omitted_results, 2):
-                ws.cell(row=row_num, column=1, value=result.get('sic_code', ''))
-                ws.cell(row=row_num, column=2, value=result.get('course_name', ''))
-                ws.cell(row=row_num, column=3, value=result.get('title', ''))
-                ws.cell(row=row_num, column=4, value=result.get('url', ''))
-                ws.cell(row=row_num, column=5, value=result.get('description', ''))
-                ws.cell(row=row_num, column=6, value=result.get('omission_reason', ''))
-            
-            # Adjust column widths
-            for col in ws.columns:
-                max_length = 0
-                column = col[0].column_letter
-                for cell in col:
-                    if cell.value:
-                        cell_length = len(str(cell.value))
-                        if cell_length > max_length:
-                            max_length = cell_length
-                adjusted_width = (max_length + 2) if max_length < 50 else 50
-                ws.column_dimensions[column].width = adjusted_width
-            
-            # Ensure the output directory exists
-            output_dir = os.path.dirname(self.omitted_file)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir, exist_ok=True)
-                logger.info(f"Omitted directory created: {output_dir}")
-            
-            # Get absolute path
-            abs_output_file = os.path.abspath(self.omitted_file)
-            
-            # Save to Excel
-            wb.save(self.omitted_file)
-            
-            logger.info(f"Saved {len(self.omitted_results)} omitted results to {abs_output_file}")
-            
-            return abs_output_file
+                self.omitted_file = os.path.join(omitted_dir, f"omitidos_{timestamp}.csv")
+            row = result if reason is None else {**result, 'omission_reason': reason}
+            self.omitted_writer.write(self.omitted_file, row)
+            self.omitted_count += 1
+            return True
+        except Exception as e:
+            logger.error(f"Error logging omitted result: {str(e)}")
+            return False
+
+    def _write_columnar(self, row: Dict[str, Any]) -> None:
+        """Copies a row to the columnar store; the CSV stays the source of truth if it fails."""
+        try:
+            self.columnar_store.write(row)
+        except Exception as e:
+            logger.error(f"Error writing result to the Parquet store: {e}")
+
+    def _write_index(self, row: Dict[str, Any], target_file: str) -> None:
+        """Copies a row to the results index; a file missing from the index is backfilled on query."""
+        try:
+            self.results_index.add(row, target_file)
+        except Exception as e:
+            logger.error(f"Error writing result to the results index: {e}")
+
+    def flush(self, fsync: bool = False) -> None:
+        """
+        Writes all buffered results (and omitted results) to their files.
+
+        Args:
+            fsync: Also force the data to disk (used at course boundaries); this is also
+                when the Parquet store gets the chance to compact its small files
+        """
+        self.writer.flush(fsync=fsync)
+        self.omitted_writer.flush(fsync=fsync)
+        if self.columnar_store is not None:
+            self.columnar_store.flush()
+            if fsync:
+                self.columnar_store.maybe_compact()
+        if self.results_index is not None:
+            self.results_index.flush()
+
+    def close(self) -> None:
+        """Flushes and closes all open result files (on stop, error or end of run)."""
+        self.writer.close()
+        self.omitted_writer.close()
+        if self.columnar_store is not None:
+            try:
+                self.columnar_store.close()
+            except Exception as e:
+                logger.error(f"Error closing the Parquet store: {e}")
+        if self.results_index is not None:
+            self.results_index.flush()
+
+    def save_omitted_to_excel(self, xlsx_path: Optional[str] = None) -> str:
+        """
+        Exports the omitted-results log of this run to Excel (on demand).
+        
+        Args:
+            xlsx_path: Target file (defaults to the log path with an .xlsx extension)
             
+        Returns:
+            Path to the saved file, or "" if there is nothing to export
+        """
+        try:
+            self.omitted_writer.close(self.omitted_file)
+            if not self.omitted_file or not os.path.exists(self.omitted_file):
+                logger.warning("No omitted results to save")
+                return ""
+            return export_omitted_to_excel(self.omitted_file, xlsx_path)
         except Exception as e:
             logger.error(f"Error saving omitted results to Excel: {str(e)}")
             return ""
     
-    def get_results(self) -> List[Dict[str, Any]]:
+    def iter_omitted_results(self) -> Iterator[Dict[str, Any]]:
         """
-        Gets the list of results.
+        Reads the omitted results of this run back from the log.
         
-        Returns:
-            List of result dictionaries
+        Yields:
+            Omitted result dictionaries
         """
-        return self.results
-    
+        self.omitted_writer.flush()
+        if not self.omitted_file or not os.path.exists(self.omitted_file):
+            return
+        with open(self.omitted_file, 'r', encoding='utf-8', newline='') as f:
+            yield from csv.DictReader(f)
+
     def get_omitted_results(self) -> List[Dict[str, Any]]:
         """
-        Gets the list of omitted results.
+        Gets the list of omitted results (loads the whole log; prefer iter_omitted_results).
         
         Returns:
             List of omitted result dictionaries
         """
-        return self.omitted_results
+        return list(self.iter_omitted_results())
     
     def get_output_file(self) -> str:
         """
@@ -321,6 +428,9 @@ class ResultManager:
             True si se eliminó algún archivo, False si no
         """
         deleted_any = False
+
+        # Los ficheros se inspeccionan en disco: volcar y cerrar los handles primero
+        self.close()
         
         # 1. Limpiar archivo CSV principal
         if self.output_file and os.path.exists(self.output_file):
@@ -335,7 +445,7 @@ class ResultManager:
                 logger.error(f"Error limpiando output_file: {e}")
         
         # 2. Limpiar archivos por idioma (ES, FR, DE, etc.)
-        if hasattr(self, 'lang_files') and self.lang_files:
+        if self.lang_files:
             for lang in list(self.lang_files.keys()):
                 filepath = self.lang_files[lang]
                 if os.path.exists(filepath):
@@ -350,11 +460,12 @@ class ResultManager:
                     except Exception as e:
                         logger.error(f"Error limpiando lang_file {filepath}: {e}")
         
-        # 3. Limpiar archivo omitidos (xlsx)
+        # 3. Limpiar archivo de omitidos (solo cabecera)
         if self.omitted_file and os.path.exists(self.omitted_file):
             try:
-                file_size = os.path.getsize(self.omitted_file)
-                if file_size < 200:  # Archivo xlsx vacío es muy pequeño
+                with open(self.omitted_file, 'r', encoding='utf-8') as f:
+                    has_rows = next(f, None) is not None and next(f, None) is not None
+                if not has_rows:
                     os.remove(self.omitted_file)
                     logger.info(f"Eliminado archivo omitidos vacío: {self.omitted_file}")
                     deleted_any = True
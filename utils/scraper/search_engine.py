@@ -16,6 +16,7 @@ from utils.scraper.url_utils import URLUtils
 from utils.captcha_solver import CaptchaSolver
 from utils.scraper.cordis_api_client import CordisApiClient
 from utils.scraper.google_ai_scraper import GoogleAIScraper
+from utils.scraper.http_session_pool import HttpSessionPool
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +29,10 @@ class SearchEngine:
     Handles searching on different search engines and extracting search results.
     """
     
-    def __init__(self, browser_manager: BrowserManager, text_processor: TextProcessor, config_manager=None):
+    def __init__(self, browser_manager: BrowserManager, text_processor: TextProcessor, config_manager=None, http_pool: Optional[HttpSessionPool] = None):
         self.browser_manager = browser_manager
+        # Pool HTTP compartido del worker (se crea uno propio si no se indica)
+        self.http_pool = http_pool or HttpSessionPool()
         self.text_processor = text_processor
         self.url_utils = URLUtils()
         self._search_cache = {}
@@ -378,24 +381,24 @@ class SearchEngine:
                 "collapse": "urlkey",
                 "limit": max_items
             }
-            async with aiohttp.ClientSession() as session:
-                async with session.get(cdx_base, params=params, timeout=30) as resp:
-                    if resp.status == 200:
-                        try:
-                            data = await resp.json()
-                        except Exception:
-                            data = []
-                        if isinstance(data, list) and len(data) > 1:
-                            for row in data[1:]:
-                                try:
-                                    original = row[2] if len(row) > 2 else None
-                                    timestamp = row[1] if len(row) > 1 else None
-                                    if not original:
-                                        continue
-                                    wayback_url = f"https://web.archive.org/web/{timestamp}/{original}" if timestamp else original
-                                    urls.append(wayback_url)
-                                except Exception:
+            session = await self.http_pool.get_session()
+            async with session.get(cdx_base, params=params, timeout=aiohttp.ClientTimeout(total=30)) as resp:
+                if resp.status == 200:
+                    try:
+                        data = await resp.json()
+                    except Exception:
+                        data = []
+                    if isinstance(data, list) and len(data) > 1:
+                        for row in data[1:]:
+                            try:
+                                original = row[2] if len(row) > 2 else None
+                                timestamp = row[1] if len(row) > 1 else None
+                                if not original:
                                     continue
+                                wayback_url = f"https://web.archive.org/web/{timestamp}/{original}" if timestamp else original
+                                urls.append(wayback_url)
+                            except Exception:
+                                continue
         except Exception as e:
             logger.warning(f"_fetch_cdx_urls failed: {e}")
         return urls
@@ -1,6 +1,7 @@
 import re
 import logging
-from typing import List, Dict, Set, Tuple
+from collections import Counter
+from typing import List, Dict, Optional, Set, Tuple
 from functools import lru_cache
 
 logger = logging.getLogger(__name__)
@@ -15,6 +16,74 @@ URL_REF_PATTERN = re.compile(r'\s+(?:visita|ver|visitar|click|enlace|link|url|ve
 DOMAIN_PATTERN = re.compile(r'\s+\w+\.\w+(?:\.\w+)*(?:/\S*)?')
 MULTI_SPACE_PATTERN = re.compile(r'\s+')
 
+# Compiled keyword matchers kept per TextProcessor (one per distinct search term)
+KEYWORD_MATCHER_CACHE_SIZE = 256
+
+
+def parse_word_counts(formatted: str) -> Tuple[int, Dict[str, int]]:
+    """
+    Parses the 'total_words' column written by TextProcessor.format_word_counts.
+
+    Args:
+        formatted: "Total words: 812 | Iron: 12 | Ore: 5" (a plain number is also accepted)
+
+    Returns:
+        Tuple of (total words, {keyword: count})
+    """
+    total_words = 0
+    word_counts: Dict[str, int] = {}
+    for part in str(formatted or '').split('|'):
+        name, sep, value = part.rpartition(':')
+        if not sep:
+            name, value = 'Total words', part
+        try:
+            count = int(float(value.strip()))
+        except ValueError:
+            continue
+        name = name.strip()
+        if name == 'Total words':
+            total_words = count
+        elif name:
+            word_counts[name] = count
+    return total_words, word_counts
+
+
+class KeywordMatcher:
+    """
+    Counts every keyword of a search term in a single pass over a document.
+
+    Keywords are whole \\w+ tokens, so a \\b-delimited alternation finds each occurrence
+    exactly once; the counts match one `\\bword\\b` scan per keyword.
+    """
+
+    def __init__(self, keywords: Set[str]):
+        """
+        Args:
+            keywords: Lowercase keywords to count
+        """
+        self.keywords = frozenset(keywords)
+        self._pattern: Optional[re.Pattern] = None
+        if self.keywords:
+            # Longest first so a keyword is never shadowed by a shorter prefix
+            alternation = '|'.join(re.escape(word) for word in sorted(self.keywords, key=len, reverse=True))
+            self._pattern = re.compile(r'\b(?:' + alternation + r')\b')
+
+    def count(self, content: str) -> Dict[str, int]:
+        """
+        Counts keyword occurrences in the content.
+
+        Args:
+            content: Document content
+
+        Returns:
+            Dictionary {Keyword: count} with only the keywords found
+        """
+        if not content or self._pattern is None:
+            return {}
+        counts = Counter(self._pattern.findall(content.lower()))
+        return {word.capitalize(): count for word, count in counts.items()}
+
+
 class TextProcessor:
     """
     Processes and analyzes text content.
@@ -37,6 +106,8 @@ class TextProcessor:
         self._significant_words_cache = {}
         # Límite de caché para evitar uso excesivo de memoria
         self._cache_limit = 1000
+        # Compiled matchers per search term (every result of a course shares the same term)
+        self.get_keyword_matcher = lru_cache(maxsize=KEYWORD_MATCHER_CACHE_SIZE)(self._build_keyword_matcher)
     
     def filter_stop_words(self, query: str) -> str:
         """
@@ -121,10 +192,23 @@ class TextProcessor:
         """
         return len(self.get_significant_words(text))
 
+    def _build_keyword_matcher(self, search_term: str) -> KeywordMatcher:
+        """
+        Builds the matcher for a search term (use get_keyword_matcher, which caches it).
+
+        Args:
+            search_term: Search term
+
+        Returns:
+            KeywordMatcher for the significant words longer than 2 characters
+        """
+        search_words = self.get_significant_words(search_term) if search_term else []
+        return KeywordMatcher({word for word in search_words if len(word) > 2})
+
     def estimate_keyword_occurrences(self, content: str, search_term: str) -> Dict[str, int]:
         """
         Counts occurrences of each keyword from the search term in the content.
-        Uses regex with word boundaries for accurate counting.
+        All keywords are counted in one pass with the cached matcher of the search term.
         
         Args:
             content: Full document content
@@ -135,25 +219,7 @@ class TextProcessor:
         """
         if not content or not search_term:
             return {}
-
-        content_lower = content.lower()
-        word_counts = {}
-        
-        # Get significant words from the search term
-        search_words = self.get_significant_words(search_term)
-        
-        for word in set(search_words):  # Use set to avoid duplicate counting
-            if len(word) > 2:
-                try:
-                    # Use word boundaries for accurate counting
-                    pattern = r'\b' + re.escape(word) + r'\b'
-                    count = len(re.findall(pattern, content_lower))
-                    if count > 0:
-                        word_counts[word.capitalize()] = count
-                except re.error as e:
-                    logger.warning(f"Regex error for word '{word}': {e}")
-
-        return word_counts
+        return self.get_keyword_matcher(search_term).count(content)
 
     def format_word_counts(self, total_count: int, word_counts: Dict[str, int]) -> str:
         """
@@ -0,0 +1,533 @@
+"""
+SharedStateTable: tabla de estado de workers y cursos en memoria compartida.
+
+Sustituye a los dict proxies del SyncManager para worker_states/course_states. Cada worker
+y cada curso ocupan un slot de tamaño fijo dentro de un bloque multiprocessing.shared_memory,
+de modo que escribir un estado es un struct.pack_into local (sin RPC al proceso Manager).
+
+Cada slot está protegido por un seqlock: el escritor pone la secuencia en impar, escribe
+y la deja en par; el lector reintenta si la ve impar o si cambió durante la lectura. Cada
+slot tiene un único escritor en cada momento, así que escribir no toma ningún lock:
+
+- El slot de un worker lo escribe su proceso; el de un curso, el servidor al encolarlo
+  ("Pendiente") y después solo el worker que lo procesa.
+- Lo que el servidor cambia de un estado ajeno (parar, reiniciar) va a una nota aparte,
+  escrita solo por el servidor, que se superpone al slot mientras el worker no lo reescriba.
+- clear() no toca los slots: avanza la generación y las filas de generaciones anteriores
+  dejan de leerse.
+
+Las vistas (workers/courses) exponen una interfaz tipo dict para no cambiar los puntos de
+escritura existentes, y snapshot() construye todos los estados de una sola copia del bloque.
+"""
+
+import logging
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Códigos de estado (el índice en la tupla es el código; 0 = slot libre)
+STATUS_NAMES = (
+    "",
+    "Idle",
+    "Initializing",
+    "working",
+    "finished",
+    "Error",
+    "Detenido",
+    "Pendiente",
+    "Procesando",
+    "Completado",
+    "Fallido",
+    "Otro",
+)
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES) if name}
+
+TEXT_SIZE = 200  # current_task / error (UTF-8 truncado)
+SIC_SIZE = 32
+
+# Cabecera (solo la escribe el servidor): generaciones de workers y de cursos (se incrementan
+# en cada clear), capacidades y slots de curso usados
+_HEADER = struct.Struct("<QQIII")
+# Worker: seq, version, generation, status, active, progress, urls, saved, omitted, errors,
+# cache hits, cache misses, task
+_WORKER = struct.Struct(f"<QQQBBxxfIIIIII{TEXT_SIZE}s")
+# Curso: seq, version, generation, status, progress, sic, error
+_COURSE = struct.Struct(f"<QQQBxxxf{SIC_SIZE}s{TEXT_SIZE}s")
+# Nota del servidor sobre un slot: seq, version, generation, versión del slot a la que se
+# aplica, status, campos (NOTE_PROGRESS | NOTE_TEXT), progress, texto (current_task / error)
+_NOTE = struct.Struct(f"<QQQQBBxxf{TEXT_SIZE}s")
+NOTE_PROGRESS = 1
+NOTE_TEXT = 2
+
+# Segundos que un lector espera a que un escritor termine un slot antes de darlo por
+# ilegible (un proceso terminado a la fuerza puede dejarlo a medio escribir)
+READ_TIMEOUT = 0.05
+
+_WORKER_COUNTERS = (
+    "total_urls_found", "files_saved", "omitted_count",
+    "error_count", "cordis_cache_hits", "cordis_cache_misses",
+)
+
+
+def _encode_text(value: Any, size: int) -> bytes:
+    """Codifica un texto en UTF-8 truncándolo a `size` bytes sin partir caracteres."""
+    data = str(value or "").encode("utf-8")[:size]
+    return data.decode("utf-8", errors="ignore").encode("utf-8")
+
+
+def _decode_text(raw: bytes) -> str:
+    return raw.rstrip(b"\x00").decode("utf-8", errors="ignore")
+
+
+def _status_code(status: Any) -> int:
+    return STATUS_CODES.get(status, STATUS_CODES["Otro"]) if status else 0
+
+
+class SharedStateTable:
+    """
+    Bloque de memoria compartida con un slot por worker y uno por curso.
+    """
+
+    def __init__(self, max_workers: int = 128, max_courses: int = 32768, name: Optional[str] = None):
+        """
+        Crea la tabla (name=None) o se adjunta a una existente.
+
+        Args:
+            max_workers: Número de slots de worker (índice = worker_id)
+            max_courses: Número máximo de cursos por trabajo
+            name: Nombre del bloque existente al que adjuntarse (procesos worker)
+        """
+        self._owner = name is None
+        if self._owner:
+            size = (_HEADER.size + max_workers * _WORKER.size + max_courses * _COURSE.size
+                    + (max_workers + max_courses) * _NOTE.size)
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.shm.buf[:size] = bytes(size)
+            _HEADER.pack_into(self.shm.buf, 0, 0, 0, max_workers, max_courses, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            _, _, max_workers, max_courses, _ = _HEADER.unpack_from(self.shm.buf, 0)
+
+        self.max_workers = max_workers
+        self.max_courses = max_courses
+        self._workers_offset = _HEADER.size
+        self._courses_offset = _HEADER.size + max_workers * _WORKER.size
+        # Notas de los workers (índice = worker_id) seguidas de las de los cursos (índice = slot)
+        self._notes_offset = self._courses_offset + max_courses * _COURSE.size
+        self.workers = WorkerStateView(self)
+        self.courses = CourseStateView(self)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def __reduce__(self):
+        # Al pasar la tabla (o una vista) a un proceso worker se adjunta por nombre
+        return (SharedStateTable, (self.max_workers, self.max_courses, self.shm.name))
+
+    # --- Cabecera ---
+
+    def _read_header(self) -> tuple:
+        """(generación de workers, generación de cursos, slots de curso usados), releyendo si se copió a medio escribir."""
+        while True:
+            header = _HEADER.unpack_from(self.shm.buf, 0)
+            if _HEADER.unpack_from(self.shm.buf, 0) == header:
+                return header[0], header[1], header[4]
+
+    def get_worker_generation(self) -> int:
+        return self._read_header()[0]
+
+    def get_generation(self) -> int:
+        """Generación de los slots de curso."""
+        return self._read_header()[1]
+
+    def get_used_courses(self) -> int:
+        return self._read_header()[2]
+
+    def _write_header(self, worker_generation: int, generation: int, used_courses: int) -> None:
+        _HEADER.pack_into(self.shm.buf, 0, worker_generation, generation, self.max_workers, self.max_courses, used_courses)
+
+    # --- Acceso a slots con seqlock (un escritor por slot) ---
+
+    def _write_slot(self, layout: struct.Struct, offset: int, *fields) -> None:
+        seq = struct.unpack_from("<Q", self.shm.buf, offset)[0]
+        start = seq + 1 if seq % 2 == 0 else seq + 2
+        struct.pack_into("<Q", self.shm.buf, offset, start)
+        layout.pack_into(self.shm.buf, offset, start, *fields)
+        struct.pack_into("<Q", self.shm.buf, offset, start + 1)
+
+    def _read_slot(self, layout: struct.Struct, offset: int, retries: int = 100) -> Optional[tuple]:
+        """Lee un slot completo; None si sigue a medio escribir tras READ_TIMEOUT (escritor muerto)."""
+        deadline = None
+        while True:
+            for _ in range(retries):
+                values = layout.unpack_from(self.shm.buf, offset)
+                seq = values[0]
+                if seq % 2 == 0 and struct.unpack_from("<Q", self.shm.buf, offset)[0] == seq:
+                    return values
+            if deadline is None:
+                deadline = time.monotonic() + READ_TIMEOUT
+            elif time.monotonic() >= deadline:
+                logger.warning(f"Slot de estado ilegible en el offset {offset}: escritura sin terminar")
+                return None
+            # Ceder la CPU al escritor
+            time.sleep(0)
+
+    def _read_region(self, layout: struct.Struct, offset: int, count: int) -> List[Optional[tuple]]:
+        """Lee `count` slots consecutivos con una sola copia y relee los que estaban a medio escribir."""
+        end = offset + count * layout.size
+        rows = list(layout.iter_unpack(bytes(self.shm.buf[offset:end])))
+        seqs_after = bytes(self.shm.buf[offset:end])
+        for i, row in enumerate(rows):
+            seq_now = struct.unpack_from("<Q", seqs_after, i * layout.size)[0]
+            if row[0] % 2 or row[0] != seq_now:
+                rows[i] = self._read_slot(layout, offset + i * layout.size)
+        return rows
+
+    # --- Notas del servidor ---
+
+    def _note_offset(self, index: int) -> int:
+        return self._notes_offset + index * _NOTE.size
+
+    def _write_note(self, index: int, version: int, generation: int, base_version: int,
+                    changes: Dict[str, Any], text_key: str) -> None:
+        """Publica una nota del servidor para el slot de nota `index` (solo el propietario escribe notas)."""
+        fields = 0
+        if "progress" in changes:
+            fields |= NOTE_PROGRESS
+        if text_key in changes:
+            fields |= NOTE_TEXT
+        self._write_slot(
+            _NOTE, self._note_offset(index), version, generation, base_version,
+            _status_code(changes.get("status")), fields, float(changes.get("progress", 0) or 0),
+            _encode_text(changes.get(text_key, ""), TEXT_SIZE),
+        )
+
+    @staticmethod
+    def _apply_note(state: Dict[str, Any], row: tuple, note: Optional[tuple], text_key: str) -> Dict[str, Any]:
+        """
+        Superpone la nota al estado del slot si se escribió sobre esta misma versión del slot
+        (misma generación y versión): si el worker escribió después, su estado prevalece.
+        """
+        if note is None:
+            return state
+        _, version, generation, base_version, status, fields, progress, text = note
+        if status == 0 or generation != row[2] or base_version != row[1]:
+            return state
+        state["status"] = STATUS_NAMES[status] if status < len(STATUS_NAMES) else "Otro"
+        state["version"] = version
+        if fields & NOTE_PROGRESS:
+            state["progress"] = round(progress, 2)
+        if fields & NOTE_TEXT:
+            state[text_key] = _decode_text(text)
+        return state
+
+    def close(self) -> None:
+        """Libera el bloque (y lo elimina si este proceso lo creó)."""
+        # Las vistas guardan memoryviews del bloque; soltarlas antes de cerrar
+        self.workers = None
+        self.courses = None
+        try:
+            self.shm.close()
+        except Exception as e:
+            logger.debug(f"Error cerrando la tabla de estado compartida: {e}")
+        if self._owner:
+            try:
+                self.shm.unlink()
+            except Exception as e:
+                logger.debug(f"Error eliminando la tabla de estado compartida: {e}")
+
+
+class WorkerStateView:
+    """Vista tipo dict {worker_id: estado} sobre los slots de worker."""
+
+    def __init__(self, table: SharedStateTable):
+        self._table = table
+
+    def __reduce__(self):
+        return (_attach_view, (self._table, "workers"))
+
+    def _offset(self, worker_id: int) -> int:
+        worker_id = int(worker_id)
+        if not 0 <= worker_id < self._table.max_workers:
+            raise KeyError(worker_id)
+        return self._table._workers_offset + worker_id * _WORKER.size
+
+    @staticmethod
+    def _to_dict(worker_id: int, row: tuple, note: Optional[tuple]) -> Dict[str, Any]:
+        _, version, _, status, active, progress, *counters, task = row
+        state = {
+            "id": worker_id,
+            "status": STATUS_NAMES[status] if status < len(STATUS_NAMES) else "Otro",
+            "active": bool(active),
+            "progress": round(progress, 2),
+            "current_task": _decode_text(task),
+            "version": version,
+        }
+        state.update(zip(_WORKER_COUNTERS, counters))
+        return SharedStateTable._apply_note(state, row, note, "current_task")
+
+    def _read(self, worker_id) -> tuple:
+        """(fila, nota) del worker; KeyError si el slot está libre o es de una generación anterior."""
+        row = self._table._read_slot(_WORKER, self._offset(worker_id))
+        if row is None or row[3] == 0 or row[2] != self._table.get_worker_generation():
+            raise KeyError(worker_id)
+        return row, self._table._read_slot(_NOTE, self._table._note_offset(int(worker_id)))
+
+    def __getitem__(self, worker_id) -> Dict[str, Any]:
+        return self._to_dict(int(worker_id), *self._read(worker_id))
+
+    def __setitem__(self, worker_id, state: Dict[str, Any]) -> None:
+        # Solo lo llama el proceso del worker: es el único escritor de su slot
+        self._table._write_slot(
+            _WORKER,
+            self._offset(worker_id),
+            int(state.get("version", 0)),
+            self._table.get_worker_generation(),
+            _status_code(state.get("status")) or STATUS_CODES["Otro"],
+            1 if state.get("active") else 0,
+            float(state.get("progress", 0) or 0),
+            *(int(state.get(key, 0) or 0) & 0xFFFFFFFF for key in _WORKER_COUNTERS),
+            _encode_text(state.get("current_task", ""), TEXT_SIZE),
+        )
+
+    def annotate(self, worker_id, changes: Dict[str, Any], version: int,
+                 only_if_status: Optional[str] = None) -> bool:
+        """
+        Cambia el estado de un worker desde el servidor sin escribir su slot (ver _apply_note).
+
+        Returns:
+            True si se publicó la nota
+        """
+        if not self._table._owner:
+            raise RuntimeError("Solo el servidor puede anotar estados")
+        try:
+            row, note = self._read(worker_id)
+        except KeyError:
+            return False
+        if only_if_status is not None and self._to_dict(int(worker_id), row, note)["status"] != only_if_status:
+            return False
+        self._table._write_note(int(worker_id), version, row[2], row[1], changes, "current_task")
+        return True
+
+    def __contains__(self, worker_id) -> bool:
+        try:
+            self._read(worker_id)
+            return True
+        except KeyError:
+            return False
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def __bool__(self) -> bool:
+        return True
+
+    def keys(self) -> List[int]:
+        return list(self.snapshot().keys())
+
+    def items(self):
+        return self.snapshot().items()
+
+    def snapshot(self) -> Dict[int, Dict[str, Any]]:
+        """Estados de todos los workers en uso a partir de una única copia del bloque."""
+        table = self._table
+        generation = table.get_worker_generation()
+        rows = table._read_region(_WORKER, table._workers_offset, table.max_workers)
+        notes = table._read_region(_NOTE, table._notes_offset, table.max_workers)
+        return {
+            wid: self._to_dict(wid, row, notes[wid])
+            for wid, row in enumerate(rows)
+            if row is not None and row[3] != 0 and row[2] == generation
+        }
+
+    def clear(self) -> None:
+        """Descarta los estados de todos los workers (avanza la generación; los slots no se tocan)."""
+        worker_generation, generation, used = self._table._read_header()
+        self._table._write_header(worker_generation + 1, generation, used)
+
+
+class CourseStateView:
+    """
+    Vista tipo dict {sic: estado} sobre los slots de curso.
+
+    El servidor asigna un slot a cada SIC al encolar el trabajo, guarda el nombre del curso
+    en local y publica en la cabecera cuántos slots hay en uso; los workers resuelven
+    SIC -> slot leyendo solo los slots nuevos desde la última vez (y rehacen el índice
+    cuando la generación cambia tras un clear()). Un SIC desconocido cuesta una lectura
+    de la cabecera mientras no se añadan cursos.
+    """
+
+    def __init__(self, table: SharedStateTable):
+        self._table = table
+        self._index: Dict[str, int] = {}
+        self._names: Dict[str, str] = {}
+        self._generation = table.get_generation()
+        # Slots ya incorporados al índice (workers) / siguiente slot libre (servidor)
+        self._indexed = 0
+        self._next_slot = 0
+
+    def __reduce__(self):
+        return (_attach_view, (self._table, "courses"))
+
+    def _offset(self, slot: int) -> int:
+        return self._table._courses_offset + slot * _COURSE.size
+
+    def _note_index(self, slot: int) -> int:
+        return self._table.max_workers + slot
+
+    def _sync_index(self) -> None:
+        """Incorpora al índice SIC -> slot los slots que el servidor añadió desde la última vez."""
+        _, generation, used = self._table._read_header()
+        if generation != self._generation:
+            self._index = {}
+            self._indexed = 0
+            self._generation = generation
+        if used > self._indexed:
+            rows = self._table._read_region(_COURSE, self._offset(self._indexed), used - self._indexed)
+            for i, row in enumerate(rows):
+                if row is not None and row[3] != 0 and row[2] == generation:
+                    self._index[_decode_text(row[5])] = self._indexed + i
+            self._indexed = used
+
+    def _slot_for(self, sic: str) -> Optional[int]:
+        if self._table._owner:
+            return self._index.get(sic)
+        if self._generation != self._table.get_generation():
+            self._sync_index()
+        slot = self._index.get(sic)
+        if slot is None:
+            # Puede que el servidor haya añadido cursos desde la última vez
+            self._sync_index()
+            slot = self._index.get(sic)
+        return slot
+
+    def _to_dict(self, row: tuple, note: Optional[tuple]) -> Dict[str, Any]:
+        _, version, _, status, progress, sic, error = row
+        sic = _decode_text(sic)
+        state = {
+            "sic": sic,
+            "name": self._names.get(sic, ""),
+            "status": STATUS_NAMES[status] if status < len(STATUS_NAMES) else "Otro",
+            "progress": round(progress, 2),
+            "version": version,
+        }
+        error = _decode_text(error)
+        if error:
+            state["error"] = error
+            state["last_error"] = error
+        return SharedStateTable._apply_note(state, row, note, "error")
+
+    def _read(self, sic: str) -> tuple:
+        """(slot, fila, nota) del curso; KeyError si no está en el trabajo actual."""
+        slot = self._slot_for(sic)
+        if slot is None:
+            raise KeyError(sic)
+        row = self._table._read_slot(_COURSE, self._offset(slot))
+        if row is None or row[2] != self._generation:
+            raise KeyError(sic)
+        return slot, row, self._table._read_slot(_NOTE, self._table._note_offset(self._note_index(slot)))
+
+    def __getitem__(self, sic: str) -> Dict[str, Any]:
+        _, row, note = self._read(sic)
+        return self._to_dict(row, note)
+
+    def __setitem__(self, sic: str, state: Dict[str, Any]) -> None:
+        # Escriben el servidor (al encolar) y después solo el worker que procesa el curso
+        slot = self._slot_for(sic)
+        if slot is None:
+            if not self._table._owner:
+                raise KeyError(sic)
+            if self._next_slot >= self._table.max_courses:
+                raise ValueError(f"Tabla de estado llena: máximo {self._table.max_courses} cursos por trabajo")
+            slot = self._next_slot
+            self._next_slot += 1
+            self._index[sic] = slot
+        if "name" in state:
+            self._names[sic] = state["name"]
+        self._table._write_slot(
+            _COURSE,
+            self._offset(slot),
+            int(state.get("version", 0)),
+            self._generation,
+            _status_code(state.get("status")) or STATUS_CODES["Otro"],
+            float(state.get("progress", 0) or 0),
+            _encode_text(sic, SIC_SIZE),
+            _encode_text(state.get("error") or state.get("last_error") or "", TEXT_SIZE),
+        )
+        if self._table._owner and self._next_slot > self._table.get_used_courses():
+            # Publicar el slot nuevo después de escribirlo
+            worker_generation, _, _ = self._table._read_header()
+            self._table._write_header(worker_generation, self._generation, self._next_slot)
+
+    def annotate(self, sic: str, changes: Dict[str, Any], version: int,
+                 only_if_status: Optional[str] = None) -> bool:
+        """
+        Cambia el estado de un curso desde el servidor sin escribir su slot (ver _apply_note).
+
+        Returns:
+            True si se publicó la nota
+        """
+        if not self._table._owner:
+            raise RuntimeError("Solo el servidor puede anotar estados")
+        try:
+            slot, row, note = self._read(sic)
+        except KeyError:
+            return False
+        if only_if_status is not None and self._to_dict(row, note)["status"] != only_if_status:
+            return False
+        self._table._write_note(self._note_index(slot), version, row[2], row[1], changes, "error")
+        return True
+
+    def __contains__(self, sic: str) -> bool:
+        return self._slot_for(sic) is not None
+
+    def __len__(self) -> int:
+        if not self._table._owner:
+            self._sync_index()
+        return len(self._index)
+
+    def __bool__(self) -> bool:
+        return True
+
+    def keys(self) -> List[str]:
+        return list(self.snapshot().keys())
+
+    def items(self):
+        return self.snapshot().items()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Estados de todos los cursos del trabajo actual a partir de una única copia del bloque."""
+        table = self._table
+        _, generation, used = table._read_header()
+        count = self._next_slot if table._owner else used
+        rows = table._read_region(_COURSE, table._courses_offset, count)
+        notes = table._read_region(_NOTE, table._note_offset(self._note_index(0)), count)
+        result = {}
+        for row, note in zip(rows, notes):
+            if row is not None and row[3] != 0 and row[2] == generation:
+                state = self._to_dict(row, note)
+                result[state["sic"]] = state
+        return result
+
+    def clear(self) -> None:
+        """
+        Vacía el trabajo actual: avanza la generación (las filas anteriores dejan de leerse)
+        e invalida los índices SIC -> slot de los workers. Solo lo llama el servidor, sin
+        workers procesando cursos.
+        """
+        worker_generation, generation, _ = self._table._read_header()
+        self._table._write_header(worker_generation, generation + 1, 0)
+        self._index = {}
+        self._names = {}
+        self._indexed = 0
+        self._next_slot = 0
+        self._generation = generation + 1
+
+
+def _attach_view(table: SharedStateTable, which: str):
+    """Reconstruye una vista en el proceso que la recibe (la tabla ya se adjuntó por nombre)."""
+    return getattr(table, which)
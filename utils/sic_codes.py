@@ -0,0 +1,53 @@
+"""
+Orden natural de los códigos SIC.
+
+Los códigos son jerárquicos ("01" división, "0119" industria, "011903" detalle) y suelen llegar
+con sufijo decimal ("011903.0"). Excel además elimina los ceros iniciales ("100" es "0100").
+El orden de texto de SQLite falla con esas formas ("1000" < "500", "10.0" < "9.0"),
+así que cada código se convierte en una clave de texto cuyo orden lexicográfico es el natural:
+
+- La parte entera se rellena con un cero a la izquierda hasta tener longitud par.
+- Un '.' separa la parte entera, de modo que un prefijo ("01") va antes que sus hijos ("0119").
+- La parte decimal se compara como número.
+- Los códigos no numéricos van al final, en orden de texto.
+"""
+
+import re
+
+_SIC_RE = re.compile(r"^(\d+)(?:\.(\d*))?$")
+
+# Dígitos de la parte decimal en la clave
+FRACTION_WIDTH = 9
+
+
+def sic_sort_key(sic_code) -> str:
+    """
+    Clave de ordenación natural de un código SIC ("1.0" y "01.0" comparten clave).
+
+    Args:
+        sic_code: Código SIC tal como está en la base de datos
+
+    Returns:
+        Texto comparable lexicográficamente
+    """
+    code = str(sic_code).strip() if sic_code is not None else ""
+    match = _SIC_RE.match(code)
+    if not match:
+        return "~" + code
+    digits, fraction = match.group(1), match.group(2) or "0"
+    if len(digits) % 2:
+        digits = "0" + digits
+    return f"{digits}.{int(fraction or 0):0{FRACTION_WIDTH}d}"
+
+
+def sic_upper_bound(sic_code) -> str:
+    """
+    Clave máxima de un rango SIC que termina en `sic_code`.
+
+    Un código sin decimales incluye a sus hijos ("59" llega hasta "5999.9"); uno con
+    decimales ("59.0") o no numérico es exacto.
+    """
+    key = sic_sort_key(sic_code)
+    if key.startswith("~") or "." in str(sic_code):
+        return key
+    return key.split(".")[0] + "~"
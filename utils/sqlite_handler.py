@@ -2,10 +2,41 @@ import os
 import sys
 import sqlite3
 import logging
-from typing import List, Tuple, Optional
+import threading
+from itertools import islice
+from typing import Callable, Iterable, List, Tuple, Optional, Dict
+
+from utils.sic_codes import sic_sort_key
 
 logger = logging.getLogger(__name__)
 
+# Esquema de la tabla de cursos (también se usa para la tabla de carga 'courses_staging')
+COURSES_TABLE_SQL = """
+CREATE TABLE {table} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sic_code TEXT NOT NULL,
+    course_name TEXT NOT NULL,
+    status TEXT DEFAULT 'PENDING',
+    server TEXT,
+    task_id TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sic_sort_key TEXT
+)
+"""
+# Filas por executemany en la carga masiva de cursos
+BULK_INSERT_BATCH_SIZE = 5000
+
+# Segundos que una escritura espera a que se libere el bloqueo antes de fallar
+BUSY_TIMEOUT_SECONDS = 30
+
+# Conexiones persistentes por hilo (y por proceso: tras un fork se abre una nueva)
+_local = threading.local()
+# Columnas por (db_path, tabla) cacheadas en el proceso; se invalidan al migrar
+_schema_cache: Dict[Tuple[str, str], List[str]] = {}
+# Bases de datos cuyo esquema ya se verificó/migró en este proceso
+_initialized_dbs = set()
+_init_lock = threading.Lock()
+
 class SQLiteHandler:
     """
     Maneja la conexión y las operaciones con la base de datos SQLite.
@@ -20,8 +51,13 @@ class SQLiteHandler:
             base_path = os.path.dirname(os.path.abspath(__file__))
         
         self.db_path = os.path.join(base_path, db_path)
-        logger.info(f"SQLiteHandler inicializado con base de datos: {self.db_path}")
-        self.create_table_if_not_exists()
+        # El esquema se verifica una vez por proceso, no en cada instancia
+        with _init_lock:
+            if self.db_path not in _initialized_dbs:
+                logger.info(f"SQLiteHandler inicializado con base de datos: {self.db_path}")
+                self.create_table_if_not_exists()
+                self.create_course_stats_table()
+                _initialized_dbs.add(self.db_path)
 
     def create_table_if_not_exists(self):
         """Crea la tabla 'courses' si no existe y maneja la migración del esquema."""
@@ -36,18 +72,9 @@ class SQLiteHandler:
 
             if not table_exists:
                 # La tabla no existe, la creamos con el nuevo esquema
-                cursor.execute("""
-                CREATE TABLE courses (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    sic_code TEXT NOT NULL,
-                    course_name TEXT NOT NULL,
-                    status TEXT DEFAULT 'PENDING',
-                    server TEXT,
-                    task_id TEXT,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                """)
+                cursor.execute(COURSES_TABLE_SQL.format(table="courses"))
                 logger.info("Tabla 'courses' creada con el nuevo esquema.")
+                self._create_courses_index(cursor)
                 conn.commit()
                 return
 
@@ -63,17 +90,7 @@ class SQLiteHandler:
                 cursor.execute("ALTER TABLE courses RENAME TO courses_old;")
 
                 # 4. Crear tabla nueva con el esquema correcto
-                cursor.execute("""
-                CREATE TABLE courses (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    sic_code TEXT NOT NULL,
-                    course_name TEXT NOT NULL,
-                    status TEXT DEFAULT 'PENDING',
-                    server TEXT,
-                    task_id TEXT,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                """)
+                cursor.execute(COURSES_TABLE_SQL.format(table="courses"))
 
                 # 5. Copiar datos, mapeando columnas antiguas a nuevas
                 old_columns = list(columns_info.keys())
@@ -103,17 +120,156 @@ class SQLiteHandler:
             else:
                 logger.info("El esquema de la tabla 'courses' ya está actualizado.")
 
+            cursor.execute("PRAGMA table_info(courses);")
+            if 'sic_sort_key' not in {info[1] for info in cursor.fetchall()}:
+                cursor.execute("ALTER TABLE courses ADD COLUMN sic_sort_key TEXT;")
+                logger.info("Añadida la columna 'sic_sort_key' a 'courses'.")
+            # Rellenar la clave de orden de las filas migradas o insertadas por versiones anteriores
+            cursor.execute("UPDATE courses SET sic_sort_key = sic_sort_key(sic_code) WHERE sic_sort_key IS NULL;")
+            if cursor.rowcount:
+                logger.info(f"Calculada la clave de orden SIC de {cursor.rowcount} cursos.")
+
+            self._create_courses_index(cursor)
+            conn.commit()
+
         except Exception as e:
             logger.error(f"Error al crear/migrar la tabla 'courses': {e}")
             if conn:
                 conn.rollback()
         finally:
+            self._invalidate_schema('courses')
+
+    def _create_courses_index(self, cursor):
+        """
+        Crea los índices de 'courses': (sic_code, course_name) para las actualizaciones de estado y
+        (sic_sort_key, id) para el orden natural y las consultas por rango SIC.
+        """
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_courses_sic_name ON courses (sic_code, course_name);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_courses_sic_sort ON courses (sic_sort_key, id);")
+
+    def create_course_stats_table(self):
+        """Crea la tabla 'course_stats' (resultados históricos por curso) si no existe."""
+        conn = None
+        try:
+            conn = self._connect()
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS course_stats (
+                sic_code TEXT NOT NULL,
+                course_name TEXT NOT NULL,
+                result_count INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (sic_code, course_name)
+            )
+            """)
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Error al crear la tabla 'course_stats': {e}")
             if conn:
-                conn.close()
+                conn.rollback()
+
+    def record_course_result_counts(self, counts: List[Tuple[str, str, int]]) -> bool:
+        """
+        Guarda el número de resultados obtenidos por cada curso (último valor).
+
+        Args:
+            counts: Lista de tuplas (sic_code, course_name, result_count)
+
+        Returns:
+            True si la operación fue exitosa, False en caso contrario.
+        """
+        if not counts:
+            return True
+        conn = None
+        try:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO course_stats (sic_code, course_name, result_count, updated_at) "
+                "VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+                counts
+            )
+            conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Error guardando estadísticas de cursos en SQLite: {e}")
+            if conn:
+                conn.rollback()
+            return False
+
+    def get_course_result_counts(self) -> Dict[str, int]:
+        """
+        Obtiene el número histórico de resultados por código SIC.
+
+        Returns:
+            Diccionario {sic_code: result_count}
+        """
+        conn = None
+        try:
+            conn = self._connect()
+            rows = conn.execute("SELECT sic_code, MAX(result_count) FROM course_stats GROUP BY sic_code").fetchall()
+            return {row[0]: row[1] for row in rows}
+        except Exception as e:
+            logger.error(f"Error obteniendo estadísticas de cursos desde SQLite: {e}")
+            return {}
 
     def _connect(self):
-        """Establece una conexión con la base de datos."""
-        return sqlite3.connect(self.db_path)
+        """
+        Retorna la conexión persistente de este hilo con la base de datos, abriéndola si es necesario.
+
+        Las conexiones se abren en modo WAL (lectores y escritor no se bloquean entre sí) y con
+        busy timeout, de modo que varios workers pueden escribir estados sin fallar con
+        'database is locked'.
+        """
+        connections = getattr(_local, 'connections', None)
+        if connections is None:
+            connections = _local.connections = {}
+        pid = os.getpid()
+        entry = connections.get(self.db_path)
+        if entry is not None and entry[0] == pid:
+            return entry[1]
+
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+        except sqlite3.DatabaseError as e:
+            logger.warning(f"No se pudo activar WAL en {self.db_path}: {e}")
+        # Disponible en SQL para rellenar la clave de orden de filas antiguas
+        conn.create_function("sic_sort_key", 1, sic_sort_key, deterministic=True)
+        connections[self.db_path] = (pid, conn)
+        return conn
+
+    def close(self):
+        """Cierra la conexión persistente de este hilo con la base de datos."""
+        connections = getattr(_local, 'connections', None)
+        if not connections:
+            return
+        entry = connections.pop(self.db_path, None)
+        if entry is not None and entry[0] == os.getpid():
+            try:
+                entry[1].close()
+            except Exception:
+                pass
+
+    def get_catalog_version(self) -> int:
+        """
+        Versión del catálogo de cursos (PRAGMA user_version).
+        Se incrementa cada vez que la tabla 'courses' se vacía o se cargan cursos nuevos.
+        """
+        try:
+            return self._connect().execute("PRAGMA user_version;").fetchone()[0]
+        except Exception as e:
+            logger.error(f"Error obteniendo la versión del catálogo de cursos: {e}")
+            return -1
+
+    def _bump_catalog_version(self, cursor):
+        """Incrementa la versión del catálogo dentro de la transacción en curso."""
+        cursor.execute("PRAGMA user_version;")
+        version = cursor.fetchone()[0]
+        cursor.execute(f"PRAGMA user_version = {int(version) + 1};")
+
+    def _invalidate_schema(self, table_name: str):
+        """Descarta el esquema cacheado de una tabla (tras crearla o migrarla)."""
+        _schema_cache.pop((self.db_path, table_name), None)
 
     def load_course_data(self) -> bool:
         """
@@ -129,7 +285,6 @@ class SQLiteHandler:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM courses")
             count = cursor.fetchone()[0]
-            conn.close()
             
             logger.info(f"Conexión exitosa a la base de datos SQLite. Total de cursos: {count}")
             return True
@@ -141,6 +296,7 @@ class SQLiteHandler:
     def get_table_schema(self, table_name: str) -> List[str]:
         """
         Obtiene el esquema (nombres de columnas) de una tabla.
+        El resultado se cachea por proceso; las migraciones invalidan la caché.
         
         Args:
             table_name: Nombre de la tabla.
@@ -148,39 +304,21 @@ class SQLiteHandler:
         Returns:
             Lista de nombres de columnas.
         """
-        conn = None
-        try:
-            conn = self._connect()
-            cursor = conn.cursor()
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            return [row[1] for row in cursor.fetchall()]
-        except Exception as e:
-            logger.error(f"Error obteniendo esquema de la tabla {table_name}: {e}")
-            return []
-        finally:
-            if conn:
-                conn.close()
-        """
-        Obtiene el esquema (nombres de columnas) de una tabla.
-        
-        Args:
-            table_name: Nombre de la tabla.
-            
-        Returns:
-            Lista de nombres de columnas.
-        """
-        conn = None
+        key = (self.db_path, table_name)
+        cached = _schema_cache.get(key)
+        if cached is not None:
+            return cached
         try:
             conn = self._connect()
             cursor = conn.cursor()
             cursor.execute(f"PRAGMA table_info({table_name})")
-            return [row[1] for row in cursor.fetchall()]
+            columns = [row[1] for row in cursor.fetchall()]
+            if columns:
+                _schema_cache[key] = columns
+            return columns
         except Exception as e:
             logger.error(f"Error obteniendo esquema de la tabla {table_name}: {e}")
             return []
-        finally:
-            if conn:
-                conn.close()
 
     def get_detailed_sic_codes_with_courses(self) -> List[Tuple[str, str, str, str]]:
         """
@@ -201,7 +339,7 @@ class SQLiteHandler:
             query = "SELECT sic_code, course_name, status"
             if 'server' in schema:
                 query += ", server"
-            query += " FROM courses"
+            query += " FROM courses ORDER BY sic_sort_key, id"
             
             cursor.execute(query)
             rows = cursor.fetchall()
@@ -225,9 +363,6 @@ class SQLiteHandler:
         except Exception as e:
             logger.error(f"Error obteniendo códigos SIC detallados desde SQLite: {e}")
             return []
-        finally:
-            if conn:
-                conn.close()
 
     def update_course_status(self, sic_code: str, course_name: str, status: str, server_info: Optional[str] = None) -> bool:
         """
@@ -270,10 +405,9 @@ class SQLiteHandler:
                 return False
         except Exception as e:
             logger.error(f"Error al actualizar el estado del curso en SQLite: {e}")
-            return False
-        finally:
             if conn:
-                conn.close()
+                conn.rollback()
+            return False
 
     def update_range_status(self, courses_to_update: List[Tuple[str, str]], status: str, server_info: str) -> bool:
         """
@@ -294,21 +428,16 @@ class SQLiteHandler:
             
             schema = self.get_table_schema('courses')
             
-            updated_count = 0
-            for sic_code, course_name in courses_to_update:
-                query = "UPDATE courses SET status = ?"
-                params = [status]
-                
-                if 'server' in schema:
-                    query += ", server = ?"
-                    params.append(server_info)
-                
-                query += " WHERE sic_code = ? AND course_name = ?"
-                params.extend([sic_code, course_name])
-                
-                cursor.execute(query, tuple(params))
-                updated_count += cursor.rowcount
+            # Una sola sentencia preparada para todo el rango (executemany en una transacción)
+            if 'server' in schema:
+                query = "UPDATE courses SET status = ?, server = ? WHERE sic_code = ? AND course_name = ?"
+                params = [(status, server_info, sic_code, course_name) for sic_code, course_name in courses_to_update]
+            else:
+                query = "UPDATE courses SET status = ? WHERE sic_code = ? AND course_name = ?"
+                params = [(status, sic_code, course_name) for sic_code, course_name in courses_to_update]
             
+            cursor.executemany(query, params)
+            updated_count = cursor.rowcount
             conn.commit()
             
             if updated_count > 0:
@@ -319,10 +448,9 @@ class SQLiteHandler:
                 return False
         except Exception as e:
             logger.error(f"Error masivo al actualizar el estado de los cursos en SQLite: {e}")
-            return False
-        finally:
             if conn:
-                conn.close()
+                conn.rollback()
+            return False
 
     def get_all_courses(self) -> List[Tuple[str, str]]:
         """
@@ -336,7 +464,7 @@ class SQLiteHandler:
             conn = self._connect()
             cursor = conn.cursor()
             
-            cursor.execute("SELECT sic_code, course_name FROM courses ORDER BY sic_code")
+            cursor.execute("SELECT sic_code, course_name FROM courses ORDER BY sic_sort_key, id")
             rows = cursor.fetchall()
             
             # Convertir a lista de tuplas (sic_code, course_name)
@@ -348,9 +476,40 @@ class SQLiteHandler:
         except Exception as e:
             logger.error(f"Error obteniendo todos los cursos desde SQLite: {e}")
             raise  # Re-lanzar el error para que el servidor lo vea
-        finally:
-            if conn:
-                conn.close()
+
+    def sic_exists(self, sic_code: str) -> bool:
+        """Indica si hay algún curso con ese código SIC (búsqueda por índice; "1.0" equivale a "01.0")."""
+        row = self._connect().execute(
+            "SELECT 1 FROM courses WHERE sic_sort_key = ? LIMIT 1", (sic_sort_key(sic_code),)
+        ).fetchone()
+        return row is not None
+
+    def get_courses_in_sic_range(self, from_sic: str, to_sic: str) -> List[Tuple[str, str, str, str]]:
+        """
+        Obtiene los cursos cuyo código SIC está entre from_sic y to_sic (ambos inclusive) en orden natural.
+        La consulta recorre solo el tramo del índice idx_courses_sic_sort, sin leer el catálogo entero;
+        los extremos no tienen por qué existir y se intercambian si llegan al revés.
+
+        Args:
+            from_sic: Código SIC inicial
+            to_sic: Código SIC final
+
+        Returns:
+            List[Tuple[str, str, str, str]]: Lista de tuplas (sic_code, course_name, status, server)
+        """
+        low, high = sic_sort_key(from_sic), sic_sort_key(to_sic)
+        if low > high:
+            low, high = high, low
+        try:
+            rows = self._connect().execute(
+                "SELECT sic_code, course_name, status, server FROM courses "
+                "WHERE sic_sort_key BETWEEN ? AND ? ORDER BY sic_sort_key, id",
+                (low, high),
+            ).fetchall()
+            return [(row[0] or "", row[1] or "", row[2] or "", row[3] or "") for row in rows]
+        except Exception as e:
+            logger.error(f"Error obteniendo cursos del rango {from_sic} - {to_sic}: {e}")
+            raise
 
     def clear_courses_table(self) -> bool:
         """
@@ -365,6 +524,7 @@ class SQLiteHandler:
             cursor = conn.cursor()
             
             cursor.execute("DELETE FROM courses")
+            self._bump_catalog_version(cursor)
             conn.commit()
             
             logger.info("Tabla 'courses' limpiada exitosamente.")
@@ -375,9 +535,6 @@ class SQLiteHandler:
             if conn:
                 conn.rollback()
             return False
-        finally:
-            if conn:
-                conn.close()
 
     def insert_courses(self, courses: List[Tuple[str, str]]) -> bool:
         """
@@ -404,7 +561,7 @@ class SQLiteHandler:
                 
                 # Filtrar cursos con nombres vacíos (evita violación de NOT NULL)
                 if course_name.strip():  # Solo insertar si course_name no está vacío
-                    courses_to_insert.append((sic_code, course_name))
+                    courses_to_insert.append((sic_code, course_name, sic_sort_key(sic_code)))
                 else:
                     skipped_count += 1
             
@@ -412,9 +569,10 @@ class SQLiteHandler:
                 logger.warning(f"Se omitieron {skipped_count} cursos con nombres vacíos")
             
             cursor.executemany(
-                "INSERT INTO courses (sic_code, course_name, status) VALUES (?, ?, 'PENDING')",
+                "INSERT INTO courses (sic_code, course_name, status, sic_sort_key) VALUES (?, ?, 'PENDING', ?)",
                 courses_to_insert
             )
+            self._bump_catalog_version(cursor)
             conn.commit()
             
             logger.info(f"Insertados {len(courses_to_insert)} cursos en la base de datos SQLite.")
@@ -425,9 +583,77 @@ class SQLiteHandler:
             if conn:
                 conn.rollback()
             return False
+
+    def replace_courses(self, courses: Iterable[Tuple[str, str]],
+                        progress_callback: Optional[Callable[[int], None]] = None,
+                        batch_size: int = BULK_INSERT_BATCH_SIZE) -> Tuple[int, int]:
+        """
+        Reemplaza el catálogo de cursos en una sola transacción.
+
+        Los cursos se consumen del iterable por lotes y se cargan en la tabla 'courses_staging'; al
+        terminar se sustituye 'courses' por ella (DROP + RENAME) y se crean los índices. Los demás
+        procesos siguen viendo el catálogo anterior hasta el commit, y si algo falla no cambia nada.
+
+        Args:
+            courses: Iterable de tuplas (sic_code, course_name); puede ser un generador
+            progress_callback: Se llama con el total de filas cargadas tras cada lote
+            batch_size: Filas por executemany
+
+        Returns:
+            Tupla (cursos cargados, cursos omitidos por nombre vacío)
+        """
+        conn = self._connect()
+        loaded = skipped = 0
+
+        def prepared(batch):
+            nonlocal skipped
+            for sic_code, course_name in batch:
+                sic_code = str(sic_code) if sic_code is not None else ""
+                course_name = str(course_name) if course_name is not None else ""
+                # Filtrar cursos con nombres vacíos (evita violación de NOT NULL)
+                if not course_name.strip():
+                    skipped += 1
+                    continue
+                yield (sic_code, course_name, sic_sort_key(sic_code))
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.cursor()
+            cursor.execute("DROP TABLE IF EXISTS courses_staging")
+            cursor.execute(COURSES_TABLE_SQL.format(table="courses_staging"))
+            iterator = iter(courses)
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+                cursor.executemany(
+                    "INSERT INTO courses_staging (sic_code, course_name, status, sic_sort_key) VALUES (?, ?, 'PENDING', ?)",
+                    prepared(batch),
+                )
+                loaded += cursor.rowcount
+                if progress_callback:
+                    progress_callback(loaded)
+            cursor.execute("DROP TABLE IF EXISTS courses")
+            cursor.execute("ALTER TABLE courses_staging RENAME TO courses")
+            # Los índices se crean una vez cargados los datos (más rápido que mantenerlos fila a fila)
+            self._create_courses_index(cursor)
+            self._bump_catalog_version(cursor)
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Error reemplazando la tabla 'courses': {e}")
+            conn.rollback()
+            raise
         finally:
-            if conn:
-                conn.close()
+            self._invalidate_schema('courses')
+
+        if skipped:
+            logger.warning(f"Se omitieron {skipped} cursos con nombres vacíos")
+        logger.info(f"Catálogo de cursos reemplazado: {loaded} cursos cargados en SQLite.")
+        return loaded, skipped
+
+    def count_courses(self) -> int:
+        """Número de cursos en la tabla 'courses'."""
+        return self._connect().execute("SELECT COUNT(*) FROM courses").fetchone()[0]
 
     def get_pending_tasks(self, status: str = 'PENDING') -> List[Tuple[str, str, str]]:
         """Obtiene cursos con un estado específico (ej: PENDING, EXTRACTING)."""
@@ -440,9 +666,6 @@ class SQLiteHandler:
         except Exception as e:
             logger.error(f"Error obteniendo tareas pendientes: {e}")
             return []
-        finally:
-            if conn:
-                conn.close()
 
     def update_task_metadata(self, sic_code: str, course_name: str, status: str, task_id: Optional[str] = None):
         """Actualiza estado y task_id de forma atómica."""
@@ -461,6 +684,5 @@ class SQLiteHandler:
             conn.commit()
         except Exception as e:
             logger.error(f"Error actualizando metadata: {e}")
-        finally:
             if conn:
-                conn.close()
\ No newline at end of file
+                conn.rollback()
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""
+Generación de ficheros ZIP en streaming.
+
+El archivo se escribe directamente en el cuerpo de la respuesta: cada trozo comprimido se
+entrega en cuanto existe, sin crear el ZIP en disco. Como la salida no admite seek, zipfile
+usa descriptores de datos (tamaños y CRC después de cada entrada).
+"""
+
+import os
+import logging
+import zipfile
+from typing import Iterable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class _StreamBuffer:
+    """Destino de escritura de zipfile que acumula los bytes hasta que el generador los recoge."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(files: Iterable[Tuple[str, str, int]], store: bool = False) -> Iterator[bytes]:
+    """
+    Genera el contenido de un ZIP trozo a trozo.
+
+    Args:
+        files: Tuplas (ruta, nombre dentro del ZIP, bytes a incluir). El tamaño se toma al
+            listar, de modo que un CSV que sigue creciendo entra con un contenido coherente.
+        store: True para guardar sin comprimir (datos ya comprimidos o máxima velocidad)
+
+    Yields:
+        Bytes del ZIP en orden
+    """
+    buffer = _StreamBuffer()
+    compression = zipfile.ZIP_STORED if store else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(buffer, "w", compression=compression, allowZip64=True) as zf:
+        for path, arcname, size in files:
+            try:
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                info.compress_type = compression
+                with open(path, "rb") as src, zf.open(info, "w", force_zip64=size > zipfile.ZIP64_LIMIT) as dst:
+                    remaining = size
+                    while remaining > 0:
+                        chunk = src.read(min(READ_CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                        remaining -= len(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+            except OSError as e:
+                # El fichero pudo borrarse entre el listado y la lectura
+                logger.warning(f"No se pudo añadir {path} al ZIP: {e}")
+            data = buffer.drain()
+            if data:
+                yield data
+    # Directorio central
+    data = buffer.drain()
+    if data:
+        yield data